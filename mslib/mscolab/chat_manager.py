@@ -26,6 +26,7 @@
 """
 import datetime
 import fs
+from sqlalchemy.orm import joinedload, selectinload
 
 from mslib.mscolab.conf import mscolab_settings
 from mslib.mscolab.models import db, Message, MessageType
@@ -35,8 +36,11 @@ from mslib.mscolab.utils import get_message_dict
 class ChatManager:
     """Class with handler functions for chat related functionalities"""
 
-    def __init__(self):
-        pass
+    def __init__(self, yield_per=500):
+        """
+        yield_per: number of messages fetched at once when streaming the chat history
+        """
+        self.yield_per = yield_per
 
     def add_message(self, user, text, op_id, message_type=MessageType.TEXT, reply_id=None):
         """
@@ -52,32 +56,47 @@ class ChatManager:
         db.session.commit()
         return message
 
-    def get_messages(self, op_id, timestamp=None):
+    def get_messages(self, op_id, timestamp=None, limit=None, before_id=None, after_id=None):
         """
         op_id: operation id
         timestamp:  if provided, messages only after this time stamp is provided
+        limit: if provided, at most this number of messages, the newest ones unless after_id is given
+        before_id: if provided, only messages older than the message with this id
+        after_id: if provided, only messages newer than the message with this id
+        """
+        return list(self.iter_messages(op_id, timestamp, limit=limit, before_id=before_id, after_id=after_id))
+
+    def iter_messages(self, op_id, timestamp=None, limit=None, before_id=None, after_id=None):
+        """
+        Generator version of get_messages, yields the message dicts in chronological order.
+        Without a limit the messages are fetched from the database in batches of yield_per.
         """
         if timestamp is None:
             timestamp = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
         else:
             timestamp = datetime.datetime.fromisoformat(timestamp)
         messages = Message.query \
+            .options(joinedload(Message.user), selectinload(Message.replies).joinedload(Message.user)) \
             .filter(Message.op_id == op_id) \
             .filter(Message.reply_id.is_(None)) \
-            .filter(Message.created_at > timestamp) \
-            .all()
+            .filter(Message.created_at > timestamp)
+        if before_id is not None:
+            messages = messages.filter(Message.id < before_id)
+        if after_id is not None:
+            messages = messages.filter(Message.id > after_id)
+
+        if limit is None:
+            messages = messages.order_by(Message.id).yield_per(self.yield_per)
+        elif after_id is None:
+            # the newest messages of this page, paging goes backwards in time
+            messages = reversed(messages.order_by(Message.id.desc()).limit(limit).all())
+        else:
+            messages = messages.order_by(Message.id).limit(limit).all()
 
-        message_list = []
         for message in messages:
-            replies_list = []
-            for reply in message.replies:
-                reply_dict = get_message_dict(reply)
-                replies_list.append(reply_dict)
             message_dict = get_message_dict(message)
-            message_dict["replies"] = replies_list
-            message_list.append(message_dict)
-
-        return message_list
+            message_dict["replies"] = [get_message_dict(reply) for reply in message.replies]
+            yield message_dict
 
     def edit_message(self, message_id, new_message_text):
         message = Message.query.filter_by(id=message_id).first()
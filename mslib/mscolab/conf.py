@@ -40,6 +40,21 @@ class default_mscolab_settings:
     # expire token in seconds
     # EXPIRATION = 86400
 
+    # seconds a verified auth token is cached in the server process, 0 disables the cache
+    AUTH_TOKEN_CACHE_TTL = 30
+
+    # the git repository of an operation is packed after every GIT_GC_INTERVAL changes, 0 disables packing
+    GIT_GC_INTERVAL = 100
+
+    # Running several MSColab worker processes behind a load balancer needs
+    # - SOCKETIO_MESSAGE_QUEUE: url of the message queue Socket.IO uses to pass events between the workers
+    # - SESSION_REGISTRY_URL: url of the store for the shared sessions and active users
+    # - OPERATION_LOCK_DIR: local directory for the lock files of the operations shared by all workers
+    # e.g. "redis://localhost:6379/0" for the urls, None runs a single process
+    SOCKETIO_MESSAGE_QUEUE = None
+    SESSION_REGISTRY_URL = None
+    OPERATION_LOCK_DIR = None
+
     # In the unit days when Operations get archived because not used
     ARCHIVE_THRESHOLD = 30
 
@@ -24,21 +24,68 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import os
 import sys
 import secrets
 import time
 import datetime
 import fs
 import difflib
+import functools
 import logging
 import git
 import threading
 import mimetypes
+from flask import g, has_app_context
 from werkzeug.utils import secure_filename
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from mslib.utils.verify_waypoint_data import verify_waypoint_data
 from mslib.mscolab.models import db, Operation, Permission, User, Change, Message
 from mslib.mscolab.conf import mscolab_settings
+from mslib.mscolab.utils import AuthTokenCache, InterProcessLock, get_waypoints, diff_waypoints
+
+
+@functools.lru_cache(maxsize=32)
+def _get_repository(operation_path):
+    """
+    Returns the repository in operation_path and the lock of reading its objects
+
+    The objects of a repository are read by one persistent git cat-file process, which
+    serves one request at a time.
+    """
+    return git.Repo(operation_path), threading.Lock()
+
+
+@functools.lru_cache(maxsize=256)
+def _read_version(operation_path, commit_hash):
+    """
+    Returns the content of main.ftml in the commit commit_hash of the repository in operation_path
+
+    Commits never change so their contents are cached.
+    """
+    def read():
+        repo, lock = _get_repository(operation_path)
+        with lock:
+            return (repo.commit(commit_hash).tree / "main.ftml").data_stream.read().decode("utf-8")
+
+    try:
+        return read()
+    except Exception:
+        # the repository may have been deleted and created again, e.g. by another worker process
+        _get_repository.cache_clear()
+        return read()
+
+
+def _pack_repository(operation_path):
+    """
+    Packs the objects of the repository in operation_path, concurrent commits are safe
+    """
+    try:
+        git.Repo(operation_path).git.gc("--quiet")
+    except (git.exc.GitCommandError, git.exc.NoSuchPathError) as ex:
+        # e.g. the operation was deleted meanwhile
+        logging.debug("packing %s failed: %s", operation_path, ex)
 
 
 class FileManager:
@@ -48,13 +95,21 @@ class FileManager:
         self.data_dir = data_dir
         self.operation_dict_lock = threading.Lock()
         self.operation_locks = {}
+        self.user_cache = AuthTokenCache(mscolab_settings.AUTH_TOKEN_CACHE_TTL)
+        # background threads packing the git repositories, by op_id
+        self.packing_threads = {}
 
     def _get_operation_lock(self, op_id):
         with self.operation_dict_lock:
             try:
                 return self.operation_locks[op_id]
             except KeyError:
-                self.operation_locks[op_id] = threading.Lock()
+                if mscolab_settings.OPERATION_LOCK_DIR is None:
+                    self.operation_locks[op_id] = threading.Lock()
+                else:
+                    # several worker processes, the lock has to be shared between them
+                    self.operation_locks[op_id] = InterProcessLock(
+                        os.path.join(mscolab_settings.OPERATION_LOCK_DIR, f"operation_{op_id}.lock"))
                 return self.operation_locks[op_id]
 
     def create_operation(self, path, description, user, last_used=None, content=None, category="default", active=True):
@@ -92,6 +147,7 @@ class FileManager:
             perm = Permission(user.id, operation_id, "creator")
             db.session.add(perm)
             db.session.commit()
+            self._invalidate_permission_cache()
             # here we can import the permissions from Group file
             if not path.endswith(mscolab_settings.GROUP_POSTFIX):
                 import_op = Operation.query.filter_by(path=f"{category}{mscolab_settings.GROUP_POSTFIX}").first()
@@ -146,16 +202,39 @@ class FileManager:
                 })
         return operations
 
+    def _get_access_level(self, u_id, op_id):
+        """
+        op_id: operation id
+        u_id: user-id
+
+        Returns the access level of the user in the operation or None if the user is not a member.
+        Inside a request verified by verify_user the result is kept on flask.g, so that the
+        is_member/is_admin/is_creator/is_collaborator/is_viewer checks of one request share one query.
+        """
+        cache = g.get("permission_cache") if has_app_context() else None
+        key = (u_id, str(op_id))
+        if cache is not None and key in cache:
+            return cache[key]
+        perm = Permission.query.filter_by(u_id=u_id, op_id=op_id).first()
+        access_level = None if perm is None else perm.access_level
+        if cache is not None:
+            cache[key] = access_level
+        return access_level
+
+    def _invalidate_permission_cache(self):
+        """
+        Drops the request local access levels after permissions were changed
+        """
+        if has_app_context() and g.get("permission_cache") is not None:
+            g.permission_cache.clear()
+
     def is_member(self, u_id, op_id):
         """
         op_id: operation id
         u_id: user-id
         """
         # return true only if the user is a member
-        perm = Permission.query.filter_by(u_id=u_id, op_id=op_id).first()
-        if perm is None:
-            return False
-        return True
+        return self._get_access_level(u_id, op_id) is not None
 
     def is_admin(self, u_id, op_id):
         """
@@ -163,12 +242,7 @@ class FileManager:
         u_id: user-id
         """
         # return true only if the user is admin
-        perm = Permission.query.filter_by(u_id=u_id, op_id=op_id).first()
-        if perm is None:
-            return False
-        elif perm.access_level != "admin":
-            return False
-        return True
+        return self._get_access_level(u_id, op_id) == "admin"
 
     def is_creator(self, u_id, op_id):
         """
@@ -176,12 +250,7 @@ class FileManager:
         u_id: user-id
         """
         # return true only if the user is creator
-        perm = Permission.query.filter_by(u_id=u_id, op_id=op_id).first()
-        if perm is None:
-            return False
-        elif perm.access_level != "creator":
-            return False
-        return True
+        return self._get_access_level(u_id, op_id) == "creator"
 
     def is_collaborator(self, u_id, op_id):
         """
@@ -189,12 +258,7 @@ class FileManager:
         u_id: user-id
         """
         # return true only if the user is collaborator
-        perm = Permission.query.filter_by(u_id=u_id, op_id=op_id).first()
-        if perm is None:
-            return False
-        elif perm.access_level != "collaborator":
-            return False
-        return True
+        return self._get_access_level(u_id, op_id) == "collaborator"
 
     def is_viewer(self, u_id, op_id):
         """
@@ -202,24 +266,21 @@ class FileManager:
         u_id: user-id
         """
         # return true only if the user is viewer
-        perm = Permission.query.filter_by(u_id=u_id, op_id=op_id).first()
-        if perm is None:
-            return False
-        elif perm.access_level != "viewer":
-            return False
-        return True
+        return self._get_access_level(u_id, op_id) == "viewer"
 
     def auth_type(self, u_id, op_id):
         """
         op_id: operation id
         u_id: user-id
         """
-        perm = Permission.query.filter_by(u_id=u_id, op_id=op_id).first()
-        if perm is None:
+        access_level = self._get_access_level(u_id, op_id)
+        if access_level is None:
             return False
-        return perm.access_level
+        return access_level
 
     def modify_user(self, user, attribute=None, value=None, action=None):
+        if user.id is not None:
+            self.user_cache.invalidate(user.id)
         if action == "create":
             user_query = User.query.filter_by(emailid=str(user.emailid)).first()
             if user_query is None:
@@ -322,6 +383,7 @@ class FileManager:
                 self.delete_user_profile_image(user.profile_image_path)
             user.profile_image_path = relative_file_path
             db.session.commit()
+            self.user_cache.invalidate(user_id)
             return True, "Image uploaded successfully"
         else:
             return False, "User not found"
@@ -376,8 +438,10 @@ class FileManager:
         operation = Operation.query.filter_by(id=op_id).first()
         with fs.open_fs(self.data_dir) as operation_dir:
             operation_dir.removetree(operation.path)
+        _get_repository.cache_clear()
         db.session.delete(operation)
         db.session.commit()
+        self._invalidate_permission_cache()
         return True
 
     def get_authorized_users(self, op_id):
@@ -430,16 +494,32 @@ class FileManager:
                 change = Change(op_id, user.id, cm.hexsha)
                 db.session.add(change)
                 db.session.commit()
+                self._pack_repository(repo, op_id)
                 return True
             return False
 
+    def _pack_repository(self, repo, op_id):
+        """
+        Packs the git repository of op_id every GIT_GC_INTERVAL changes
+
+        git gc runs in a background thread, so that the request saving the change does not wait for it.
+        """
+        interval = mscolab_settings.GIT_GC_INTERVAL
+        if not interval or Change.query.filter_by(op_id=op_id).count() % interval != 0:
+            return
+        thread = self.packing_threads.get(op_id)
+        if thread is not None and thread.is_alive():
+            return
+        self.packing_threads[op_id] = threading.Thread(
+            target=_pack_repository, args=(repo.working_dir,), name=f"gc operation {op_id}", daemon=True)
+        self.packing_threads[op_id].start()
+
     def get_file(self, op_id, user):
         """
         op_id: operation-id
         user: user of this request
         """
-        perm = Permission.query.filter_by(u_id=user.id, op_id=op_id).first()
-        if perm is None:
+        if not self.is_member(user.id, op_id):
             return False
         operation = Operation.query.filter_by(id=op_id).first()
         if operation is None:
@@ -451,30 +531,31 @@ class FileManager:
                 operation_data = operation_file.read()
             return operation_data
 
-    def get_all_changes(self, op_id, user, named_version=False):
+    def get_all_changes(self, op_id, user, named_version=False, limit=None, before_id=None):
         """
         op_id: operation-id
         user: user of this request
+        named_version: only changes having a version name
+        limit: maximum number of changes returned, None for all
+        before_id: only changes older than the change with this id
 
-        Get all changes, mostly to be used in the chat window, in the side panel
+        Get the changes, newest first, mostly to be used in the chat window, in the side panel
         to render the recent changes.
         """
-        perm = Permission.query.filter_by(u_id=user.id, op_id=op_id).first()
-        if perm is None:
+        if not self.is_member(user.id, op_id):
             return False
+        changes = Change.query\
+            .options(joinedload(Change.user))\
+            .filter(Change.op_id == op_id)
         # Get only named versions
         if named_version:
-            changes = Change.query\
-                .filter(Change.op_id == op_id)\
-                .filter(~Change.version_name.is_(None))\
-                .order_by(Change.created_at.desc())\
-                .all()
-        # Get all changes
-        else:
-            changes = Change.query\
-                .filter_by(op_id=op_id)\
-                .order_by(Change.created_at.desc())\
-                .all()
+            changes = changes.filter(~Change.version_name.is_(None))
+        if before_id is not None:
+            changes = changes.filter(Change.id < before_id)
+        # ids increase with created_at, ordering by them keeps the pages stable
+        changes = changes.order_by(Change.id.desc())
+        if limit is not None:
+            changes = changes.limit(limit)
 
         return list(map(lambda change: {
             'id': change.id,
@@ -492,8 +573,7 @@ class FileManager:
         Get change related to id
         """
         ch = Change.query.filter_by(id=ch_id).first()
-        perm = Permission.query.filter_by(u_id=user.id, op_id=ch.op_id).first()
-        if perm is None:
+        if not self.is_member(user.id, ch.op_id):
             return False
 
         change = Change.query.filter_by(id=ch_id).first()
@@ -501,9 +581,30 @@ class FileManager:
             return False
         operation = Operation.query.filter_by(id=change.op_id).first()
         operation_path = fs.path.combine(self.data_dir, operation.path)
-        repo = git.Repo(operation_path)
-        change_content = repo.git.show(f'{change.commit_hash}:main.ftml')
-        return change_content
+        return _read_version(operation_path, change.commit_hash)
+
+    def get_change_diff(self, ch_id, other_ch_id, user):
+        """
+        ch_id: change id of the older version
+        other_ch_id: change id of the newer version, None for the current version of the operation
+        user: user of this request
+
+        Get the waypoint differences between two versions of an operation
+        """
+        change = Change.query.filter_by(id=ch_id).first()
+        if change is None or not self.is_member(user.id, change.op_id):
+            return False
+        operation = Operation.query.filter_by(id=change.op_id).first()
+        operation_path = fs.path.combine(self.data_dir, operation.path)
+        if other_ch_id is None:
+            other_content = self.get_file(change.op_id, user)
+        else:
+            other_change = Change.query.filter_by(id=other_ch_id).first()
+            if other_change is None or other_change.op_id != change.op_id:
+                return False
+            other_content = _read_version(operation_path, other_change.commit_hash)
+        return diff_waypoints(get_waypoints(_read_version(operation_path, change.commit_hash)),
+                              get_waypoints(other_content))
 
     def set_version_name(self, ch_id, op_id, u_id, version_name):
         if (not self.is_admin(u_id, op_id) and not self.is_creator(u_id, op_id) and not
@@ -539,7 +640,7 @@ class FileManager:
             repo = git.Repo(operation_path)
             repo.git.clear_cache()
             try:
-                file_content = repo.git.show(f'{ch.commit_hash}:main.ftml')
+                file_content = _read_version(operation_path, ch.commit_hash)
                 with fs.open_fs(operation_path) as proj_fs:
                     proj_fs.writetext('main.ftml', file_content)
                 repo.index.add(['main.ftml'])
@@ -547,6 +648,7 @@ class FileManager:
                 change = Change(ch.op_id, user.id, cm.hexsha)
                 db.session.add(change)
                 db.session.commit()
+                self._pack_repository(repo, ch.op_id)
                 return True
             except Exception as ex:
                 logging.debug(ex)
@@ -606,6 +708,7 @@ class FileManager:
                 db.session.add_all(new_permissions)
         try:
             db.session.commit()
+            self._invalidate_permission_cache()
             return True
         except IntegrityError:
             db.session.rollback()
@@ -634,6 +737,7 @@ class FileManager:
                     .update({Permission.access_level: new_access_level}, synchronize_session='fetch')
         try:
             db.session.commit()
+            self._invalidate_permission_cache()
             return True
         except IntegrityError:
             db.session.rollback()
@@ -675,14 +779,14 @@ class FileManager:
                     .delete(synchronize_session='fetch')
 
         db.session.commit()
+        self._invalidate_permission_cache()
         return True
 
     def import_permissions(self, import_op_id, current_op_id, u_id):
         if not self.is_creator(u_id, current_op_id) and not self.is_admin(u_id, current_op_id):
             return False, None, "Not the creator or admin of this operation"
 
-        perm = Permission.query.filter_by(u_id=u_id, op_id=import_op_id).first()
-        if perm is None:
+        if not self.is_member(u_id, import_op_id):
             return False, None, "Not a member of this operation"
 
         existing_perms = Permission.query \
@@ -742,6 +846,7 @@ class FileManager:
 
         try:
             db.session.commit()
+            self._invalidate_permission_cache()
             return True, {"add_users": add_users, "modify_users": modify_users, "delete_users": delete_users}, "success"
 
         except IntegrityError:
@@ -25,6 +25,22 @@
     limitations under the License.
 """
 
+try:
+    # the user settings are read directly, mslib.mscolab.conf already imports libraries that must not be
+    # loaded before the standard library is patched
+    import mscolab_settings as _user_settings
+except ImportError:
+    _user_settings = None
+
+if getattr(_user_settings, "SOCKETIO_MESSAGE_QUEUE", None) is not None:
+    # the listener of the message queue needs the cooperative socket library of eventlet,
+    # the standard library has to be patched before anything else is imported
+    try:
+        import eventlet
+    except ImportError as ex:
+        raise ImportError("SOCKETIO_MESSAGE_QUEUE requires the eventlet package, please install it") from ex
+    eventlet.monkey_patch()
+
 import argparse
 import logging
 import platform
@@ -33,29 +49,33 @@ import shutil
 import sys
 import secrets
 import subprocess
-import git
-import flask_migrate
 import pathlib
 
 from mslib import __version__
-from mslib.mscolab import migrations
 from mslib.mscolab.conf import mscolab_settings
+
+import git
+import flask_migrate
+
+from mslib.mscolab import migrations
 from mslib.mscolab.seed import seed_data, add_user, add_all_users_default_operation, \
     add_all_users_to_all_operations, delete_user
-from mslib.mscolab.server import APP
+from mslib.mscolab.server import APP, fm
 from mslib.mscolab.utils import create_files
 from mslib.utils import setup_logging
 
 
 def handle_start(args=None):
     from mslib.mscolab.server import APP, sockio, cm, fm, start_server
+    port = 8083
     if args is not None:
         setup_logging(args)
+        port = args.port
     logging.info("MSS Version: %s", __version__)
     logging.info("Python Version: %s", sys.version)
     logging.info("Platform: %s (%s)", platform.platform(), platform.architecture())
-    logging.info("Launching MSColab Server")
-    start_server(APP, sockio, cm, fm)
+    logging.info("Launching MSColab Server on port %s", port)
+    start_server(APP, sockio, cm, fm, port=port)
 
 
 def confirm_action(confirmation_prompt):
@@ -88,6 +108,8 @@ def handle_db_reset(verbose=True):
     create_files()
     flask_migrate.downgrade(directory=migrations.__path__[0], revision="base")
     flask_migrate.upgrade(directory=migrations.__path__[0])
+    # users cached by this process are gone with the old database
+    fm.user_cache.clear()
     if verbose is True:
         print("Database has been reset successfully!")
 
@@ -366,6 +388,8 @@ def main():
                                default=False)
     server_parser.add_argument("--logfile", help="If set to a name log output goes to that file", dest="logfile",
                                default=None)
+    server_parser.add_argument("--port", help="port of the server, every worker process needs its own port",
+                               type=int, default=8083)
 
     database_parser = subparsers.add_parser("db", help="Manage mscolab database")
     database_parser = database_parser.add_mutually_exclusive_group(required=True)
@@ -38,7 +38,7 @@ import flask_migrate
 
 from itsdangerous import URLSafeTimedSerializer, BadSignature
 from flask import g, jsonify, request, render_template, flash
-from flask import send_from_directory, abort, url_for, redirect
+from flask import send_from_directory, abort, url_for, redirect, stream_with_context
 from flask_mail import Mail, Message
 from flask_cors import CORS
 from flask_httpauth import HTTPBasicAuth
@@ -50,7 +50,7 @@ from flask.wrappers import Response
 from mslib.mscolab.conf import mscolab_settings, setup_saml2_backend
 from mslib.mscolab.models import Change, MessageType, User
 from mslib.mscolab.sockets_manager import _setup_managers
-from mslib.mscolab.utils import create_files, get_message_dict
+from mslib.mscolab.utils import create_files, get_message_dict, stream_json_list
 from mslib.utils import conditional_decorator
 from mslib.index import create_app
 from mslib.mscolab.forms import ResetRequestForm, ResetPasswordForm
@@ -219,11 +219,21 @@ def confirm_token(token, expiration=3600):
     return email
 
 
+def _is_monkey_patched():
+    patcher = sys.modules.get("eventlet.patcher")
+    return patcher is not None and patcher.is_monkey_patched("socket")
+
+
 def _initialize_managers(app):
+    if mscolab_settings.SOCKETIO_MESSAGE_QUEUE is not None and not _is_monkey_patched():
+        # the wsgi entry point is imported by the server, which has to patch the standard library itself
+        logging.warning("SOCKETIO_MESSAGE_QUEUE is set, but the standard library is not patched by eventlet. "
+                        "Use 'mscolab start' or run the wsgi application with 'gunicorn -k eventlet'.")
     sockio, cm, fm = _setup_managers(app)
     # initializing socketio and db
     app.wsgi_app = socketio.Middleware(socketio.server, app.wsgi_app)
-    sockio.init_app(app)
+    # with a message queue the events are passed on to the clients connected to the other worker processes
+    sockio.init_app(app, message_queue=mscolab_settings.SOCKETIO_MESSAGE_QUEUE)
     # db.init_app(app)
     return app, sockio, cm, fm
 
@@ -271,24 +281,28 @@ def register_user(email, password, username):
 def verify_user(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        try:
-            user = User.verify_auth_token(request.args.get('token', request.form.get('token', False)))
-        except TypeError:
-            logging.debug("no token in request form")
-            abort(404)
+        token = request.args.get('token', request.form.get('token', False))
+        user = fm.user_cache.get(token)
+        if user is None:
+            try:
+                user = User.verify_auth_token(token)
+            except TypeError:
+                logging.debug("no token in request form")
+                abort(404)
+            fm.user_cache.set(token, user)
         if not user:
             return "False"
         else:
             # saving user details in flask.g
-            if mscolab_settings.MAIL_ENABLED:
-                if user.confirmed:
-                    g.user = user
-                    return func(*args, **kwargs)
-                else:
-                    return "False"
-            else:
-                g.user = user
+            if mscolab_settings.MAIL_ENABLED and not user.confirmed:
+                return "False"
+            g.user = user
+            # access levels resolved by fm are shared for the lifetime of this request
+            g.permission_cache = {}
+            try:
                 return func(*args, **kwargs)
+            finally:
+                g.pop("permission_cache", None)
     return wrapper
 
 
@@ -492,6 +506,28 @@ def delete_own_account():
     return jsonify({"success": result}), 200
 
 
+def get_cursor_arguments(*keys):
+    """
+    Returns the values of the cursor based pagination arguments keys of the request,
+    e.g. limit and before_id, as positive integers or None if not given.
+
+    Other values abort the request with 400.
+    """
+    values = []
+    for key in keys:
+        value = request.args.get(key, request.form.get(key, None))
+        if value is not None:
+            try:
+                value = int(value)
+            except ValueError:
+                value = 0
+            if value <= 0:
+                abort(Response(json.dumps({"success": False, "message": f"{key} must be a positive integer"}),
+                               status=400, mimetype="application/json"))
+        values.append(value)
+    return values
+
+
 # Chat related routes
 @APP.route("/messages", methods=["GET"])
 @verify_user
@@ -500,8 +536,13 @@ def messages():
     op_id = request.args.get("op_id", request.form.get("op_id", None))
     if fm.is_member(user.id, op_id):
         timestamp = request.args.get("timestamp", request.form.get("timestamp", "1970-01-01T00:00:00+00:00"))
-        chat_messages = cm.get_messages(op_id, timestamp)
-        return jsonify({"messages": chat_messages})
+        # cursor based pagination, limit returns the newest messages before before_id
+        # or the oldest messages after after_id
+        limit, before_id, after_id = get_cursor_arguments("limit", "before_id", "after_id")
+        chat_messages = cm.iter_messages(op_id, timestamp, limit=limit, before_id=before_id, after_id=after_id)
+        # large histories are streamed to the client instead of being built in memory
+        return Response(stream_with_context(stream_json_list("messages", chat_messages)),
+                        mimetype="application/json")
     return "False"
 
 
@@ -584,8 +625,10 @@ def get_operation_by_id():
 def get_all_changes():
     op_id = request.args.get('op_id', request.form.get('op_id', None))
     named_version = request.args.get('named_version') == "True"
+    # cursor based pagination, limit returns the newest changes before before_id
+    limit, before_id = get_cursor_arguments("limit", "before_id")
     user = g.user
-    result = fm.get_all_changes(int(op_id), user, named_version)
+    result = fm.get_all_changes(int(op_id), user, named_version, limit=limit, before_id=before_id)
     if result is False:
         jsonify({"success": False, "message": "Some error occurred!"})
     return jsonify({"success": True, "changes": result})
@@ -602,6 +645,19 @@ def get_change_content():
     return jsonify({"content": result})
 
 
+@APP.route('/get_change_diff', methods=['GET'])
+@verify_user
+def get_change_diff():
+    ch_id = int(request.args.get('ch_id', request.form.get('ch_id', 0)))
+    # without other_ch_id the change is compared to the current version
+    other_ch_id = request.args.get('other_ch_id', request.form.get('other_ch_id', None))
+    user = g.user
+    result = fm.get_change_diff(ch_id, None if other_ch_id is None else int(other_ch_id), user)
+    if result is False:
+        return "False"
+    return jsonify({"diff": result})
+
+
 @APP.route('/set_version_name', methods=['POST'])
 @verify_user
 def set_version_name():
@@ -627,7 +683,7 @@ def authorized_users():
 @verify_user
 def active_users():
     op_id = request.args.get('op_id', request.form.get('op_id', None))
-    return jsonify(active_users=list(sockio.sm.active_users_per_operation[int(op_id)]))
+    return jsonify(active_users=list(sockio.sm.sessions.get_active_users(int(op_id))))
 
 
 @APP.route('/operations', methods=['GET'])
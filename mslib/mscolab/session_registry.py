@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+
+    mslib.mscolab.session_registry
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Registry of connected socket sessions and of the active users per operation
+
+    This file is part of MSS.
+
+    :copyright: Copyright 2024 by the MSS team, see AUTHORS.
+    :license: APACHE-2.0, see LICENSE for details.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import threading
+
+
+class MemorySessionRegistry:
+    """
+    Keeps the sessions in dictionaries of this process
+
+    All lookups are O(1), the maps are guarded by a lock so that
+    concurrent socket handlers see consistent data.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # s_id -> u_id
+        self._session_users = {}
+        # u_id -> set of s_id
+        self._user_sessions = {}
+        # op_id -> set of active u_id
+        self._operation_users = {}
+        # u_id -> set of op_id where the user is active
+        self._user_operations = {}
+
+    def add_session(self, s_id, u_id):
+        with self._lock:
+            self._session_users[s_id] = u_id
+            self._user_sessions.setdefault(u_id, set()).add(s_id)
+
+    def remove_session(self, s_id):
+        """
+        Removes the session s_id and returns its user-id or None for unknown sessions
+        """
+        with self._lock:
+            u_id = self._session_users.pop(s_id, None)
+            if u_id is not None:
+                s_ids = self._user_sessions.get(u_id, set())
+                s_ids.discard(s_id)
+                if not s_ids:
+                    self._user_sessions.pop(u_id, None)
+            return u_id
+
+    def get_user_id(self, s_id):
+        with self._lock:
+            return self._session_users.get(s_id)
+
+    def get_session_ids(self, u_id):
+        with self._lock:
+            return set(self._user_sessions.get(u_id, ()))
+
+    def add_active_user(self, op_id, u_id):
+        """
+        Marks u_id as active in op_id and returns the number of active users of op_id
+        """
+        with self._lock:
+            users = self._operation_users.setdefault(op_id, set())
+            users.add(u_id)
+            self._user_operations.setdefault(u_id, set()).add(op_id)
+            return len(users)
+
+    def remove_active_user(self, op_id, u_id):
+        """
+        Removes u_id from the active users of op_id
+
+        Returns the remaining number of active users of op_id or None if u_id was not active in op_id
+        """
+        with self._lock:
+            users = self._operation_users.get(op_id)
+            if users is None or u_id not in users:
+                return None
+            users.remove(u_id)
+            if not users:
+                del self._operation_users[op_id]
+            op_ids = self._user_operations.get(u_id, set())
+            op_ids.discard(op_id)
+            if not op_ids:
+                self._user_operations.pop(u_id, None)
+            return len(users)
+
+    def remove_active_user_from_all(self, u_id):
+        """
+        Removes u_id from all operations, returns a dict of op_id to the remaining number of active users
+        """
+        with self._lock:
+            return {op_id: self.remove_active_user(op_id, u_id)
+                    for op_id in list(self._user_operations.get(u_id, ()))}
+
+    def get_active_users(self, op_id):
+        with self._lock:
+            return set(self._operation_users.get(op_id, ()))
+
+    def get_active_users_per_operation(self):
+        with self._lock:
+            return {op_id: set(users) for op_id, users in self._operation_users.items()}
+
+
+class RedisSessionRegistry:
+    """
+    Keeps the sessions in a Redis compatible key value store
+
+    Several MSColab processes using the same store share the sessions and active users.
+    Every update is sent as one MULTI/EXEC transaction, removing an active user watches
+    the users of the operation.
+    """
+
+    def __init__(self, client, prefix="mscolab"):
+        """
+        client: redis.Redis compatible client, created with decode_responses=True
+        prefix: namespace of the keys in the store
+        """
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, *parts):
+        return ":".join([self.prefix] + [str(part) for part in parts])
+
+    def add_session(self, s_id, u_id):
+        with self.client.pipeline() as pipe:
+            pipe.set(self._key("session", s_id), u_id)
+            pipe.sadd(self._key("user_sessions", u_id), s_id)
+            pipe.execute()
+
+    def remove_session(self, s_id):
+        u_id = self.get_user_id(s_id)
+        if u_id is not None:
+            with self.client.pipeline() as pipe:
+                pipe.delete(self._key("session", s_id))
+                pipe.srem(self._key("user_sessions", u_id), s_id)
+                pipe.execute()
+        return u_id
+
+    def get_user_id(self, s_id):
+        u_id = self.client.get(self._key("session", s_id))
+        return None if u_id is None else int(u_id)
+
+    def get_session_ids(self, u_id):
+        return set(self.client.smembers(self._key("user_sessions", u_id)))
+
+    def add_active_user(self, op_id, u_id):
+        with self.client.pipeline() as pipe:
+            pipe.sadd(self._key("operation_users", op_id), u_id)
+            pipe.sadd(self._key("user_operations", u_id), op_id)
+            pipe.sadd(self._key("operations"), op_id)
+            pipe.scard(self._key("operation_users", op_id))
+            return pipe.execute()[-1]
+
+    def remove_active_user(self, op_id, u_id):
+        users_key = self._key("operation_users", op_id)
+
+        def remove(pipe):
+            # the users are watched, so the transaction is repeated if another process adds
+            # a user before the operation is dropped from the operations
+            removed = pipe.sismember(users_key, u_id)
+            count = pipe.scard(users_key) - (1 if removed else 0)
+            pipe.multi()
+            pipe.srem(users_key, u_id)
+            pipe.srem(self._key("user_operations", u_id), op_id)
+            if count == 0:
+                pipe.srem(self._key("operations"), op_id)
+            return count if removed else None
+
+        return self.client.transaction(remove, users_key, value_from_callable=True)
+
+    def remove_active_user_from_all(self, u_id):
+        return {op_id: self.remove_active_user(op_id, u_id)
+                for op_id in (int(op_id) for op_id in self.client.smembers(self._key("user_operations", u_id)))}
+
+    def get_active_users(self, op_id):
+        return {int(u_id) for u_id in self.client.smembers(self._key("operation_users", op_id))}
+
+    def get_active_users_per_operation(self):
+        active_users = {}
+        for op_id in self.client.smembers(self._key("operations")):
+            users = self.get_active_users(op_id)
+            if users:
+                active_users[int(op_id)] = users
+        return active_users
+
+
+def create_session_registry(url=None):
+    """
+    url: None for a registry of this process, or the url of a Redis compatible store, e.g. redis://localhost:6379/0
+    """
+    if url is None:
+        return MemorySessionRegistry()
+    # optional dependency, only needed when the sessions are shared between processes
+    import redis
+    return RedisSessionRegistry(redis.Redis.from_url(url, decode_responses=True))
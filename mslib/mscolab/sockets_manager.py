@@ -33,7 +33,7 @@ from mslib.mscolab.chat_manager import ChatManager
 from mslib.mscolab.file_manager import FileManager
 from mslib.mscolab.models import MessageType, Permission, User
 from mslib.mscolab.utils import get_message_dict
-from mslib.mscolab.utils import get_session_id, get_user_id
+from mslib.mscolab.session_registry import create_session_registry
 from mslib.mscolab.conf import mscolab_settings
 
 socketio = SocketIO(logger=mscolab_settings.SOCKETIO_LOGGER, engineio_logger=mscolab_settings.ENGINEIO_LOGGER,
@@ -50,11 +50,18 @@ class SocketsManager:
         file_manager: Instance of FileManager
         """
         super(SocketsManager, self).__init__()
-        self.sockets = []
-        self.active_users_per_operation = {}
+        # connected sessions and active users per operation
+        self.sessions = create_session_registry(mscolab_settings.SESSION_REGISTRY_URL)
         self.cm = chat_manager
         self.fm = file_manager
 
+    @property
+    def active_users_per_operation(self):
+        """
+        snapshot of the active user-ids of all operations
+        """
+        return self.sessions.get_active_users_per_operation()
+
     def handle_connect(self):
         logging.debug(request.sid)
 
@@ -70,12 +77,9 @@ class SocketsManager:
         self.update_active_users(user.id)
 
         # Add the user to the new operation
-        if op_id not in self.active_users_per_operation:
-            self.active_users_per_operation[op_id] = set()
-        self.active_users_per_operation[op_id].add(user.id)
+        active_count = self.sessions.add_active_user(op_id, user.id)
 
         # Emit the updated count to all users
-        active_count = len(self.active_users_per_operation[op_id])
         socketio.emit('active-user-update', {'op_id': op_id, 'count': active_count})
 
     def update_operation_list(self, json_config):
@@ -108,13 +112,11 @@ class SocketsManager:
             - u_id: user id(collaborator's id)
             - op_id: operation id
         """
-        s_id = get_session_id(self.sockets, u_id)
-        if s_id is not None:
+        for s_id in self.sessions.get_session_ids(u_id):
             join_room(str(op_id), sid=s_id)
 
     def remove_collaborator_from_operation(self, u_id, op_id):
-        s_id = get_session_id(self.sockets, u_id)
-        if s_id is not None:
+        for s_id in self.sessions.get_session_ids(u_id):
             leave_room(str(op_id), sid=s_id)
 
     def handle_start_event(self, json_config):
@@ -146,58 +148,34 @@ class SocketsManager:
             - so joining the actual socketio room would be enough
             """
             join_room(str(permission.op_id))
-        socket_storage = {
-            's_id': request.sid,
-            'u_id': user.id
-        }
-        self.sockets.append(socket_storage)
+        self.sessions.add_session(request.sid, user.id)
 
     def handle_disconnect(self):
         logging.debug("Handling disconnect.")
 
-        # remove the user from any active operations
-        user_id = get_user_id(self.sockets, request.sid)
+        # remove socket from the session registry and the user from any active operations
+        user_id = self.sessions.remove_session(request.sid)
         if user_id:
             self.update_active_users(user_id)
 
         logging.debug(f"Disconnected: {request.sid}")
-        # remove socket from socket_storage
-        self.sockets[:] = [d for d in self.sockets if d['s_id'] != request.sid]
 
     def update_active_users(self, user_id):
         """
         Remove the given user_id from all operations and emit updates for active user counts.
         """
-        for op_id, user_ids in list(self.active_users_per_operation.items()):
-            if user_id in user_ids:
-                user_ids.remove(user_id)
-                active_count = len(user_ids)
-                logging.debug(f"Updated {op_id}: {active_count} active users")
-                if user_ids:
-                    # Emit update if there are still active users
-                    socketio.emit('active-user-update', {'op_id': op_id, 'count': active_count})
-                else:
-                    # If no users left, delete the operation key
-                    del self.active_users_per_operation[op_id]
-                    socketio.emit('active-user-update', {'op_id': op_id, 'count': 0})
+        for op_id, active_count in self.sessions.remove_active_user_from_all(user_id).items():
+            logging.debug(f"Updated {op_id}: {active_count} active users")
+            socketio.emit('active-user-update', {'op_id': op_id, 'count': active_count})
 
     def remove_active_user_id_from_specific_operation(self, user_id, op_id):
         """
         Remove the given user_id from a specific operation in active_users_per_operation
         and emit updates for active user counts.
         """
-        if op_id in self.active_users_per_operation:
-            if user_id in self.active_users_per_operation[op_id]:
-                self.active_users_per_operation[op_id].remove(user_id)
-                active_count = len(self.active_users_per_operation[op_id])
-
-                if self.active_users_per_operation[op_id]:
-                    # Emit update if there are still active users
-                    socketio.emit('active-user-update', {'op_id': op_id, 'count': active_count})
-                else:
-                    # If no users left, delete the operation key
-                    del self.active_users_per_operation[op_id]
-                    socketio.emit('active-user-update', {'op_id': op_id, 'count': 0})
+        active_count = self.sessions.remove_active_user(op_id, user_id)
+        if active_count is not None:
+            socketio.emit('active-user-update', {'op_id': op_id, 'count': active_count})
 
     def handle_message(self, _json):
         """
@@ -300,12 +278,14 @@ class SocketsManager:
         to refresh operation list of u_id
         and to refresh collaborators' list
         """
+        self.fm.user_cache.invalidate(u_id)
         socketio.emit('new-permission', json.dumps({"op_id": op_id, "u_id": u_id}))
 
     def emit_update_permission(self, u_id, op_id, access_level=None):
         """
         to refresh permissions in msui
         """
+        self.fm.user_cache.invalidate(u_id)
         if access_level is None:
             perm = Permission.query.filter_by(u_id=u_id, op_id=op_id).first()
             access_level = perm.access_level
@@ -316,12 +296,14 @@ class SocketsManager:
                                                        "access_level": access_level}))
 
     def emit_revoke_permission(self, u_id, op_id):
+        self.fm.user_cache.invalidate(u_id)
         socketio.emit("revoke-permission", json.dumps({"op_id": op_id, "u_id": u_id}))
 
     def emit_operation_permissions_updated(self, u_id, op_id):
         socketio.emit("operation-permissions-updated", json.dumps({"op_id": op_id, "u_id": u_id}))
 
     def emit_operation_delete(self, op_id):
+        self.fm.user_cache.clear()
         socketio.emit("operation-deleted", json.dumps({"op_id": op_id}))
 
 
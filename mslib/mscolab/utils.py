@@ -23,11 +23,20 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import difflib
 import fs
+import json
 import os
+import sys
 import logging
+import threading
+import time
+
+import defusedxml.ElementTree as etree
+from sqlalchemy.orm import make_transient_to_detached
 
 from mslib.mscolab.conf import mscolab_settings
+from mslib.mscolab.models import db, User
 
 
 def get_recent_op_id(fm, user):
@@ -38,20 +47,141 @@ def get_recent_op_id(fm, user):
     return op_id
 
 
-def get_session_id(sockets, u_id):
-    s_id = None
-    for ss in sockets:
-        if ss["u_id"] == u_id:
-            s_id = ss["s_id"]
-    return s_id
+class AuthTokenCache:
+    """
+    Short-lived, process wide cache of verified auth tokens
+
+    For every token the column values of its user are kept for ttl seconds, so that
+    verify_user does not need to decode the token and query the user on every request.
+    Entries of a user are dropped when the account or its permissions change.
+    """
+
+    def __init__(self, ttl):
+        """
+        ttl: seconds an entry is kept, 0 disables the cache
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, token):
+        """
+        token: authentication token
+
+        Returns the cached user attached to the current database session or None
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires < time.monotonic():
+                del self._entries[token]
+                return None
+        user = User.__mapper__.class_manager.new_instance()
+        for key, value in values.items():
+            setattr(user, key, value)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    def set(self, token, user):  # noqa: A003
+        """
+        token: authentication token
+        user: the user verified by this token
+        """
+        if self.ttl <= 0 or user is None:
+            return
+        values = {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+        with self._lock:
+            self._entries[token] = (time.monotonic() + self.ttl, values)
+
+    def invalidate(self, u_id):
+        """
+        u_id: user-id whose tokens are removed from the cache
+        """
+        with self._lock:
+            for token in [token for token, (_, values) in self._entries.items() if values["id"] == u_id]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
 
 
-def get_user_id(sockets, s_id):
-    u_id = None
-    for ss in sockets:
-        if ss["s_id"] == s_id:
-            u_id = ss["u_id"]
-    return u_id
+class InterProcessLock:
+    """
+    Exclusive lock shared by all processes and threads using the same lock file
+
+    Used for the operation locks when several MSColab worker processes serve the same operations.
+    """
+
+    def __init__(self, path):
+        """
+        path: path of the lock file, it is created if needed
+        """
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def acquire(self, blocking=True):
+        if not self._thread_lock.acquire(blocking):
+            return False
+        try:
+            self._file = open(self.path, "a+")
+            if not self._lock_file(blocking):
+                self._file.close()
+                self._thread_lock.release()
+                return False
+        except BaseException:
+            if self._file is not None and not self._file.closed:
+                self._file.close()
+            self._thread_lock.release()
+            raise
+        return True
+
+    def release(self):
+        try:
+            self._unlock_file()
+        finally:
+            self._file.close()
+            self._thread_lock.release()
+
+    def _lock_file(self, blocking):
+        # polled, a blocking call would stall all greenlets of an eventlet worker, which patches time.sleep
+        if sys.platform.startswith('win'):
+            import msvcrt
+
+            def try_lock():
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            def try_lock():
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        while True:
+            try:
+                try_lock()
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+                time.sleep(0.05)
+
+    def _unlock_file(self):
+        if sys.platform.startswith('win'):
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
 
 
 def get_message_dict(message):
@@ -67,6 +197,57 @@ def get_message_dict(message):
     }
 
 
+def stream_json_list(key, items):
+    """
+    key: name of the list in the json object
+    items: iterable of json serializable items
+
+    Yields the json encoding of {key: list(items)} chunk by chunk
+    """
+    yield f'{{{json.dumps(key)}: ['
+    for index, item in enumerate(items):
+        yield (", " if index > 0 else "") + json.dumps(item)
+    yield ']}'
+
+
+def get_waypoints(xml_content):
+    """
+    Returns the waypoints of a flight track in FTML as list of dictionaries
+    """
+    waypoints = []
+    for wp_el in etree.fromstring(xml_content.encode("utf-8")).iter("Waypoint"):
+        comments = wp_el.find("Comments")
+        waypoints.append({
+            "location": wp_el.get("location", ""),
+            "lat": float(wp_el.get("lat")),
+            "lon": float(wp_el.get("lon")),
+            "flightlevel": float(wp_el.get("flightlevel")),
+            "comments": "" if comments is None or comments.text is None else comments.text,
+        })
+    return waypoints
+
+
+def diff_waypoints(old_waypoints, new_waypoints):
+    """
+    old_waypoints: waypoints of the older version, see get_waypoints
+    new_waypoints: waypoints of the newer version
+
+    Returns the differing ranges of both waypoint lists, each as dictionary of the
+    difflib tag ("replace", "delete" or "insert"), the index ranges and the waypoints
+    """
+    def keys(waypoints):
+        return [tuple(waypoint.values()) for waypoint in waypoints]
+
+    matcher = difflib.SequenceMatcher(None, keys(old_waypoints), keys(new_waypoints), autojunk=False)
+    return [{
+        "tag": tag,
+        "old_start": i1, "old_end": i2,
+        "new_start": j1, "new_end": j2,
+        "old": old_waypoints[i1:i2],
+        "new": new_waypoints[j1:j2],
+    } for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
 def os_fs_create_dir(directory_path):
     if '://' in directory_path:
         try:
@@ -85,3 +266,5 @@ def create_files():
     os_fs_create_dir(mscolab_settings.OPERATIONS_DATA)
     os_fs_create_dir(mscolab_settings.UPLOAD_FOLDER)
     os_fs_create_dir(mscolab_settings.SSO_DIR)
+    if mscolab_settings.OPERATION_LOCK_DIR is not None:
+        os_fs_create_dir(mscolab_settings.OPERATION_LOCK_DIR)
@@ -106,6 +106,18 @@ class SimpleAircraft:
         idx0, w0, idx1, w1 = self._get_weights(weights, grossweight)
         return self._interpolate_alt(data[idx0], altitude) * w0 + self._interpolate_alt(data[idx1], altitude) * w1
 
+    def at_altitudes(self, altitudes):
+        """
+        Returns the performance of the aircraft for a set of altitudes.
+
+        The performance tables are interpolated once per altitude, so that
+        the returned object only interpolates in weight for each leg.
+
+        Args:
+            altitudes:    iterable of altitudes in ft
+        """
+        return AltitudePerformance(self, altitudes)
+
     def get_climb_performance(self, altitude, grossweight):
         """
         Climb performance of the aircraft. Returns time [min], distance [nm] and
@@ -156,3 +168,47 @@ class SimpleAircraft:
                           "Please reload performance data from JSON.")
             maxFL = 410
         return maxFL
+
+
+class AltitudePerformance:
+    """
+    Climb, cruise and descent performance of a SimpleAircraft with the tables
+    interpolated to a fixed set of altitudes.
+
+    Offers the get_*_performance methods of SimpleAircraft with identical
+    results; altitudes outside of the set are passed on to the aircraft.
+    """
+
+    def __init__(self, aircraft, altitudes):
+        self.aircraft = aircraft
+        altitudes = set(altitudes)
+        self._tables = {}
+        for name, (weights, data) in (("climb", aircraft._climb), ("cruise", aircraft._cruise),
+                                      ("descent", aircraft._descent)):
+            rows = {altitude: [aircraft._interpolate_alt(table, altitude).tolist() for table in data]
+                    for altitude in altitudes}
+            self._tables[name] = weights.tolist(), rows
+
+    def _interpolate(self, name, altitude, grossweight):
+        weights, rows = self._tables[name]
+        # the same operations as SimpleAircraft._interpolate, on floats instead of arrays
+        idx0, w0, idx1, w1 = self.aircraft._get_weights(weights, grossweight)
+        return [value0 * w0 + value1 * w1 for value0, value1 in zip(rows[altitude][idx0], rows[altitude][idx1])]
+
+    def get_climb_performance(self, altitude, grossweight):
+        if altitude not in self._tables["climb"][1]:
+            return self.aircraft.get_climb_performance(altitude, grossweight)
+        return self._interpolate("climb", altitude, grossweight)
+
+    def get_cruise_performance(self, altitude, grossweight):
+        if altitude not in self._tables["cruise"][1]:
+            return self.aircraft.get_cruise_performance(altitude, grossweight)
+        return self._interpolate("cruise", altitude, grossweight)
+
+    def get_descent_performance(self, altitude, grossweight):
+        if altitude not in self._tables["descent"][1]:
+            return self.aircraft.get_descent_performance(altitude, grossweight)
+        return self._interpolate("descent", altitude, grossweight)
+
+    def get_ceiling_altitude(self, grossweight):
+        return self.aircraft.get_ceiling_altitude(grossweight)
@@ -36,7 +36,7 @@ class AirdataDockwidget(QtWidgets.QWidget, ui.Ui_AirdataDockwidget):
         super().__init__(parent)
         self.setupUi(self)
         self.view = view
-        self.view.redrawn.connect(self.redraw_map)
+        self.view.redrawn.connect(self.update_map)
 
         code_to_name = {country.alpha_2.lower(): country.name for country in pycountry.countries}
         self.cbAirspaces.addItems([f"{code_to_name.get(airspace[0].split('_')[0], 'Unknown')} "
@@ -56,7 +56,7 @@ class AirdataDockwidget(QtWidgets.QWidget, ui.Ui_AirdataDockwidget):
         self.btDownload.clicked.connect(lambda: get_airports(True))
         self.btDownloadAsp.clicked.connect(lambda: update_airspace(True, [airspace.split(" ")[-1] for airspace in
                                                                           self.cbAirspaces.currentData()]))
-        self.btApply.clicked.connect(self.redraw_map)
+        self.btApply.clicked.connect(lambda: self.redraw_map())
 
         self.cbAirspaces.currentTextChanged.connect(self.adjust_ui_airspaces)
         self.cbAirportType.currentTextChanged.connect(self.adjust_ui_airports)
@@ -95,15 +95,26 @@ class AirdataDockwidget(QtWidgets.QWidget, ui.Ui_AirdataDockwidget):
         self.cbDrawAirports.setEnabled(airports_enabled)
         self.btDownload.setEnabled(airports_enabled)
 
-    def redraw_map(self):
+    def redraw_map(self, reload=True):
+        """
+        Draws the selected airports and airspaces, reload replaces those already drawn
+        """
         if self.view.map is not None:
-            self.view.map.set_draw_airports(self.cbDrawAirports.isChecked(), port_type=self.cbAirportType.currentData())
+            self.view.map.set_draw_airports(self.cbDrawAirports.isChecked(), port_type=self.cbAirportType.currentData(),
+                                            reload=reload)
             self.view.map.set_draw_airspaces(self.cbDrawAirspaces.isChecked(), self.cbAirspaces.currentData(),
                                              (self.sbFrom.value(), self.sbTo.value())
-                                             if self.cbFilterAirspaces.isChecked() else None)
+                                             if self.cbFilterAirspaces.isChecked() else None, reload=reload)
             self.view.draw()
         self.save_settings()
 
+    def update_map(self):
+        """
+        Called after the map has been redrawn, the map removes airports and airspaces
+        only when its coordinates have changed, so those still drawn are kept
+        """
+        self.redraw_map(reload=False)
+
     def save_settings(self):
         settings_dict = {
             "draw_airports": self.cbDrawAirports.isChecked(),
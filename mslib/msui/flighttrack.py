@@ -35,12 +35,14 @@
 """
 
 import datetime
+import io
 import logging
 import os
 
+import defusedxml.ElementTree
 import fs
+import numpy as np
 import xml.dom.minidom
-import xml.parsers.expat
 
 from PyQt5 import QtGui, QtCore, QtWidgets
 
@@ -48,7 +50,6 @@ from mslib import __version__
 from mslib.utils.units import units
 from mslib.utils.coordinate import find_location, path_points, get_distance
 from mslib.utils import thermolib
-from mslib.utils.verify_waypoint_data import verify_waypoint_data
 from mslib.utils.config import config_loader, save_settings_qsettings, load_settings_qsettings
 from mslib.utils.config import MSUIDefaultConfig as mss_default
 from mslib.utils.qt import variant_to_string, variant_to_float
@@ -95,32 +96,60 @@ TABLE_FULL = [
 TABLE_SHORT = [TABLE_FULL[_i] for _i in range(7)] + [TABLE_FULL[-1]] + [("", lambda _: "", False)] * 8
 
 
+def read_ftml_columns(xml_content):
+    """
+    Reads the Waypoint elements of the first FlightTrack element of xml_content
+    with a streaming parser, i.e. without building the document in memory.
+
+    Returns the lists of latitudes, longitudes, flight levels, locations and comments
+    of the waypoints. Raises SyntaxError for malformed documents and ValueError for
+    coordinates that are no numbers.
+    """
+    lats, lons, flightlevels, locations, comments = [], [], [], [], []
+    source = io.StringIO(xml_content) if isinstance(xml_content, str) else io.BytesIO(xml_content)
+    track = None
+    for event, element in defusedxml.ElementTree.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if track is None and element.tag == "FlightTrack":
+                track = element
+        elif element is track:
+            break
+        elif track is not None and element.tag == "Waypoint":
+            comment = element.find(".//Comments")
+            if comment is None:
+                raise SyntaxError("Waypoint without Comments element")
+            lats.append(float(element.get("lat", "")))
+            lons.append(float(element.get("lon", "")))
+            flightlevels.append(float(element.get("flightlevel", "")))
+            locations.append(element.get("location", ""))
+            comments.append((comment.text or "").strip())
+            # the waypoint is not needed anymore
+            element.clear()
+    return lats, lons, flightlevels, locations, comments
+
+
 def load_from_xml_data(xml_content, name="Flight track"):
-    try:
-        doc = xml.dom.minidom.parseString(xml_content)
-    except xml.parsers.expat.ExpatError as ex:
-        raise SyntaxError(str(ex))
-
-    ft_el = doc.getElementsByTagName("FlightTrack")[0]
-
-    waypoints_list = []
-    for wp_el in ft_el.getElementsByTagName("Waypoint"):
-
-        location = wp_el.getAttribute("location")
-        lat = float(wp_el.getAttribute("lat"))
-        lon = float(wp_el.getAttribute("lon"))
-        flightlevel = float(wp_el.getAttribute("flightlevel"))
-        comments = wp_el.getElementsByTagName("Comments")[0]
-        # If num of comments is 0(null comment), then return ''
-        if len(comments.childNodes):
-            comments = comments.childNodes[0].data.strip()
-        else:
-            comments = ""
+    return create_waypoints(*read_ftml_columns(xml_content))
 
-        waypoints_list.append(Waypoint(lat, lon, flightlevel,
-                                       location=location,
-                                       comments=comments))
-    return waypoints_list
+
+def create_waypoints(lats, lons, flightlevels, locations=None, comments=None):
+    """
+    Returns Waypoints equal to creating them one by one, but looks up the configured
+    locations only once and computes the pressure of all waypoints at once.
+    """
+    if locations is None:
+        locations = [""] * len(lats)
+    if comments is None:
+        comments = [""] * len(lats)
+    known_locations = config_loader(dataset='locations')
+    pressures = thermolib.flightlevel2pressure(np.asarray(flightlevels, dtype=float) * units.hft).magnitude
+    waypoints = []
+    for lat, lon, flightlevel, location, comment, pressure in zip(
+            lats, lons, flightlevels, locations, comments, pressures):
+        waypoint = Waypoint.__new__(Waypoint)
+        waypoint._initialise(lat, lon, flightlevel, location, comment, known_locations, pressure)
+        waypoints.append(waypoint)
+    return waypoints
 
 
 class Waypoint:
@@ -130,15 +159,21 @@ class Waypoint:
     """
 
     def __init__(self, lat=0., lon=0., flightlevel=0., location="", comments=""):
+        self._initialise(lat, lon, flightlevel, location, comments, config_loader(dataset='locations'),
+                         thermolib.flightlevel2pressure(flightlevel * units.hft).magnitude)
+
+    def _initialise(self, lat, lon, flightlevel, location, comments, locations, pressure):
+        """
+        Initialises the waypoint with the given known locations and pressure, see create_waypoints.
+        """
         self.location = location
-        locations = config_loader(dataset='locations')
         if location in locations:
             self.lat, self.lon = locations[location]
         else:
             self.lat = lat
             self.lon = lon
         self.flightlevel = flightlevel
-        self.pressure = thermolib.flightlevel2pressure(flightlevel * units.hft).magnitude
+        self.pressure = pressure
         self.distance_to_prev = 0.
         self.distance_total = 0.
         self.comments = comments
@@ -495,9 +530,17 @@ class WaypointsTableModel(QtCore.QAbstractTableModel):
 
         If rows>1, the distances to the previous waypoints are updated
         according to the number of modified waypoints.
+
+        The weight at each waypoint depends on the fuel of all legs before it,
+        so time and fuel are computed again from the leg before <position>
+        on. That leg changes if waypoints have been added or removed at the
+        end of the flight track.
         """
         waypoints = self.waypoints
-        aircraft = self.performance_settings["aircraft"]
+        start = max(position - 1, 1)
+        # The performance tables are only interpolated once per flight level.
+        aircraft = self.performance_settings["aircraft"].at_altitudes(
+            {wp.flightlevel * 100 for wp in waypoints[start - 1:]})
 
         def get_duration_fuel(flightlevel0, flightlevel1, distance, weight, lastleg):
             if flightlevel0 == flightlevel1:
@@ -521,6 +564,14 @@ class WaypointsTableModel(QtCore.QAbstractTableModel):
                     duration_p, fuel_p = get_duration_fuel(flightlevel1, flightlevel1, distance - dist, weight, False)
                 return duration + duration_p, fuel + fuel_p
 
+        # The distances of the modified waypoints and of the following one to their predecessors.
+        first, stop = max(position, 1), min(position + rows + 1, len(waypoints))
+        distances = {}
+        if first < stop:
+            lats = np.asarray([wp.lat for wp in waypoints[first - 1:stop]])
+            lons = np.asarray([wp.lon for wp in waypoints[first - 1:stop]])
+            distances = dict(zip(range(first, stop), get_distance(lats[:-1], lons[:-1], lats[1:], lons[1:]).tolist()))
+
         pos = position
         for offset in range(rows):
             pos = position + offset
@@ -539,8 +590,7 @@ class WaypointsTableModel(QtCore.QAbstractTableModel):
                 wp1.ascent_rate = 0
             else:
                 wp0 = waypoints[pos - 1]
-                wp1.distance_to_prev = get_distance(
-                    wp0.lat, wp0.lon, wp1.lat, wp1.lon)
+                wp1.distance_to_prev = distances[pos]
 
                 last = (pos - 1 == rows)
                 time, fuel = get_duration_fuel(
@@ -560,16 +610,14 @@ class WaypointsTableModel(QtCore.QAbstractTableModel):
         # Update the distance of the following waypoint as well.
         if pos < len(waypoints) - 1:
             wp2 = waypoints[pos + 1]
-            wp2.distance_to_prev = get_distance(
-                wp1.lat, wp1.lon, wp2.lat, wp2.lon)
+            wp2.distance_to_prev = distances[pos + 1]
             if wp2.leg_time != 0:
                 wp2.ascent_rate = int((wp2.flightlevel - wp1.flightlevel) * 100 / (wp2.leg_time / 60))
             else:
                 wp2.ascent_rate = 0
 
-        # Update total distances of waypoint at index position and all
-        # following waypoints.
-        for i in range(max(min(position, 1), 1), len(waypoints)):
+        # Update total distances, times and fuel of all following waypoints.
+        for i in range(start, len(waypoints)):
             wp0 = waypoints[i - 1]
             wp1 = waypoints[i]
             wp1.distance_total = wp0.distance_total + wp1.distance_to_prev
@@ -666,11 +714,13 @@ class WaypointsTableModel(QtCore.QAbstractTableModel):
 
     def load_from_xml_data(self, xml_content, name="Flight track"):
         self.name = name
-        if verify_waypoint_data(xml_content):
-            _waypoints_list = load_from_xml_data(xml_content, name)
-            self.replace_waypoints(_waypoints_list)
-        else:
+        try:
+            columns = read_ftml_columns(xml_content)
+        except (SyntaxError, ValueError):
+            columns = None
+        if columns is None or len(columns[0]) < 2:
             raise SyntaxError(f"Invalid flight track filename: {name}")
+        self.replace_waypoints(create_waypoints(*columns))
 
     def get_filename(self):
         return self.filename
@@ -31,6 +31,9 @@ from fastkml import kml, geometry, styles
 from lxml import etree as et, objectify
 import os
 from matplotlib import patheffects
+from matplotlib.collections import LineCollection
+import numpy as np
+import shapely
 
 from mslib.utils.qt import get_open_filenames, get_save_filename
 from mslib.msui.qt5 import ui_kmloverlay_dockwidget as ui
@@ -38,101 +41,135 @@ from PyQt5 import QtGui, QtWidgets, QtCore
 from mslib.utils.config import save_settings_qsettings, load_settings_qsettings
 from mslib.utils.coordinate import normalize_longitude
 
+# lines are simplified to this fraction of the width of the shown map, well below a pixel
+SIMPLIFY_TOLERANCE = 2e-4
+
+
+def simplify_lines(lines, tolerance):
+    """
+    Simplifies lines given as Nx2 arrays of x/y coordinates by the Douglas-Peucker
+    algorithm, so that no point is moved by more than tolerance. All lines are
+    simplified by one vectorised call of shapely, lines with undefined points are kept.
+    """
+    lines = list(lines)
+    finite = [i for i, line in enumerate(lines) if len(line) > 2 and np.isfinite(line).all()]
+    if finite:
+        lengths = [len(lines[i]) for i in finite]
+        geometries = shapely.linestrings(np.concatenate([lines[i] for i in finite]),
+                                         indices=np.repeat(np.arange(len(finite)), lengths))
+        coordinates, index = shapely.get_coordinates(
+            shapely.simplify(geometries, tolerance, preserve_topology=False), return_index=True)
+        splits = np.cumsum(np.bincount(index, minlength=len(finite)))[:-1]
+        for i, line in zip(finite, np.split(coordinates, splits)):
+            lines[i] = line
+    return lines
+
 
 class KMLPatch:
     """
     Represents a KML overlay.
+
+    The geometries of the KML document are parsed once into longitude/latitude
+    arrays. All lines of the same style are drawn as one LineCollection and all
+    points as one line of markers, so that only a few artists are needed even
+    for thousands of placemarks. The lines are simplified to the scale of the
+    shown map.
     """
 
-    def __init__(self, mapcanvas, kml_data, color="red", linewidth=1):
+    def __init__(self, mapcanvas, kml_data, color="red", linewidth=1, simplify=True):
         self.map = mapcanvas
         self.kml = kml_data
         self.patches = []
         self.color = color
         self.linewidth = linewidth
+        self.simplify = simplify
+        # lines as (lons, lats) by line style, None standing for the colour and linewidth of the patch
+        self.lines = {}
+        # points as (lon, lat) and their annotations as (lon, lat, name, bbox)
+        self.points = []
+        self.annotations = []
+        self.styles = {}
+        kml_doc = list(self.kml.features())  # All kml files are enclosed in a single root < > and </ >
+        kml_style = kml_doc[0]
+        self.parse_styles(kml_style)
+        self.parse_placemarks(kml_doc)
+
+        # projected lines in full resolution and the map width they are simplified for
+        self.segments = {}
+        self.simplified_width = None
+        self.line_collections = {}
+        self.point_markers = None
+        self.texts = []
+        self.xlim_callback = None
         self.draw()
 
-    def compute_xy(self, geometry_data):
-        unzipped = list(zip(*geometry_data.coords))
-        x, y = self.map.gcpoints_path(unzipped[0], unzipped[1])
-        if self.map.projection == "cyl":  # hack for wraparound
-            x = normalize_longitude(x, self.map.llcrnrlon, self.map.urcrnrlon)
-        return x, y
+    def add_line_geometry(self, line_geometry, style):
+        line_style = style.get("LineStyle")
+        key = None
+        if line_style is not None:
+            color = line_style["color"]
+            key = (tuple(color) if isinstance(color, list) else color, line_style["linewidth"])
+        lons, lats = np.asarray(line_geometry.coords, dtype=float)[:, :2].T
+        self.lines.setdefault(key, []).append((lons, lats))
 
     def add_point(self, point, style, name):
         """
-        Plot KML point
+        Add KML point
 
         :param point: fastkml object specifying point
         :param name: name of placemark for annotation
         """
-        x, y = self.map(point.geometry.x, point.geometry.y)
-        self.patches.append(self.map.plot(x, y, "o", zorder=10, color=self.color))
+        self.points.append((point.geometry.x, point.geometry.y))
         if name is not None:
-            self.patches.append([self.map.ax.annotate(
-                name, xy=(x, y), xycoords="data", xytext=(5, 5), textcoords='offset points', zorder=10,
-                bbox=dict(boxstyle="round, pad=0.15", fc="w"),
-                path_effects=[patheffects.withStroke(linewidth=2, foreground='w')])])
+            self.annotations.append((point.geometry.x, point.geometry.y, name, True))
 
     def add_line(self, line, style, name):
         """
-        Plot KML line
+        Add KML line
 
         :param line: fastkml LineString object
         """
-        kwargs = style.get("LineStyle", {"linewidth": self.linewidth, "color": self.color})
-        x, y = self.compute_xy(line.geometry)
-        self.patches.append(self.map.plot(x, y, "-", zorder=10, **kwargs))
+        self.add_line_geometry(line.geometry, style)
 
     def add_polygon(self, polygon, style, _):
         """
-        Plot KML polygons
+        Add KML polygons
 
         :param polygon: fastkml object specifying a polygon
         """
         # Exterior
-        kwargs = style.get("LineStyle", {"linewidth": self.linewidth, "color": self.color})
-        x, y = self.compute_xy(polygon.geometry.exterior)
-        self.patches.append(self.map.plot(x, y, "-", zorder=10, **kwargs))
+        self.add_line_geometry(polygon.geometry.exterior, style)
 
         # Interior Rings
         for interior in list(polygon.geometry.interiors):
-            x1, y1 = self.compute_xy(interior)
-            self.patches.append(self.map.plot(x1, y1, "-", zorder=10, **kwargs))
+            self.add_line_geometry(interior, style)
 
     def add_multipoint(self, geoms, style, name):
         """
-        Plot KML points in a MultiGeometry
+        Add KML points in a MultiGeometry
 
         :param point: fastkml object specifying point
         :param name: name of placemark for annotation
         """
-        xs, ys = self.map([point.x for point in geoms], [point.y for point in geoms])
-        self.patches.append(self.map.plot(xs, ys, "o", zorder=10, color=self.color))
+        self.points.extend((point.x, point.y) for point in geoms)
         if name is not None:
-            self.patches.append([self.map.ax.annotate(
-                name, xy=(xs[0], ys[0]), xycoords="data", xytext=(5, 5), textcoords='offset points', zorder=10,
-                path_effects=[patheffects.withStroke(linewidth=2, foreground='w')])])
+            self.annotations.append((geoms[0].x, geoms[0].y, name, False))
 
     def add_multiline(self, line, style, name):
         """
-        Plot KML LineStrings in a MultiGeometry
+        Add KML LineStrings in a MultiGeometry
 
         :param line: fastkml LineString object
         """
-        kwargs = style.get("LineStyle", {"linewidth": self.linewidth, "color": self.color})
-        x, y = self.compute_xy(line)
-        self.patches.append(self.map.plot(x, y, "-", zorder=10, **kwargs))
+        self.add_line_geometry(line, style)
 
     def add_multipolygon(self, polygon, style, _):
         """
-        Plot KML polygons in a MultiGeometry
+        Add KML polygons in a MultiGeometry
 
         :param polygon: fastkml object specifying a polygon
         """
-        kwargs = style.get("LineStyle", {"linewidth": self.linewidth, "color": self.color})
-        x, y = self.compute_xy(polygon.exterior)
-        self.patches.append(self.map.plot(x, y, "-", zorder=10, **kwargs))
+        self.add_line_geometry(polygon.exterior, style)
 
     def parse_geometries(self, placemark):
         name = placemark.name
@@ -182,13 +219,14 @@ class KMLPatch:
                 self.parse_placemarks(list(feature.features()))
 
     def get_style_params(self, style, color=None, linewidth=None):
-        if color is None:
-            color = self.color
-        if linewidth is None:
-            linewidth = self.linewidth
+        """
+        Returns colour and linewidth of style. Unspecified values are taken from color and
+        linewidth, None standing for the current colour and linewidth of the patch.
+        """
+        width = getattr(style, "width", None)
         result = {
             "color": str(getattr(style, "color", "")),
-            "linewidth": float(getattr(style, "width", linewidth))
+            "linewidth": linewidth if width is None else float(width)
         }
         logging.debug("color before %s", result["color"])
         if len(result["color"]) == 7 and result["color"][0] == "#":
@@ -234,41 +272,113 @@ class KMLPatch:
                         local_styles[supported] = self.get_style_params(style)
         return local_styles
 
+    def line_style(self, key):
+        color, linewidth = (None, None) if key is None else key
+        return {"color": self.color if color is None else color,
+                "linewidth": self.linewidth if linewidth is None else linewidth}
+
+    def project(self):
+        """
+        Projects the lines, densified along great circles, and the points onto the map.
+        """
+        self.segments = {}
+        if self.lines:
+            keys = [key for key, lines in self.lines.items() for _ in lines]
+            for key, (x, y) in zip(keys, self.map.gcpoints_paths(
+                    [line for lines in self.lines.values() for line in lines])):
+                if self.map.projection == "cyl":  # hack for wraparound
+                    x = normalize_longitude(x, self.map.llcrnrlon, self.map.urcrnrlon)
+                self.segments.setdefault(key, []).append(np.column_stack([x, y]))
+        points = self.map(*np.transpose(self.points)) if self.points else ([], [])
+        texts = self.map(*np.transpose([annotation[:2] for annotation in self.annotations])) \
+            if self.annotations else ([], [])
+        return points, texts
+
+    def simplified_segments(self, key):
+        if not self.simplify:
+            return self.segments[key]
+        return simplify_lines(self.segments[key], SIMPLIFY_TOLERANCE * self.simplified_width)
+
+    def map_width(self):
+        xmin, xmax = self.map.ax.get_xlim()
+        return abs(xmax - xmin)
+
+    def zoomed(self, _):
+        """
+        Simplifies the lines again, if the scale of the map changed considerably.
+        """
+        if self.simplify and not 0.5 < self.map_width() / self.simplified_width < 2:
+            self.simplified_width = self.map_width()
+            for key, collection in self.line_collections.items():
+                collection.set_segments(self.simplified_segments(key))
+
     def draw(self):
         """
         Do the actual plotting of the patch.
         """
-        # Plot satellite track.
-        self.styles = {}
-        kml_doc = list(self.kml.features())  # All kml files are enclosed in a single root < > and </ >
-        kml_style = kml_doc[0]
-        self.parse_styles(kml_style)
-        self.parse_placemarks(kml_doc)
+        (xs, ys), texts = self.project()
+        self.simplified_width = self.map_width()
+        for key in self.segments:
+            self.line_collections[key] = self.map.ax.add_collection(
+                LineCollection(self.simplified_segments(key), zorder=10, **self.line_style(key)))
+        if len(xs) > 0:
+            self.point_markers = self.map.plot(xs, ys, "o", zorder=10, color=self.color)[0]
+        for (x, y), (_, _, name, bbox) in zip(zip(*texts), self.annotations):
+            self.texts.append(self.map.ax.annotate(
+                name, xy=(x, y), xycoords="data", xytext=(5, 5), textcoords='offset points', zorder=10,
+                bbox=dict(boxstyle="round, pad=0.15", fc="w") if bbox else None,
+                path_effects=[patheffects.withStroke(linewidth=2, foreground='w')]))
+        self.patches = list(self.line_collections.values()) + \
+            ([self.point_markers] if self.point_markers is not None else []) + self.texts
+        self.xlim_callback = self.map.ax.callbacks.connect("xlim_changed", self.zoomed)
 
-        self.map.ax.figure.canvas.draw()
+        self.map.ax.figure.canvas.draw_idle()
 
     def update(self, color=None, linewidth=None):
         """
-        Removes the current plot of the patch and redraws the patch.
-        This is necessary, for instance, when the map projection and/or
-        extent has been changed.
+        Applies a new colour and linewidth to the patch. Without those, the
+        patch is projected again onto the map. This is necessary, for instance,
+        when the map projection and/or extent has been changed.
         """
         if color is not None:
             self.color = color
         if linewidth is not None:
             self.linewidth = linewidth
-        self.remove()
-        self.draw()
+        if not self.patches:
+            self.draw()
+        elif color is not None or linewidth is not None:
+            for key, collection in self.line_collections.items():
+                style = self.line_style(key)
+                collection.set_color(style["color"])
+                collection.set_linewidth(style["linewidth"])
+            if self.point_markers is not None:
+                self.point_markers.set_color(self.color)
+            self.map.ax.figure.canvas.draw_idle()
+        else:
+            (xs, ys), texts = self.project()
+            self.simplified_width = self.map_width()
+            for key, collection in self.line_collections.items():
+                collection.set_segments(self.simplified_segments(key))
+            if self.point_markers is not None:
+                self.point_markers.set_data(xs, ys)
+            for text, xy in zip(self.texts, zip(*texts)):
+                text.xy = xy
+            self.map.ax.figure.canvas.draw_idle()
 
     def remove(self):
         """
         Remove this satellite patch from the map canvas.
         """
         for patch in self.patches:
-            for element in patch:
-                element.remove()
+            patch.remove()
+        if self.xlim_callback is not None:
+            self.map.ax.callbacks.disconnect(self.xlim_callback)
+            self.xlim_callback = None
         self.patches = []
-        self.map.ax.figure.canvas.draw()
+        self.line_collections = {}
+        self.point_markers = None
+        self.texts = []
+        self.map.ax.figure.canvas.draw_idle()
 
 
 class KMLOverlayControlWidget(QtWidgets.QWidget, ui.Ui_KMLOverlayDockWidget):
@@ -396,9 +506,8 @@ class KMLOverlayControlWidget(QtWidgets.QWidget, ui.Ui_KMLOverlayDockWidget):
 
                 self.flag = 1  # sets flag of 0 to 1 when the linewidth changes
                 self.listWidget.currentItem().setIcon(self.show_color_icon(filename, self.set_color(filename)))
-                # removes and updates patches in the map according to new linewidth
+                # updates patches in the map according to new linewidth
                 if self.dict_files[filename]["patch"] is not None:
-                    self.dict_files[filename]["patch"].remove()
                     self.dict_files[filename]["patch"].update(
                         self.dict_files[filename]["color"], self.dict_files[filename]["linewidth"])
 
@@ -540,16 +649,20 @@ class KMLOverlayControlWidget(QtWidgets.QWidget, ui.Ui_KMLOverlayDockWidget):
     def load_file(self):
         """
         Loads multiple KML Files simultaneously and constructs the
-        corresponding patches.
+        corresponding patches. Files already shown are kept.
         """
-        for entry in self.dict_files.values():  # removes all patches from map, but not from dict_flighttrack
-            if entry["patch"] is not None:  # since newly initialized files will have patch:None
+        checked = [self.listWidget.item(index).text() for index in range(self.listWidget.count())
+                   if hasattr(self.listWidget.item(index), "checkState") and (
+                       self.listWidget.item(index).checkState() == QtCore.Qt.Checked)]
+        for filename, entry in self.dict_files.items():  # removes unchecked patches from map, but not from dict_files
+            if entry["patch"] is not None and filename not in checked:
                 entry["patch"].remove()
                 entry["patch"] = None
 
         for index in range(self.listWidget.count()):
             if hasattr(self.listWidget.item(index), "checkState") and (
-                    self.listWidget.item(index).checkState() == QtCore.Qt.Checked):
+                    self.listWidget.item(index).checkState() == QtCore.Qt.Checked) and (
+                    self.dict_files.get(self.listWidget.item(index).text(), {}).get("patch") is None):
                 _dirname, _name = os.path.split(self.listWidget.item(index).text())
                 _fs = fs.open_fs(_dirname)
                 try:
@@ -557,14 +670,9 @@ class KMLOverlayControlWidget(QtWidgets.QWidget, ui.Ui_KMLOverlayDockWidget):
                         self.kml = kml.KML()  # creates fastkml object
                         self.kml.from_string(kmlf.read().encode('utf-8'))
                         if self.listWidget.item(index).text() in self.dict_files:  # just a precautionary check
-                            if self.dict_files[self.listWidget.item(index).text()]["patch"] is not None:  # added before
-                                patch = KMLPatch(self.view.map, self.kml,
-                                                 self.set_color(self.listWidget.item(index).text()),
-                                                 self.set_linewidth(self.listWidget.item(index).text()))
-                            else:  # if new file is being added
-                                patch = KMLPatch(self.view.map, self.kml,
-                                                 self.dict_files[self.listWidget.item(index).text()]["color"],
-                                                 self.dict_files[self.listWidget.item(index).text()]["linewidth"])
+                            patch = KMLPatch(self.view.map, self.kml,
+                                             self.set_color(self.listWidget.item(index).text()),
+                                             self.set_linewidth(self.listWidget.item(index).text()))
                             self.dict_files[self.listWidget.item(index).text()]["patch"] = patch
 
                 except (AttributeError, IOError, TypeError, et.XMLSyntaxError, et.XMLSchemaError,
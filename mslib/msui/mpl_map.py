@@ -33,9 +33,9 @@
 """
 
 import logging
-import copy
 import numpy as np
-from shapely.geometry import Polygon
+import shapely
+from shapely.geometry import Point, Polygon
 import matplotlib
 from matplotlib.cm import get_cmap
 import matplotlib.path as mpath
@@ -49,7 +49,9 @@ except ImportError:
     import pyproj
 
 from mslib.msui import mpl_pathinteractor as mpl_pi
-from mslib.utils.airdata import get_airports, get_airspaces
+from mslib.utils.airdata import (
+    get_airports, get_airspaces, get_airports_index, get_airspaces_index, airport_column)
+from mslib.utils.coordinate import geodesic_path
 from mslib.utils.loggerdef import configure_mpl_logger
 
 
@@ -58,6 +60,9 @@ OPENAIP_NOTICE = "Airspace data used comes from openAIP.\n" \
 OURAIRPORTS_NOTICE = "Airports provided by OurAirports."
 mpl_logger = configure_mpl_logger()
 
+# Basemap keywords of the map corners, changing only these does not change the projection
+EXTENT_KEYS = ("llcrnrlon", "llcrnrlat", "urcrnrlon", "urcrnrlat")
+
 
 class MapCanvas(basemap.Basemap):
     """
@@ -121,6 +126,10 @@ class MapCanvas(basemap.Basemap):
         self.gc = pyproj.Geod(a=self.rmajor, b=self.rminor)
 
         self.kwargs = kwargs
+        # Basemap only projects the coastlines, countries and land of the map region
+        # given to the constructor, views within this region can reuse them.
+        self.geometry_extent = (min(self.llcrnrx, self.urcrnrx), min(self.llcrnry, self.urcrnry),
+                                max(self.llcrnrx, self.urcrnrx), max(self.llcrnry, self.urcrnry))
 
         # Set up the map appearance.
         if self.appearance["draw_coastlines"]:
@@ -154,10 +163,8 @@ class MapCanvas(basemap.Basemap):
             self._infos = [None] * 4
         self.update_info_text(name=self.operation_name, crs=self.crs)
 
-        if self.appearance["draw_graticule"]:
-            pass
-            # self._draw_auto_graticule() ; It's already called in mpl_qtwidget.py in MplTopviewCanvas init_map().
-        else:
+        # self._draw_auto_graticule() ; It's already called in mpl_qtwidget.py in MplTopviewCanvas init_map().
+        if not self.appearance["draw_graticule"] or not hasattr(self, "map_parallels"):
             self.map_parallels = None
             self.map_meridians = None
 
@@ -381,23 +388,55 @@ class MapCanvas(basemap.Basemap):
             country_codes = [airspace.split(" ")[-1] for airspace in airspaces]
             self.draw_airspaces(country_codes, range_km)
 
+    def _geographic_extent(self):
+        """
+        Returns lon/lat bounds (lon0, lat0, lon1, lat1) enclosing the projected
+        region of the map, or None if it reaches beyond the globe.
+        """
+        xmin, ymin, xmax, ymax = self.geometry_extent
+        steps = np.linspace(0, 1, 101)
+        xs = np.concatenate([xmin + (xmax - xmin) * steps, np.full_like(steps, xmax),
+                             xmax - (xmax - xmin) * steps, np.full_like(steps, xmin)])
+        ys = np.concatenate([np.full_like(steps, ymin), ymin + (ymax - ymin) * steps,
+                             np.full_like(steps, ymax), ymax - (ymax - ymin) * steps])
+        lons, lats = (np.asarray(_x) for _x in self(xs, ys, inverse=True))
+        if not np.all(np.isfinite(lons) & np.isfinite(lats) & (np.abs(lats) <= 90)):
+            return None
+        # only the boundary is sampled, what lies between two samples differs by less than their spacing
+        lon_margin, lat_margin = np.abs(np.diff(lons)).max() + 1, np.abs(np.diff(lats)).max() + 1
+        lon0, lat0, lon1, lat1 = lons.min() - lon_margin, lats.min() - lat_margin, \
+            lons.max() + lon_margin, lats.max() + lat_margin
+        if lon_margin > 180:
+            # the boundary crosses the dateline
+            lon0, lon1 = min(lon0, -180), max(lon1, 180)
+        for pole in (-90, 90):
+            x, y = self(0, pole)
+            if xmin <= x <= xmax and ymin <= y <= ymax:
+                lon0, lat0, lon1, lat1 = min(lon0, -180), min(lat0, pole), max(lon1, 180), max(lat1, pole)
+        return lon0, lat0, lon1, lat1
+
     def draw_airspaces(self, countries=[], range_km=None):
         """
         Load and draw airspace data
         """
         if not self.airspaces:
-            airspaces = copy.deepcopy(get_airspaces(countries))
+            airspaces = get_airspaces(countries)
             if not airspaces:
                 logging.error("Tried to draw airspaces without asp files.")
                 return
 
-            for i, airspace in enumerate(airspaces):
-                airspaces[i]["polygon"] = list(zip(*self.projtran(*list(zip(*airspace["polygon"])))))
-            map_polygon = Polygon([(self.llcrnrx, self.llcrnry), (self.urcrnrx, self.llcrnry),
-                                  (self.urcrnrx, self.urcrnry), (self.llcrnrx, self.urcrnry)])
-            airspaces = [airspace for airspace in airspaces if
-                         (not range_km or range_km[0] <= airspace["bottom"] <= range_km[1]) and
-                         Polygon(airspace["polygon"]).intersects(map_polygon)]
+            # keep the airspaces of the whole projected region, they stay valid when zooming and panning within it
+            airspaces = [airspaces[i] for i in get_airspaces_index(airspaces).query(self._geographic_extent())
+                         if not range_km or range_km[0] <= airspaces[i]["bottom"] <= range_km[1]]
+            if airspaces:
+                vertices = np.concatenate([airspace["polygon"] for airspace in airspaces])
+                vertices = np.column_stack(self.projtran(vertices[:, 0], vertices[:, 1]))
+                polygons = np.split(vertices, np.cumsum([len(airspace["polygon"]) for airspace in airspaces])[:-1])
+                xmin, ymin, xmax, ymax = self.geometry_extent
+                map_polygon = Polygon([(xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)])
+                airspaces = [dict(airspace, polygon=polygon, geometry=Polygon(polygon))
+                             for airspace, polygon in zip(airspaces, polygons)]
+                airspaces = [airspace for airspace in airspaces if airspace["geometry"].intersects(map_polygon)]
             if not airspaces:
                 return
 
@@ -406,6 +445,8 @@ class MapCanvas(basemap.Basemap):
             max_height = max(airspaces[-1]["bottom"], 0.001)
             cmap = get_cmap("Blues")
             airspace_colors = [cmap(1 - airspaces[i]["bottom"] / max_height) for i in range(len(airspaces))]
+            # the airspaces under the mouse are looked up in an index of the drawn polygons
+            tree = shapely.STRtree([airspace["geometry"] for airspace in airspaces])
 
             collection = PolyCollection([airspace["polygon"] for airspace in airspaces], alpha=0.5, edgecolor="black",
                                         zorder=5, facecolors=airspace_colors)
@@ -420,7 +461,7 @@ class MapCanvas(basemap.Basemap):
                 self.airspacetext.xy = xydata
                 self.airspacetext.set_position(xydata)
                 self.airspacetext.set_text("\n".join([f"{airspaces[i]['name']}, {airspaces[i]['bottom']} - "
-                                                     f"{airspaces[i]['top']}km" for i in index["ind"]]))
+                                                      f"{airspaces[i]['top']}km" for i in index["ind"]]))
                 highlight_cmap = get_cmap("YlGn")
                 for i in index["ind"]:
                     airspace_colors[i] = highlight_cmap(1 - airspaces[i]["bottom"] / max_height)
@@ -430,9 +471,9 @@ class MapCanvas(basemap.Basemap):
 
             def on_move(event):
                 if self.airspaces and event.inaxes == self.ax:
-                    cont, ind = self.airspaces.contains(event)
-                    if cont:
-                        update_text(ind, (event.xdata, event.ydata))
+                    ind = np.sort(tree.query(Point(event.xdata, event.ydata), predicate="intersects"))
+                    if len(ind) > 0:
+                        update_text({"ind": ind}, (event.xdata, event.ydata))
                         self.airspacetext.set_visible(True)
                         self.ax.figure.canvas.draw_idle()
                     elif self.airspacetext.get_visible():
@@ -452,19 +493,18 @@ class MapCanvas(basemap.Basemap):
                 logging.error("Tried to draw airports but none were found. Try redownloading.")
                 return
 
-            lons, lats = self.projtran(*zip(*[(float(airport["longitude_deg"]),
-                                            float(airport["latitude_deg"])) for airport in airports]))
-            for i, airport in enumerate(airports):
-                airports[i]["longitude_deg"] = lons[i]
-                airports[i]["latitude_deg"] = lats[i]
-
-            airports = [airport for airport in airports if airport["type"] in port_type and
-                        self.llcrnrx <= float(airport["longitude_deg"]) <= self.urcrnrx and
-                        self.llcrnry <= float(airport["latitude_deg"]) <= self.urcrnry]
-            lons = [float(airport["longitude_deg"]) for airport in airports]
-            lats = [float(airport["latitude_deg"]) for airport in airports]
-            annotations = [airport["name"] for airport in airports]
-            if not airports:
+            index = get_airports_index(airports)
+            types, names = airport_column(airports, "type"), airport_column(airports, "name")
+            selected = [i for i in index.query(self._geographic_extent()) if types[i] in port_type]
+            if not selected:
+                return
+            lons, lats = shapely.get_coordinates(index.geometries[selected]).T
+            lons, lats = self.projtran(lons, lats)
+            xmin, ymin, xmax, ymax = self.geometry_extent
+            visible = (xmin <= lons) & (lons <= xmax) & (ymin <= lats) & (lats <= ymax)
+            lons, lats = lons[visible], lats[visible]
+            annotations = [names[i] for i, _visible in zip(selected, visible) if _visible]
+            if not annotations:
                 return
 
             self.update_info_text(ourairports=OURAIRPORTS_NOTICE)
@@ -475,6 +515,8 @@ class MapCanvas(basemap.Basemap):
                                             bbox={"boxstyle": "round", "facecolor": "w",
                                                   "edgecolor": "0.5", "alpha": 0.9}, zorder=8)
             self.airtext.set_visible(False)
+            # the airports under the mouse are looked up in an index of the drawn points
+            tree = shapely.STRtree(shapely.points(lons, lats))
 
             def update_text(index):
                 pos = self.airports.get_offsets()[index["ind"][0]]
@@ -482,11 +524,22 @@ class MapCanvas(basemap.Basemap):
                 self.airtext.set_position(pos)
                 self.airtext.set_text("\n".join([annotations[i] for i in index["ind"]]))
 
+            def airports_under(event):
+                # markers are hit within their radius plus the pick radius (in pixels)
+                radius = self.airports.get_pickradius() + \
+                    0.5 * np.sqrt(self.airports.get_sizes()[0]) * self.ax.figure.dpi / 72.
+                corners = self.ax.transData.inverted().transform(
+                    [(event.x - radius, event.y - radius), (event.x + radius, event.y + radius)])
+                ind = np.sort(tree.query(shapely.box(*corners.min(axis=0), *corners.max(axis=0))))
+                distances = np.hypot(*(self.ax.transData.transform(self.airports.get_offsets()[ind]) -
+                                       (event.x, event.y)).T)
+                return ind[distances <= radius]
+
             def on_move(event):
                 if self.airports and event.inaxes == self.ax:
-                    cont, ind = self.airports.contains(event)
-                    if cont:
-                        update_text(ind)
+                    ind = airports_under(event)
+                    if len(ind) > 0:
+                        update_text({"ind": ind})
                         self.airtext.set_visible(True)
                         self.ax.figure.canvas.draw_idle()
                     elif self.airtext.get_visible():
@@ -573,11 +626,16 @@ class MapCanvas(basemap.Basemap):
 
     def update_with_coordinate_change(self, kwargs_update=None):
         """
-        Redraws the entire map. This is necessary after zoom/pan operations.
+        Updates the map after zoom/pan operations or a change of the projection.
 
-        Determines corner coordinates of the current axes, removes all items
-        belonging the the current map and draws a new one by calling
-        self.__init__().
+        If only the map extent changes and the new extent lies within the
+        region whose geometry has been projected, the map coordinates are kept
+        and only the axes limits and corner attributes are changed, see
+        self._update_extent(). Returns False in this case.
+
+        Otherwise determines corner coordinates of the current axes, removes
+        all items belonging the the current map and draws a new one by calling
+        self.__init__(). Returns True in this case.
 
         DRAWBACK of this approach is that the map coordinate system changes, as
         basemap always takes the lower left axis corner as (0,0). This means
@@ -587,6 +645,9 @@ class MapCanvas(basemap.Basemap):
         the map is redrawn, 2) redrawing the map, 3) transforming the stored
         lat/lon coordinates to the new map coordinates.
         """
+        if self._update_extent(kwargs_update):
+            return False
+
         # Convert the current axis corners to lat/lon coordinates.
         axis = self.ax.axis()
         self.kwargs['llcrnrlon'], self.kwargs['llcrnrlat'] = \
@@ -641,6 +702,12 @@ class MapCanvas(basemap.Basemap):
         self.set_fillcontinents_visible(False)
         self.appearance["fill_continents"] = cont_vis
 
+        # Airports and airspaces are given in the old map coordinates, they are drawn again when needed.
+        if self.airports:
+            self.set_draw_airports(False)
+        if self.airspaces:
+            self.set_draw_airspaces(False)
+
         # POSSIBILITY A): Call self.__init__ again with stored keywords.
         # Update kwargs if new parameters such as the map region have been
         # given.
@@ -651,30 +718,59 @@ class MapCanvas(basemap.Basemap):
                     del self.kwargs[key]
             self.kwargs.update(kwargs_update)
         self.__init__(**self.kwargs)
+        return True
 
-        # TODO: HOW TO MAKE THIS MORE EFFICIENT.
-        # POSSIBILITY B): Only set the Basemap parameters that influence the
-        # plot (corner lat/lon, x/y, width/height, ..) and re-define the
-        # polygons that represent the coastlines etc. In Basemap, they are
-        # defined in __init__(), at the very bottom (the code that comes
-        # with the comments
-        #    >> read in coastline polygons, only keeping those that
-        #    >> intersect map boundary polygon.
-        # ). Basemap only loads the coastline data that is actually displayed.
-        # If we only change llcrnrlon etc. here and replot coastlines etc.,
-        # the polygons and the map extent will remain the same.
-        # However, it should be possible to make a map change WITHOUT changing
-        # coordinates.
-        #
-
-    # self.llcrnrlon = llcrnrlon
-    # self.llcrnrlat = llcrnrlat
-    # self.urcrnrlon = urcrnrlon
-    # self.urcrnrlat = urcrnrlat
-    # self.llcrnrx = axis[0]
-    # self.llcrnry = axis[2]
-    # self.urcrnrx = axis[1]
-    # self.urcrnry = axis[3]
+    def _update_extent(self, kwargs_update=None):
+        """
+        Moves the map to a new extent without changing the map coordinates.
+
+        The new extent is given by the corners in kwargs_update or else by the
+        current axes limits. Returns False without changing anything if
+        kwargs_update changes the projection or if the new extent is not
+        covered by the projected geometry.
+        """
+        if kwargs_update:
+            current = dict(self.kwargs, CRS=self.crs, BBOX_UNITS=self.bbox_units, OPERATION_NAME=self.operation_name)
+            if any(current.get(key) != value for key, value in kwargs_update.items() if key not in EXTENT_KEYS):
+                return False
+            if not all(key in kwargs_update for key in EXTENT_KEYS):
+                return False
+            llcrnrx, llcrnry = self(kwargs_update["llcrnrlon"], kwargs_update["llcrnrlat"])
+            urcrnrx, urcrnry = self(kwargs_update["urcrnrlon"], kwargs_update["urcrnrlat"])
+        else:
+            llcrnrx, urcrnrx, llcrnry, urcrnry = self.ax.axis()
+
+        xmin, ymin, xmax, ymax = self.geometry_extent
+        # allow for rounding errors of the projection
+        eps_x, eps_y = 1e-6 * (xmax - xmin), 1e-6 * (ymax - ymin)
+        if not all(np.isfinite([llcrnrx, llcrnry, urcrnrx, urcrnry])) or \
+                min(llcrnrx, urcrnrx) < xmin - eps_x or max(llcrnrx, urcrnrx) > xmax + eps_x or \
+                min(llcrnry, urcrnry) < ymin - eps_y or max(llcrnry, urcrnry) > ymax + eps_y:
+            return False
+
+        llcrnrlon, llcrnrlat = self(llcrnrx, llcrnry, inverse=True)
+        urcrnrlon, urcrnrlat = self(urcrnrx, urcrnry, inverse=True)
+        if kwargs_update:
+            # keep the given corners, the inverse projection may differ by rounding errors
+            llcrnrlon, llcrnrlat, urcrnrlon, urcrnrlat = (kwargs_update[key] for key in EXTENT_KEYS)
+        logging.debug("moving map to corner coordinates (lat/lon): ll(%.2f,%.2f), ur(%.2f,%.2f)",
+                      llcrnrlat, llcrnrlon, urcrnrlat, urcrnrlon)
+        self.kwargs.update(llcrnrlon=llcrnrlon, llcrnrlat=llcrnrlat, urcrnrlon=urcrnrlon, urcrnrlat=urcrnrlat)
+        self.llcrnrlon, self.llcrnrlat, self.urcrnrlon, self.urcrnrlat = llcrnrlon, llcrnrlat, urcrnrlon, urcrnrlat
+        self.llcrnrx, self.llcrnry, self.urcrnrx, self.urcrnry = llcrnrx, llcrnry, urcrnrx, urcrnry
+        # Basemap places the graticule labels at the boundary given by these.
+        self.xmin, self.xmax = min(llcrnrx, urcrnrx), max(llcrnrx, urcrnrx)
+        self.ymin, self.ymax = min(llcrnry, urcrnry), max(llcrnry, urcrnry)
+        if self.projection == "cyl":
+            self.aspect = (self.urcrnrlat - self.llcrnrlat) / (self.urcrnrlon - self.llcrnrlon)
+
+        # The graticule depends on the extent and is drawn again by the caller.
+        grat_vis = self.appearance["draw_graticule"]
+        self.set_graticule_visible(False)
+        self.appearance["draw_graticule"] = grat_vis
+        self.ax.set_xlim(llcrnrx, urcrnrx)
+        self.ax.set_ylim(llcrnry, urcrnry)
+        return True
 
     def imshow(self, X, **kwargs):
         """
@@ -693,59 +789,61 @@ class MapCanvas(basemap.Basemap):
         to space the points instead of a number of points.
         """
         # use great circle formula for a perfect sphere.
-        _, _, dist = self.gc.inv(lon0, lat0, lon1, lat1)
-        npoints = int((dist + 0.5 * 1000. * del_s) / (1000. * del_s))
-        if npoints == 0:
-            lons = [lon0, lon1]
-            lats = [lat0, lat1]
-        else:
-            lonlats = self.gc.npts(lon0, lat0, lon1, lat1, npoints)
-            lons = [lon0]
-            lats = [lat0]
-            for lon, lat in lonlats:
-                lons.append(lon)
-                lats.append(lat)
-            lons.append(lon1)
-            lats.append(lat1)
+        npoints = self.gcpoints_npoints([lon0, lon1], [lat0, lat1], del_s=del_s)
+        lons, lats = geodesic_path([lon0, lon1], [lat0, lat1], npoints, geod=self.gc)
         if map_coords:
             x, y = self(lons, lats)
         else:
             x, y = (lons, lats)
         return x, y
 
+    def gcpoints_npoints(self, lons, lats, del_s=100.):
+        """
+        Returns the number of intermediate points gcpoints2 inserts into each
+        segment of the path lons, lats to space the points del_s km apart.
+        """
+        lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+        _, _, dist = self.gc.inv(lons[:-1], lats[:-1], lons[1:], lats[1:])
+        return ((np.asarray(dist) + 0.5 * 1000. * del_s) / (1000. * del_s)).astype(int)
+
     def gcpoints_path(self, lons, lats, del_s=100., map_coords=True):
         """
         Same as gcpoints2, but for an entire path, i.e. multiple
         line segments. lons and lats are lists of waypoint coordinates.
         """
+        return self.gcpoints_paths([(lons, lats)], del_s=del_s, map_coords=map_coords)[0]
+
+    def gcpoints_paths(self, paths, del_s=100., map_coords=True):
+        """
+        Same as gcpoints_path, but for several paths given as a list of
+        (lons, lats) tuples. The segments of all paths are densified by one
+        vectorised call. Returns a list of x, y tuples, one for each path.
+        """
         # use great circle formula for a perfect sphere.
-        assert len(lons) == len(lats)
-        assert len(lons) > 1
-        gclons = [lons[0]]
-        gclats = [lats[0]]
-        for i in range(len(lons) - 1):
-            _, _, dist = self.gc.inv(lons[i], lats[i], lons[i + 1], lats[i + 1])
-            npoints = int((dist + 0.5 * 1000. * del_s) / (1000. * del_s))
-            lonlats = []
-            if npoints > 0:
-                lonlats = self.gc.npts(lons[i], lats[i], lons[i + 1], lats[i + 1], npoints)
-            for lon, lat in lonlats:
-                gclons.append(lon)
-                gclats.append(lat)
-            gclons.append(lons[i + 1])
-            gclats.append(lats[i + 1])
-        if self.projection == "cyl":  # hack for wraparound
-            lon_min, lon_max = self.llcrnrlon, self.urcrnrlon
-            gclons = np.array(gclons)
-            gclons[gclons < lon_min] += 360
-            gclons[gclons > lon_max] -= 360
-            idcs = np.where(abs(np.diff(gclons)) > 300)[0]
-            gclons[idcs] = np.nan
-        if map_coords:
-            x, y = self(gclons, gclats)
-        else:
-            x, y = (gclons, gclats)
-        return x, y
+        assert all(len(lons) == len(lats) for lons, lats in paths)
+        assert all(len(lons) > 1 for lons, _ in paths)
+        lons = np.concatenate([np.asarray(lons, dtype=float) for lons, _ in paths])
+        lats = np.concatenate([np.asarray(lats, dtype=float) for _, lats in paths])
+        npoints = self.gcpoints_npoints(lons, lats, del_s=del_s)
+        # The segments joining consecutive paths get no intermediate points and are cut again.
+        starts = np.cumsum([len(path[0]) for path in paths])[:-1]
+        npoints[starts - 1] = 0
+        gclons, gclats = geodesic_path(lons, lats, npoints, geod=self.gc)
+        splits = np.concatenate([[0], np.cumsum(npoints + 1)])[starts]
+
+        result = []
+        for gclons, gclats in zip(np.split(gclons, splits), np.split(gclats, splits)):
+            if self.projection == "cyl":  # hack for wraparound
+                lon_min, lon_max = self.llcrnrlon, self.urcrnrlon
+                gclons[gclons < lon_min] += 360
+                gclons[gclons > lon_max] -= 360
+                idcs = np.where(abs(np.diff(gclons)) > 300)[0]
+                gclons[idcs] = np.nan
+            if map_coords:
+                result.append(self(gclons, gclats))
+            else:
+                result.append((gclons, gclats))
+        return result
 
     def drawgreatcircle_path(self, lons, lats, del_s=100., **kwargs):
         """
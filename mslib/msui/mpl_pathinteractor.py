@@ -354,6 +354,9 @@ class PathPlotter:
         """
         self.waypoints_model = None
         self.background = None
+        # Background including the path artists that stay in place while a waypoint is dragged.
+        self.drag_background = None
+        self.drag_index = None
 
         # Create a PathPatch representing the interactively editable path
         # (vertical profile or horizontal flight track in subclasses).
@@ -389,23 +392,69 @@ class PathPlotter:
            restoration) and draws artists.
         """
         self.background = self.canvas.copy_from_bbox(self.ax.bbox)
-        try:
-            # TODO review
-            self.ax.draw_artist(self.pathpatch)
-        except ValueError as ex:
-            # When using Matplotlib 1.2, "ValueError: Invalid codes array."
-            # occurs. The error occurs in Matplotlib's backend_agg.py/draw_path()
-            # function. However, when I print the codes array in that function,
-            # it looks fine -- correct length and correct codes. I can't figure
-            # out why that error occurs.. (mr, 2013Feb08).
-            logging.error("%s %s", ex, type(ex))
-        self.ax.draw_artist(self.line)
-        for t in self.wp_labels:
-            self.ax.draw_artist(t)
-            # The blit() method makes problems (distorted figure background). However,
-            # I don't see why it is needed -- everything seems to work without this line.
-            # (see infos on http://www.scipy.org/Cookbook/Matplotlib/Animations).
-            # self.canvas.blit(self.ax.bbox)
+        self.stop_drag()
+        self.draw_animated_artists()
+
+    def animated_artists(self):
+        """Returns the animated artists that represent the path. These are
+           not part of the cached background and need to be drawn on top of it.
+        """
+        return [self.pathpatch, self.line] + self.wp_labels
+
+    def draw_animated_artists(self, artists=None):
+        """Draws the animated artists onto the canvas, without blitting.
+        """
+        if artists is None:
+            artists = self.animated_artists()
+        for artist in artists:
+            try:
+                self.ax.draw_artist(artist)
+            except ValueError as ex:
+                # When using Matplotlib 1.2, "ValueError: Invalid codes array."
+                # occurs for the path patch in Matplotlib's backend_agg.py/draw_path()
+                # function, although the codes array looks fine (mr, 2013Feb08).
+                logging.error("%s %s", ex, type(ex))
+
+    def blit(self):
+        """Restores the background cached on the last full redraw, draws the
+           animated artists on top of it and blits the axes to the screen.
+
+        This is much cheaper than canvas.draw(), which would also render the
+        map, images and all overlays, and is used while waypoints are dragged.
+        """
+        if self.drag_background is not None:
+            self.canvas.restore_region(self.drag_background)
+            self.draw_animated_artists(self.dragged_artists())
+        else:
+            if self.background is not None:
+                self.canvas.restore_region(self.background)
+            self.draw_animated_artists()
+        self.canvas.blit(self.ax.bbox)
+
+    def dragged_artists(self):
+        """Returns the animated artists that change while the waypoint
+           drag_index is dragged: everything but the labels of the other waypoints.
+        """
+        artists = [artist for artist in self.animated_artists() if artist not in self.wp_labels]
+        if self.drag_index < len(self.wp_labels):
+            artists.append(self.wp_labels[self.drag_index])
+        return artists
+
+    def start_drag(self, index):
+        """Caches the background together with the labels of all waypoints
+           but the one at index, so that only the artists that change have to
+           be drawn on every mouse movement.
+        """
+        self.drag_index = index
+        if self.background is not None:
+            self.canvas.restore_region(self.background)
+        dragged = self.dragged_artists()
+        self.draw_animated_artists([artist for artist in self.animated_artists() if artist not in dragged])
+        self.drag_background = self.canvas.copy_from_bbox(self.ax.bbox)
+
+    def stop_drag(self):
+        self.drag_background = None
+        self.drag_index = None
 
     def set_vertices_visible(self, showverts=True):
         """Set the visibility of path vertices (the line plot).
@@ -540,11 +589,7 @@ class PathH_Plotter(PathPlotter):
             self.wp_scatter = None
 
         x, y = list(zip(*wp_vertices))
-
-        if self.map.projection == "cyl":  # hack for wraparound
-            x = np.array(x)
-            x[x < self.map.llcrnrlon] += 360
-            x[x > self.map.urcrnrlon] -= 360
+        x = self._wraparound(x)
         # (animated is important to remove the old scatter points from the map)
         self.wp_scatter = self.ax.scatter(
             x, y, color=self.markerfacecolor, s=20, zorder=3, animated=True, visible=self.show_marker)
@@ -567,35 +612,58 @@ class PathH_Plotter(PathPlotter):
             self.wp_labels.append(text)
 
         # Redraw the artists.
-        if self.background:
-            self.canvas.restore_region(self.background)
-        try:
-            self.ax.draw_artist(self.pathpatch)
-        except ValueError as error:
-            logging.debug("ValueError Exception '%s'", error)
-        self.ax.draw_artist(self.line)
+        self.blit()
+
+    def drag_waypoint(self, index, x, y):
+        """Moves the waypoint at index to the projection coordinates x, y
+           while it is dragged.
+
+        Only the great circle line, the scatter offsets and the position of
+        the label of the moved waypoint are updated and blitted onto the cached
+        background. Tangent and solar lines are removed; they are recomputed
+        by redraw_path() once the move is submitted to the waypoints model.
+        """
+        if self.drag_index != index:
+            self.start_drag(index)
+        wp_vertices = self.pathpatch.get_path().wp_vertices
+        wp_vertices[index] = x, y
+        lons, lats = self.map(wp_vertices[:, 0], wp_vertices[:, 1], inverse=True)
+        self.line.set_data(self.map.gcpoints_path(lons, lats))
+
+        for lines in (self.tangent_lines, self.solar_lines):
+            if lines is not None:
+                lines.remove()
+        self.tangent_lines = None
+        self.solar_lines = None
+
+        x, y = self._wraparound(wp_vertices[:, 0]), wp_vertices[:, 1]
         if self.wp_scatter is not None:
-            self.ax.draw_artist(self.wp_scatter)
+            self.wp_scatter.set_offsets(np.column_stack([x, y]))
+        if index < len(self.wp_labels):
+            self.wp_labels[index].set_position((x[index], y[index]))
+        self.blit()
 
-        for wp_label in self.wp_labels:
-            self.ax.draw_artist(wp_label)
-        if self.show_tangent_points:
-            self.ax.draw_artist(self.tangent_lines)
-        if self.show_solar_angle is not None:
-            self.ax.draw_artist(self.solar_lines)
-        self.canvas.blit(self.ax.bbox)
+    def _wraparound(self, x):
+        """Shifts x coordinates of a cylindrical projection into the map domain.
+        """
+        x = np.array(x)
+        if self.map.projection == "cyl":  # hack for wraparound
+            x[x < self.map.llcrnrlon] += 360
+            x[x > self.map.urcrnrlon] -= 360
+        return x
 
-    def draw_callback(self, event):
-        """Extends PathInteractor.draw_callback() by drawing the scatter
-           instance.
+    def animated_artists(self):
+        """Extends PathPlotter.animated_artists() by the scatter instance and
+           the tangent and solar lines.
         """
-        super().draw_callback(event)
-        if self.wp_scatter:
-            self.ax.draw_artist(self.wp_scatter)
-        if self.show_solar_angle:
-            self.ax.draw_artist(self.solar_lines)
-        if self.show_tangent_points:
-            self.ax.draw_artist(self.tangent_lines)
+        artists = super().animated_artists()
+        if self.wp_scatter is not None:
+            artists.append(self.wp_scatter)
+        if self.show_tangent_points and self.tangent_lines is not None:
+            artists.append(self.tangent_lines)
+        if self.show_solar_angle is not None and self.solar_lines is not None:
+            artists.append(self.solar_lines)
+        return artists
 
     def set_path_color(self, line_color=None, marker_facecolor=None,
                        patch_facecolor=None):
@@ -687,16 +755,21 @@ class PathV_Plotter(PathPlotter):
                 visible=self.showverts and self.label_waypoints)
             self.wp_labels.append(text)
 
-        if self.background:
-            self.canvas.restore_region(self.background)
-        try:
-            self.ax.draw_artist(self.pathpatch)
-        except ValueError as error:
-            logging.error("ValueError Exception %s", error)
-        self.ax.draw_artist(self.line)
-        for wp_label in self.wp_labels:
-            self.ax.draw_artist(wp_label)
-        self.canvas.blit(self.ax.bbox)
+        self.blit()
+
+    def drag_waypoint(self, index, y):
+        """Moves the waypoint at index to the vertical coordinate y while it
+           is dragged. Only the line and the label of the moved waypoint are
+           updated and blitted onto the cached background.
+        """
+        if self.drag_index != index:
+            self.start_drag(index)
+        vertices = self.pathpatch.get_path().vertices
+        vertices[index] = vertices[index, 0], y
+        self.line.set_data(list(zip(*vertices)))
+        if index < len(self.wp_labels):
+            self.wp_labels[index].set_position(vertices[index])
+        self.blit()
 
     def get_lat_lon(self, event, wpm):
         x = event.xdata
@@ -1006,6 +1079,7 @@ class VPathInteractor(PathInteractor):
             return
 
         if self._ind is not None:
+            self.plotter.stop_drag()
             # Submit the new pressure (the only value that can be edited
             # in the side view) to the data model.
             vertices = self.plotter.pathpatch.get_path().vertices
@@ -1015,6 +1089,8 @@ class VPathInteractor(PathInteractor):
             # NOTE: QVariant cannot handle numpy.float64 types, hence convert
             # to float().
             self.waypoints_model.setData(qt_index, QtCore.QVariant(float(pressure / 100.)))
+            # The drag only blitted the path, redraw everything once.
+            self.plotter.canvas.draw()
 
         self._ind = None
 
@@ -1028,11 +1104,9 @@ class VPathInteractor(PathInteractor):
         """
         if not self.showverts or self._ind is None or event.inaxes is None or event.button != 1:
             return
-        vertices = self.plotter.pathpatch.get_path().vertices
         # Set the new y position of the vertex to event.ydata. Keep the
-        # x coordinate.
-        vertices[self._ind] = vertices[self._ind, 0], event.ydata
-        self.plotter.redraw_path(vertices)
+        # x coordinate. Only the path is blitted, the figure is redrawn on release.
+        self.plotter.drag_waypoint(self._ind, event.ydata)
 
     def qt_data_changed_listener(self, index1, index2):
         """Listens to dataChanged() signals emitted by the flight track
@@ -1214,6 +1288,7 @@ class HPathInteractor(PathInteractor):
             return
 
         # Submit the new position to the data model.
+        self.plotter.stop_drag()
         vertices = self.plotter.pathpatch.get_path().wp_vertices
         lon, lat = self.plotter.map(vertices[self._ind][0], vertices[self._ind][1],
                                     inverse=True)
@@ -1224,6 +1299,8 @@ class HPathInteractor(PathInteractor):
             self.waypoints_model.createIndex(self._ind, ft.LAT), QtCore.QVariant(lat), update=False)
         self.waypoints_model.setData(
             self.waypoints_model.createIndex(self._ind, ft.LON), QtCore.QVariant(lon))
+        # The drag only blitted the path, redraw everything once.
+        self.plotter.canvas.draw()
 
         self._ind = None
 
@@ -1251,9 +1328,8 @@ class HPathInteractor(PathInteractor):
             return
         if event.button != 1:
             return
-        wp_vertices = self.plotter.pathpatch.get_path().wp_vertices
-        wp_vertices[self._ind] = event.xdata, event.ydata
-        self.plotter.redraw_path(wp_vertices, waypoints_model_data=self.waypoints_model.all_waypoint_data())
+        # Only the path is blitted, the figure is redrawn on release.
+        self.plotter.drag_waypoint(self._ind, event.xdata, event.ydata)
 
     def qt_data_changed_listener(self, index1, index2):
         """Listens to dataChanged() signals emitted by the flight track
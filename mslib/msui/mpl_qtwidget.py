@@ -275,10 +275,11 @@ class TopViewPlotter(ViewPlotter):
         Executed on clicked() of btMapRedraw.
         See MapCanvas.update_with_coordinate_change(). After the map redraw,
         coordinates of all objects overlain on the map have to be updated.
+        Returns True if the map coordinates have changed.
         """
 
         # 2) UPDATE MAP.
-        self.map.update_with_coordinate_change(kwargs_update)
+        coordinates_changed = self.map.update_with_coordinate_change(kwargs_update)
 
         # Sets the graticule ticklabels/labels fontsize for topview when map is redrawn.
         if self.settings["draw_graticule"]:
@@ -294,6 +295,7 @@ class TopViewPlotter(ViewPlotter):
         # Setting fontsize for topview plot title when map is redrawn.
         self.ax.set_title("Top view", fontsize=self.tov_pts, horizontalalignment='left', x=0)
         self.ax.figure.canvas.draw()
+        return coordinates_changed
 
     def draw_image(self, img):
         """Draw the image img on the current plot.
@@ -1563,7 +1565,7 @@ class MplTopViewCanvas(MplCanvas):
         self.pdlg.setValue(1)
         QtWidgets.QApplication.processEvents()
 
-        self.plotter.redraw_map(kwargs_update)
+        coordinates_changed = self.plotter.redraw_map(kwargs_update)
 
         self.pdlg.setValue(5)
         QtWidgets.QApplication.processEvents()
@@ -1572,14 +1574,16 @@ class MplTopViewCanvas(MplCanvas):
         self.pdlg.setValue(8)
         QtWidgets.QApplication.processEvents()
 
-        for segment in self.satoverpasspatch:
-            segment.update()
+        # after a pure zoom/pan the map coordinates are unchanged and the overlays stay in place
+        if coordinates_changed:
+            for segment in self.satoverpasspatch:
+                segment.update()
 
-        if self.kmloverlay:
-            self.kmloverlay.update()
+            if self.kmloverlay:
+                self.kmloverlay.update()
 
-        if self.multiple_flightpath:
-            self.multiple_flightpath.update()
+            if self.multiple_flightpath:
+                self.multiple_flightpath.update()
 
         # self.draw_metadata() ; It is not needed here, since below here already plot title is being set.
         self.repaint()
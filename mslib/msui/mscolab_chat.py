@@ -99,6 +99,9 @@ class MSColabChatWindow(QtWidgets.QMainWindow, ui.Ui_MscolabOperation):
         self.active_edit_id = None
         self.active_message_reply = None
         self.current_search_index = None
+        # id of the oldest loaded message, older messages are loaded while scrolling up
+        self.oldest_message_id = None
+        self.all_messages_loaded = False
         self.markdown = Markdown(extensions=['nl2br', 'sane_lists', DeregisterSyntax()])
         self.messageText = MessageTextEdit(self.centralwidget)
         self.setup_message_text()
@@ -111,6 +114,8 @@ class MSColabChatWindow(QtWidgets.QMainWindow, ui.Ui_MscolabOperation):
         self.uploadBtn.clicked.connect(self.handle_upload)
         self.editMessageBtn.clicked.connect(self.edit_message)
         self.cancelBtn.clicked.connect(self.send_message_state)
+        self.messageList.verticalScrollBar().valueChanged.connect(self.handle_message_list_scrolled)
+        self.serviceMessageList.verticalScrollBar().valueChanged.connect(self.handle_message_list_scrolled)
         # Socket Connection handlers
         self.conn.signal_operation_permissions_updated.connect(self.handle_permissions_updated)
         self.conn.signal_message_receive.connect(self.handle_incoming_message)
@@ -391,39 +396,90 @@ class MSColabChatWindow(QtWidgets.QMainWindow, ui.Ui_MscolabOperation):
             show_popup(self, "Error", "Session expired, new login required")
 
     def load_all_messages(self):
-        # empty messages and reload from server
+        # empty messages and load the newest page from server,
+        # the lists scroll to the top meanwhile, which must not load older messages
+        blockers = [QtCore.QSignalBlocker(message_list.verticalScrollBar())
+                    for message_list in (self.messageList, self.serviceMessageList)]
+        try:
+            self.oldest_message_id = None
+            self.all_messages_loaded = False
+            self.messageList.clear()
+            self.serviceMessageList.clear()
+            messages = self.request_messages()
+            if messages is not None:
+                for message in messages:
+                    self.render_new_message(message, scroll=False)
+                self.messageList.scrollToBottom()
+                self.serviceMessageList.scrollToBottom()
+        finally:
+            for blocker in blockers:
+                blocker.unblock()
+
+    def load_older_messages(self):
+        """
+        Loads the page of messages before the oldest loaded message on top of the message lists
+        """
+        if self.all_messages_loaded or self.oldest_message_id is None:
+            return
+        messages = self.request_messages(before_id=self.oldest_message_id)
+        if messages:
+            message_count = self.messageList.count()
+            service_message_count = self.serviceMessageList.count()
+            for message in reversed(messages):
+                self.render_new_message(message, scroll=False, row=0)
+            # keep the previously topmost messages in view
+            for message_list, count in ((self.messageList, message_count),
+                                        (self.serviceMessageList, service_message_count)):
+                scroll_bar = message_list.verticalScrollBar()
+                if message_list.count() > count:
+                    scroll_bar.setValue(scroll_bar.value() + message_list.count() - count)
+
+    def request_messages(self, before_id=None):
+        """
+        Requests a page of messages from the server, returns None if the session has expired
+        """
         data = {
             "token": self.token,
             "op_id": self.op_id,
             "timestamp": datetime.datetime(1970, 1, 1,
-                                           tzinfo=datetime.timezone.utc).isoformat()
+                                           tzinfo=datetime.timezone.utc).isoformat(),
+            "limit": config_loader(dataset="MSCOLAB_chat_page_size"),
         }
+        if before_id is not None:
+            data["before_id"] = before_id
         # returns an array of messages
         url = urljoin(self.mscolab_server_url, "messages")
 
         res = requests.get(url, data=data, timeout=tuple(config_loader(dataset="MSCOLAB_timeout")))
-        if res.text != "False":
-            res = res.json()
-            messages = res["messages"]
-            # clear message box
-            for message in messages:
-                self.render_new_message(message, scroll=False)
-            self.messageList.scrollToBottom()
-            self.serviceMessageList.scrollToBottom()
-        else:
+        if res.text == "False":
             show_popup(self, "Error", "Session expired, new login required")
+            return None
+        messages = res.json()["messages"]
+        if len(messages) < data["limit"]:
+            self.all_messages_loaded = True
+        if messages:
+            self.oldest_message_id = messages[0]["id"]
+        return messages
 
-    def render_new_message(self, message, scroll=True):
+    @QtCore.pyqtSlot(int)
+    def handle_message_list_scrolled(self, value):
+        if value == 0:
+            self.load_older_messages()
+
+    def render_new_message(self, message, scroll=True, row=None):
         message_item = MessageItem(message, self)
         list_widget_item = QtWidgets.QListWidgetItem()
         list_widget_item.setSizeHint(message_item.sizeHint())
         # Check if the message is a service message or a normal message and add to its corresponding list
         if message['message_type'] == MessageType.SYSTEM_MESSAGE:
-            self.serviceMessageList.addItem(list_widget_item)
-            self.serviceMessageList.setItemWidget(list_widget_item, message_item)
+            message_list = self.serviceMessageList
+        else:
+            message_list = self.messageList
+        if row is None:
+            message_list.addItem(list_widget_item)
         else:
-            self.messageList.addItem(list_widget_item)
-            self.messageList.setItemWidget(list_widget_item, message_item)
+            message_list.insertItem(row, list_widget_item)
+        message_list.setItemWidget(list_widget_item, message_item)
         if scroll:
             self.messageList.scrollToBottom()
             self.serviceMessageList.scrollToBottom()
@@ -69,6 +69,8 @@ class MSColabVersionHistory(QtWidgets.QMainWindow, ui.Ui_MscolabVersionHistory):
         self.operation_name = operation_name
         self.conn = conn
         self.mscolab_server_url = mscolab_server_url
+        self.oldest_change_id = None
+        self.all_changes_loaded = False
 
         # Event handlers
         self.refreshBtn.clicked.connect(self.handle_refresh)
@@ -77,6 +79,7 @@ class MSColabVersionHistory(QtWidgets.QMainWindow, ui.Ui_MscolabVersionHistory):
         self.deleteVersionNameBtn.clicked.connect(self.handle_delete_version_name)
         self.versionFilterCB.currentIndexChanged.connect(lambda: self.load_all_changes())
         self.changes.currentItemChanged.connect(self.preview_change)
+        self.changes.verticalScrollBar().valueChanged.connect(self.handle_change_list_scrolled)
         # Setup UI
         self.deleteVersionNameBtn.setVisible(False)
         self.set_label_text()
@@ -126,8 +129,21 @@ class MSColabVersionHistory(QtWidgets.QMainWindow, ui.Ui_MscolabVersionHistory):
 
     def load_all_changes(self):
         """
-        get changes from api, clear listwidget, render them to ui
+        get the newest changes from api, clear listwidget, render them to ui
         """
+        self.oldest_change_id = None
+        self.all_changes_loaded = False
+        self.load_changes(clear=True)
+
+    def load_older_changes(self):
+        """
+        get the page of changes before the oldest loaded change and append them to the listwidget
+        """
+        if self.all_changes_loaded or self.oldest_change_id is None:
+            return
+        self.load_changes(before_id=self.oldest_change_id)
+
+    def load_changes(self, before_id=None, clear=False):
         if verify_user_token(self.mscolab_server_url, self.token):
             data = {
                 "token": self.token,
@@ -136,13 +152,22 @@ class MSColabVersionHistory(QtWidgets.QMainWindow, ui.Ui_MscolabVersionHistory):
             named_version_only = False
             if self.versionFilterCB.currentIndex() == 0:
                 named_version_only = True
-            query_string = urlencode({"named_version": named_version_only})
+            page_size = config_loader(dataset="MSCOLAB_changes_page_size")
+            query = {"named_version": named_version_only, "limit": page_size}
+            if before_id is not None:
+                query["before_id"] = before_id
+            query_string = urlencode(query)
             url_path = f'get_all_changes?{query_string}'
             url = urljoin(self.mscolab_server_url, url_path)
             r = requests.get(url, data=data, timeout=tuple(config_loader(dataset="MSCOLAB_timeout")))
             if r.text != "False":
                 changes = json.loads(r.text)["changes"]
-                self.changes.clear()
+                if clear:
+                    self.changes.clear()
+                if len(changes) < page_size:
+                    self.all_changes_loaded = True
+                if changes:
+                    self.oldest_change_id = changes[-1]["id"]
                 for change in changes:
                     created_at = datetime.fromisoformat(change["created_at"])
                     local_time = utc_to_local_datetime(created_at)
@@ -162,6 +187,11 @@ class MSColabVersionHistory(QtWidgets.QMainWindow, ui.Ui_MscolabVersionHistory):
             # this triggers disconnect
             self.conn.signal_reload.emit(self.op_id)
 
+    @QtCore.pyqtSlot(int)
+    def handle_change_list_scrolled(self, value):
+        if value == self.changes.verticalScrollBar().maximum():
+            self.load_older_changes()
+
     def preview_change(self, current_item, previous_item):
         if verify_user_token(self.mscolab_server_url, self.token):
             font = QtGui.QFont()
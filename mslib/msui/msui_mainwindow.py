@@ -50,7 +50,7 @@ from mslib.plugins.io.csv import load_from_csv, save_to_csv
 from mslib.msui.icons import icons, python_powered
 from mslib.utils.qt import get_open_filenames, get_save_filename, show_popup
 from mslib.utils.config import read_config_file, config_loader
-from mslib.utils import release_info
+from mslib.utils import ogcwms, release_info
 from PyQt5 import QtGui, QtCore, QtWidgets
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
@@ -992,6 +992,8 @@ class MSUIMainWindow(QtWidgets.QMainWindow, ui.Ui_MSUIMainWindow):
         if self.mscolab.token is not None:
             self.mscolab.logout()
         read_config_file()
+        # the WMS sessions are created again with the new connection settings
+        ogcwms.close_sessions()
         self.add_plugins()
 
     def open_config_editor(self):
@@ -29,16 +29,18 @@ import collections
 from matplotlib.collections import LineCollection
 from matplotlib.colors import BoundaryNorm, ListedColormap
 import numpy as np
-from skyfield.api import Loader, Topos, utc
+from skyfield.api import Loader, iers2010
 import skyfield_data
 
 from PyQt5 import QtGui, QtWidgets
 from mslib.msui.qt5 import ui_remotesensing_dockwidget as ui
-from mslib.utils.time import jsec_to_datetime, datetime_to_jsec
-from mslib.utils.coordinate import get_distance, rotate_point, fix_angle, normalize_longitude
+from mslib.utils.time import datetime_to_jsec
+from mslib.utils.coordinate import rotate_point, fix_angle, normalize_longitude, geodesic_path
 
 
 EARTH_RADIUS = 6371.
+# spacing in km of the points along the flight path the tangent points are computed for
+TANGENT_POINT_DEL_S = 10.
 
 
 class RemoteSensingControlWidget(QtWidgets.QWidget, ui.Ui_RemoteSensingDockWidget):
@@ -99,17 +101,26 @@ class RemoteSensingControlWidget(QtWidgets.QWidget, ui.Ui_RemoteSensingDockWidge
 
     @staticmethod
     def compute_view_angles(lon0, lat0, h0, lon1, lat1, h1, obs_azi, obs_ele):
+        """
+        Computes the viewing direction of segments of the flight path (scalars or numpy arrays)
+        """
         mlat = ((lat0 + lat1) / 2.)
-        lon0 *= np.cos(np.deg2rad(mlat))
-        lon1 *= np.cos(np.deg2rad(mlat))
+        lon0 = lon0 * np.cos(np.deg2rad(mlat))
+        lon1 = lon1 * np.cos(np.deg2rad(mlat))
         dlon = lon1 - lon0
         dlat = lat1 - lat0
         obs_azi_p = fix_angle(obs_azi + np.rad2deg(np.arctan2(dlon, dlat)))
         return obs_azi_p, obs_ele
 
     def compute_body_angle(self, body, jsec, lon, lat):
-        t = self.timescale.utc(jsec_to_datetime(jsec).replace(tzinfo=utc))
-        loc = self.planets["earth"] + Topos(lat, lon)
+        """
+        Computes azimuth and elevation of body seen from the given locations at the
+        given times (scalars or numpy arrays)
+        """
+        # days and seconds since 2000-01-01, as jsec does not count leap seconds
+        days, seconds = np.divmod(np.asarray(jsec, dtype=float), 86400)
+        t = self.timescale.utc(2000, 1, 1 + days.astype(int), 0, 0, seconds)
+        loc = self.planets["earth"] + iers2010.latlon(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
         astrometric = loc.at(t).observe(self.planets[body])
         alt, az, d = astrometric.apparent().altaz()
         return az.degrees, alt.degrees
@@ -155,29 +166,29 @@ class RemoteSensingControlWidget(QtWidgets.QWidget, ui.Ui_RemoteSensingDockWidge
         """
         x, y = list(zip(*wp_vertices))
         wp_lons, wp_lats = bmap(x, y, inverse=True)
+        wp_lons, wp_lats = np.asarray(wp_lons, dtype=float), np.asarray(wp_lats, dtype=float)
         if bmap.projection == "cyl":  # hack for wraparound
             wp_lons = normalize_longitude(wp_lons, -180, 180)
-        fine_lines = [bmap.gcpoints2(
-                      wp_lons[i], wp_lats[i], wp_lons[i + 1], wp_lats[i + 1], del_s=10., map_coords=False)
-                      for i in range(len(wp_lons) - 1)]
-        line_heights = [np.linspace(wp_heights[i], wp_heights[i + 1], num=len(fine_lines[i][0]))
-                        for i in range(len(fine_lines))]
-        # fine_lines = list of tuples with x-list and y-list for each segment
+        # the same points as bmap.gcpoints2(..., del_s=TANGENT_POINT_DEL_S) for each segment, but computed at once
+        npoints = bmap.gcpoints_npoints(wp_lons, wp_lats, del_s=TANGENT_POINT_DEL_S)
+        fine_lons, fine_lats = geodesic_path(wp_lons, wp_lats, npoints, geod=bmap.gc)
+        starts = np.concatenate([[0], np.cumsum(npoints + 1)[:-1]])
+        # fine_lines = list of tuples with x-array and y-array for each segment
+        fine_lines = [(fine_lons[_start:_start + _num + 2].copy(), fine_lats[_start:_start + _num + 2])
+                      for _start, _num in zip(starts, npoints)]
         tp_lines = [self.tangent_point_coordinates(
-            _fine_line[0], _fine_line[1], _line_height,
+            _fine_line[0], _fine_line[1], np.linspace(wp_heights[i], wp_heights[i + 1], num=len(_fine_line[0])),
             cut_height=self.dsbTangentHeight.value())
-            for _fine_line, _line_height in zip(fine_lines, line_heights)]
-        dir_lines = self.direction_coordinates(fine_lines)
+            for i, _fine_line in enumerate(fine_lines)]
+        dir_lines = list(self.direction_coordinates(fine_lines))
         lines = tp_lines + dir_lines
-        for i, line in enumerate(lines):
-            line = np.asarray(line)
-            if bmap.projection == "cyl":  # hack for wraparound
-                line[:, 0], line[:, 1] = bmap(
-                    normalize_longitude(line[:, 0], bmap.llcrnrlon, bmap.urcrnrlon),
-                    line[:, 1])
-            else:
-                line[:, 0], line[:, 1] = bmap(line[:, 0], line[:, 1])
-            lines[i] = line
+
+        # project all lines at once
+        points = np.concatenate(lines)
+        if bmap.projection == "cyl":  # hack for wraparound
+            points[:, 0] = normalize_longitude(points[:, 0], bmap.llcrnrlon, bmap.urcrnrlon)
+        points[:, 0], points[:, 1] = bmap(points[:, 0], points[:, 1])
+        lines = np.split(points, np.cumsum([len(line) for line in lines])[:-1])
         return LineCollection(
             lines,
             colors=QtGui.QPalette(self.btTangentsColour.palette()).color(QtGui.QPalette.Button).getRgbF(),
@@ -213,50 +224,25 @@ class RemoteSensingControlWidget(QtWidgets.QWidget, ui.Ui_RemoteSensingDockWidge
         line_times = [np.linspace(times[i], times[i + 1], num=len(fine_lines[i][0])) for i in
                       range(len(fine_lines))]
         # fine_lines = list of tuples with x-list and y-list for each segment
-        # lines = list of tuples with lon-list and lat-list for each segment
-        heights = []
-        times = []
-        for i in range(len(fine_lines) - 1):
-            heights.extend(line_heights[i][:-1])
-            times.extend(line_times[i][:-1])
-        heights.extend(line_heights[-1])
-        times.extend(line_times[-1])
-        solar_x = []
-        solar_y = []
-        for i in range(len(fine_lines) - 1):
-            solar_x.extend(fine_lines[i][0][:-1])
-            solar_y.extend(fine_lines[i][1][:-1])
-        solar_x.extend(fine_lines[-1][0])
-        solar_y.extend(fine_lines[-1][1])
+        # concatenate the segments, dropping the duplicated points where they join
+        heights = np.concatenate([_heights[:-1] for _heights in line_heights[:-1]] + [line_heights[-1]])
+        times = np.concatenate([_times[:-1] for _times in line_times[:-1]] + [line_times[-1]])
+        solar_x = np.concatenate([np.asarray(_line[0][:-1]) for _line in fine_lines[:-1]] + [fine_lines[-1][0]])
+        solar_y = np.concatenate([np.asarray(_line[1][:-1]) for _line in fine_lines[:-1]] + [fine_lines[-1][1]])
         if bmap.projection == "cyl":  # hack for wraparound
             solar_x = normalize_longitude(solar_x, bmap.llcrnrlon, bmap.urcrnrlon)
-        points = []
-        old_wp = None
-        total_distance = 0
-        for i, (lon, lat) in enumerate(zip(solar_x, solar_y)):
-            points.append([[lon, lat]])  # append double-list for later concatenation
-            if old_wp is not None:
-                wp_dist = get_distance(old_wp[0], old_wp[1], lat, lon) * 1000.
-                total_distance += wp_dist
-            old_wp = (lat, lon)
-        vals = []
-        for i in range(len(points) - 1):
-            p0, p1 = points[i][0], points[i + 1][0]
-
-            sol_azi, sol_ele = self.compute_body_angle(body, times[i], p0[0], p0[1])
-            obs_azi, obs_ele = self.compute_view_angles(
-                p0[0], p0[1], heights[i], p1[0], p1[1], heights[i + 1],
-                self.dsbObsAngleAzimuth.value(), self.dsbObsAngleElevation.value())
-            if sol_azi < 0:
-                sol_azi += 360
-            if obs_azi < 0:
-                obs_azi += 360
-            rating = self.calc_view_rating(obs_azi, obs_ele, sol_azi, sol_ele, heights[i], difftype)
-            vals.append(rating)
+
+        # rate all segments at once by the directions at their start
+        sol_azi, sol_ele = self.compute_body_angle(body, times[:-1], solar_x[:-1], solar_y[:-1])
+        obs_azi, obs_ele = self.compute_view_angles(
+            solar_x[:-1], solar_y[:-1], heights[:-1], solar_x[1:], solar_y[1:], heights[1:],
+            self.dsbObsAngleAzimuth.value(), self.dsbObsAngleElevation.value())
+        sol_azi = np.where(sol_azi < 0, sol_azi + 360, sol_azi)
+        obs_azi = np.where(obs_azi < 0, obs_azi + 360, obs_azi)
+        vals = self.calc_view_rating(obs_azi, obs_ele, sol_azi, sol_ele, heights[:-1], difftype)
 
         # convert lon, lat to map points
-        for i in range(len(points)):
-            points[i][0][0], points[i][0][1] = bmap(points[i][0][0], points[i][0][1])
+        points = np.column_stack(bmap(solar_x, solar_y))[:, np.newaxis, :]
         points = np.concatenate([points[:-1], points[1:]], axis=1)
         # plot
         solar_lines = LineCollection(points, cmap=self.solar_cmap, norm=self.solar_norm,
@@ -274,70 +260,56 @@ class RemoteSensingControlWidget(QtWidgets.QWidget, ui.Ui_RemoteSensingDockWidge
             flight_alt: altitude of aircraft (scalar or numpy array)
             cut_height: altitude of tangent points
 
-        Returns: List of tuples of longitude/latitude coordinates
+        Returns: Array of longitude/latitude coordinates, one row for each segment of the flight path
 
         """
         med_lon = np.median(lon_lin)
         lon_lin = normalize_longitude(lon_lin, med_lon - 180, med_lon + 180)
-        lins = list(zip(lon_lin[0:-1], lon_lin[1:], lat_lin[0:-1], lat_lin[1:]))
-        lins = [(x0 * np.cos(np.deg2rad(np.mean([y0, y1]))), x1 * np.cos(np.deg2rad(np.mean([y0, y1]))), y0, y1)
-                for x0, x1, y0, y1 in lins]
-
-        direction = [(x1 - x0, y1 - y0) for x0, x1, y0, y1 in lins]
-        direction = [(_x / np.hypot(_x, _y), _y / np.hypot(_x, _y))
-                     for _x, _y in direction]
-        los = [rotate_point(point, -self.dsbObsAngleAzimuth.value()) for point in direction]
-        los.append(los[-1])
+        # surplus coordinates of either list are ignored
+        size = min(len(lon_lin), len(lat_lin))
+        lon_lin, lat_lin = lon_lin[:size], np.asarray(lat_lin[:size], dtype=float)
+        y0, y1 = lat_lin[:-1], lat_lin[1:]
+        cos_lat = np.cos(np.deg2rad((y0 + y1) / 2))
+        x0 = lon_lin[:-1] * cos_lat
+        dir_x, dir_y = lon_lin[1:] * cos_lat - x0, y1 - y0
+        norm = np.hypot(dir_x, dir_y)
+        los_x, los_y = rotate_point((dir_x / norm, dir_y / norm), -self.dsbObsAngleAzimuth.value())
 
         if isinstance(flight_alt, (collections.abc.Sequence, np.ndarray)):
-            dist = [(np.sqrt(max((EARTH_RADIUS + a) ** 2 - (EARTH_RADIUS + cut_height) ** 2, 0)) / 110.)
-                    for a in flight_alt[:-1]]
-            dist.append(dist[-1])
+            flight_alt = np.asarray(flight_alt, dtype=float)[:-1]
+            dist = np.sqrt(np.maximum((EARTH_RADIUS + flight_alt) ** 2 - (EARTH_RADIUS + cut_height) ** 2, 0)) / 110.
         else:
-            dist = (np.sqrt((EARTH_RADIUS + flight_alt) ** 2 - (EARTH_RADIUS + cut_height) ** 2) / 110.)
-
-        tp_dir = (np.array(los).T * dist).T
+            dist = np.sqrt((EARTH_RADIUS + flight_alt) ** 2 - (EARTH_RADIUS + cut_height) ** 2) / 110.
 
-        tps = [(x0 + tp_x, y0 + tp_y, y0) for
-               ((x0, x1, y0, y1), (tp_x, tp_y)) in zip(lins, tp_dir)]
-        tps = [(x0 / np.cos(np.deg2rad(yp)), y0) for (x0, y0, yp) in tps]
-        return tps
+        return np.column_stack([(x0 + los_x * dist) / np.cos(np.deg2rad(y0)), y0 + los_y * dist])
 
     def direction_coordinates(self, gc_lines):
         """
-        Computes coordinates of tangent points given coordinates of flight path.
+        Computes the viewing direction of the instrument in the middle of the segments of the flight path.
 
         Args:
-            lon_lin: longitudes of flight path
-            lat_lin: latitudes of flight path
-            flight_alt: altitude of aircraft (scalar or numpy array)
-            cut_height: altitude of tangent points
+            gc_lines: list of tuples of longitudes and latitudes of the segments of the flight path
 
-        Returns: List of tuples of longitude/latitude coordinates
+        Returns: Array of pairs of longitude/latitude coordinates of the direction lines
 
         """
-        lins = [(_line[0][mid], _line[0][mid + 1], _line[1][mid], _line[1][mid + 1])
-                for _line, mid in zip(gc_lines, [len(_line[0]) // 2 for _line in gc_lines])
-                if len(_line[0]) > 2]
-        lens = [np.hypot(_line[0][0] - _line[0][-1], _line[0][0] - _line[0][-1]) * 110.
-                for _line in gc_lines
-                if len(_line[0]) > 2]
-        lins = [(x0 * np.cos(np.deg2rad(np.mean([y0, y1]))), x1 * np.cos(np.deg2rad(np.mean([y0, y1]))), y0, y1)
-                for x0, x1, y0, y1 in lins]
-        lins = [_x for _x, _l in zip(lins, lens) if _l > 10]
-
-        direction = [(0.5 * (x0 + x1), 0.5 * (y0 + y1), x1 - x0, y1 - y0) for x0, x1, y0, y1 in lins]
-        direction = [(_u, _v, _x / np.hypot(_x, _y), _y / np.hypot(_x, _y))
-                     for _u, _v, _x, _y in direction]
-        los = [rotate_point(point[2:], -self.dsbObsAngleAzimuth.value()) for point in direction]
-
-        dist = 1.
-        tp_dir = (np.array(los).T * dist).T
-
-        tps = [(x0, y0, x0 + tp_x, y0 + tp_y) for
-               ((x0, y0, _, _), (tp_x, tp_y)) in zip(direction, tp_dir)]
-        tps = [[(x0 / np.cos(np.deg2rad(y0)), y0), (x1 / np.cos(np.deg2rad(y0)), y1)] for (x0, y0, x1, y1) in tps]
-        return tps
+        # start and end point of each line and the two points in its middle
+        points = np.array([(_line[0][0], _line[0][-1], _line[0][len(_line[0]) // 2], _line[0][len(_line[0]) // 2 + 1],
+                            _line[1][len(_line[0]) // 2], _line[1][len(_line[0]) // 2 + 1])
+                           for _line in gc_lines if len(_line[0]) > 2], dtype=float).reshape(-1, 6)
+        lens = np.hypot(points[:, 0] - points[:, 1], points[:, 0] - points[:, 1]) * 110.
+        x0, x1, y0, y1 = points[lens > 10, 2:].T
+        cos_lat = np.cos(np.deg2rad((y0 + y1) / 2))
+        x0, x1 = x0 * cos_lat, x1 * cos_lat
+
+        mid_x, mid_y = 0.5 * (x0 + x1), 0.5 * (y0 + y1)
+        dir_x, dir_y = x1 - x0, y1 - y0
+        norm = np.hypot(dir_x, dir_y)
+        los_x, los_y = rotate_point((dir_x / norm, dir_y / norm), -self.dsbObsAngleAzimuth.value())
+
+        cos_mid = np.cos(np.deg2rad(mid_y))
+        return np.stack([np.column_stack([mid_x / cos_mid, mid_y]),
+                         np.column_stack([(mid_x + los_x) / cos_mid, mid_y + los_y])], axis=1)
 
     @staticmethod
     def calc_view_rating(obs_azi, obs_ele, sol_azi, sol_ele, height, difftype):
@@ -353,13 +325,13 @@ class RemoteSensingControlWidget(QtWidgets.QWidget, ui.Ui_RemoteSensingDockWidge
             height: altitude of observer
 
         Returns: angular distance or 180 degrees if sun is below horizon
+        (scalars or numpy arrays)
         """
         delta_azi = obs_azi - sol_azi
         delta_ele = obs_ele - sol_ele
         if "horizon" in difftype:
             thresh = -np.rad2deg(np.arccos(EARTH_RADIUS / (height + EARTH_RADIUS))) - 3
-            if sol_ele < thresh:
-                delta_ele = 180
+            delta_ele = np.where(sol_ele < thresh, 180, delta_ele)
 
         if "azimuth" == difftype:
             return np.abs(obs_azi - sol_azi)
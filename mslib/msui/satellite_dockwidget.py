@@ -29,10 +29,10 @@
 import logging
 import os
 import fs
-from datetime import datetime, timedelta
+from datetime import datetime
 import numpy as np
 
-from mslib.utils.qt import get_open_filename
+from mslib.utils.qt import get_open_filename, Worker
 from mslib.msui.qt5 import ui_satellite_dockwidget as ui
 from PyQt5 import QtWidgets
 from mslib.utils.config import save_settings_qsettings, load_settings_qsettings
@@ -62,54 +62,48 @@ def read_nasa_satellite_prediction(fname):
     # Read the file into a list of strings.
     _dirname, _name = os.path.split(fname)
     _fs = open_fs(_dirname)
-    satfile = _fs.open(_name, 'r')
-    satlines = satfile.readlines()
-    satfile.close()
+    with _fs.open(_name, 'r') as satfile:
+        satlines = satfile.read().splitlines()
 
     # Determine the date from the first line.
     date = datetime.strptime(satlines[0].split()[0], "%Y/%m/%d")
-    basedate = datetime.strptime("", "")
-
-    # "result" will store the individual overpass segments.
-    result = []
-    segment = {"utc": [], "satpos": [], "heading": [],
-               "swath_left": [], "swath_right": []}
-
-    # Define a time difference that specifies when to start a new segment.
-    # If the time between to subsequent points in the file is larger than
-    # this time, a new segment will be started.
-    seg_diff_time = timedelta(minutes=10)
-
-    # Loop over data lines. Either append point to current segment or start
-    # new segment. Before storing segments to the "result" list, convert
-    # to masked arrays.
-    for line in satlines[2:]:
-        values = line.split()
-        time = date + (datetime.strptime(values[0], "%H:%M:%S") - basedate)
-
-        if len(segment["utc"]) == 0 or (time - segment["utc"][-1]) < seg_diff_time:
-            segment["utc"].append(time)
-            segment["satpos"].append([-1. * float(values[2]), float(values[1])])
-            segment["heading"].append(float(values[3]))
-            if len(values) == 8:
-                segment["swath_left"].append([-1. * float(values[5]), float(values[4])])
-                segment["swath_right"].append([-1. * float(values[7]), float(values[6])])
-            else:
-                # TODO 20100504: workaround for instruments without swath
-                segment["swath_left"].append([-1. * float(values[2]), float(values[1])])
-                segment["swath_right"].append([-1. * float(values[2]), float(values[1])])
-
-        else:
-            segment["utc"] = np.array(segment["utc"])
-            segment["satpos"] = np.ma.masked_equal(segment["satpos"], -999.)
-            segment["heading"] = np.ma.masked_equal(segment["heading"], -999.)
-            segment["swath_left"] = np.ma.masked_equal(segment["swath_left"], -999.)
-            segment["swath_right"] = np.ma.masked_equal(segment["swath_right"], -999.)
-            result.append(segment)
-            segment = {"utc": [], "satpos": [], "heading": [],
-                       "swath_left": [], "swath_right": []}
-
-    return result
+    satlines = [line for line in satlines[2:] if line.strip()]
+    if len(satlines) == 0:
+        return []
+
+    # Read the columns of all data lines at once, the times as separate hours, minutes and seconds.
+    # The number of values is given by the first data line.
+    with_swath = len(satlines[0].split()) == 8
+    values = np.loadtxt([line.replace(":", " ") for line in satlines],
+                        usecols=range(10 if with_swath else 6), ndmin=2)
+    utc = np.datetime64(date, "s") + (values[:, :3] @ [3600, 60, 1]).astype("timedelta64[s]")
+    values = values[:, 3:]
+    satpos = np.column_stack([-1. * values[:, 1], values[:, 0]])
+    if with_swath:
+        swath_left = np.column_stack([-1. * values[:, 4], values[:, 3]])
+        swath_right = np.column_stack([-1. * values[:, 6], values[:, 5]])
+    else:
+        # TODO 20100504: workaround for instruments without swath
+        swath_left = swath_right = satpos
+
+    # A time difference larger than seg_diff_time between two subsequent points
+    # in the file ends a segment. The first point after such a gap is skipped
+    # and the next one starts a new segment, even if it follows another gap.
+    # Only segments closed by a gap are returned.
+    seg_diff_time = np.timedelta64(10, "m")
+    gap = np.concatenate([[False], np.diff(utc) >= seg_diff_time])
+    index = np.arange(len(gap))
+    first_gap = np.maximum.accumulate(np.where(gap & ~np.concatenate([[False], gap[:-1]]), index, 0))
+    ends = np.nonzero(gap & ((index - first_gap) % 2 == 0))[0]
+    starts = np.concatenate([[0], ends[:-1] + 1])
+
+    utc = utc.astype(datetime)
+    return [{"utc": utc[start:end],
+             "satpos": np.ma.masked_equal(satpos[start:end], -999.),
+             "heading": np.ma.masked_equal(values[start:end, 2], -999.),
+             "swath_left": np.ma.masked_equal(swath_left[start:end], -999.),
+             "swath_right": np.ma.masked_equal(swath_right[start:end], -999.)}
+            for start, end in zip(starts, ends)]
 
 
 class SatelliteControlWidget(QtWidgets.QWidget, ui.Ui_SatelliteDockWidget):
@@ -146,29 +140,38 @@ class SatelliteControlWidget(QtWidgets.QWidget, ui.Ui_SatelliteDockWidget):
 
     def load_file(self):
         """
-        Load the file specified in leFile and fill the combobox with the
-        available track segments.
+        Load the file specified in leFile in the background and fill the
+        combobox with the available track segments.
         """
         filename = self.leFile.text()
         logging.debug("loading satellite overpasses in file '%s'", filename)
 
-        try:
-            overpass_segments = read_nasa_satellite_prediction(filename)
-        except (IOError, OSError, ValueError, fs.errors.FileExpected) as ex:
+        def on_failure(ex):
+            self.btLoadFile.setEnabled(True)
+            if not isinstance(ex, (IOError, OSError, ValueError, fs.errors.FileExpected)):
+                raise ex
             logging.error("Problem accessing '%s' file", filename)
             QtWidgets.QMessageBox.critical(self, self.tr("Satellite Overpass Tool"),
                                            self.tr(f"ERROR:\n{type(ex)}\n{ex}"))
-        else:
-            logging.debug("read %i segments", len(overpass_segments))
 
-            self.cbSatelliteOverpasses.clear()
-            items = [f"{seg['utc'][0]} to {seg['utc'][-1]}"
-                     for seg in overpass_segments]
-            items.insert(0, "None (select item to plot)")
-            items.insert(1, "All tracks")
-            self.cbSatelliteOverpasses.addItems(items)
+        self.btLoadFile.setEnabled(False)
+        Worker.create(lambda: read_nasa_satellite_prediction(filename), self.show_overpasses, on_failure)
 
-            self.overpass_segments = overpass_segments
+    def show_overpasses(self, overpass_segments):
+        """
+        Fill the combobox with the loaded track segments.
+        """
+        self.btLoadFile.setEnabled(True)
+        logging.debug("read %i segments", len(overpass_segments))
+
+        self.cbSatelliteOverpasses.clear()
+        items = [f"{seg['utc'][0]} to {seg['utc'][-1]}"
+                 for seg in overpass_segments]
+        items.insert(0, "None (select item to plot)")
+        items.insert(1, "All tracks")
+        self.cbSatelliteOverpasses.addItems(items)
+
+        self.overpass_segments = overpass_segments
 
     def plot_overpass_track(self, index):
         """
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+
+    mslib.msui.wms_cache
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Index of the WMS image cache of the msui.
+
+    The maps, legends and xml documents retrieved from WMS servers are stored as
+    files named by the md5 sum of their URL. A SQLite database next to the files
+    records the size, the creation and the last access time of every file, so that
+    lookups do not need to scan the directory and the least recently used files
+    can be removed once the cache grows too large.
+
+    This file is part of MSS.
+
+    :copyright: Copyright 2024 by the MSS team, see AUTHORS.
+    :license: APACHE-2.0, see LICENSE for details.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+import contextlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+INDEX_FILENAME = "index.sqlite"
+
+# (mss) caches shared by all threads, by directory
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_image_cache(directory):
+    """
+    Returns the WMSImageCache of directory used by all threads of this process
+    """
+    directory = os.path.abspath(directory)
+    with _caches_lock:
+        # the directory may have been removed in the meantime
+        if directory not in _caches or not os.path.exists(_caches[directory].index_filename):
+            _caches[directory] = WMSImageCache(directory)
+        return _caches[directory]
+
+
+class WMSImageCache:
+    """
+    Files in a cache directory indexed by their name
+
+    All methods take the full path of a file in the directory and may be called
+    from several threads. Several processes may share a cache directory.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self.index_filename = os.path.join(self.directory, INDEX_FILENAME)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.index_filename, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (name TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            if self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 0:
+                self._add_existing_files()
+
+    def _name(self, filename):
+        return os.path.relpath(os.path.abspath(filename), self.directory)
+
+    def _add_existing_files(self):
+        """
+        Indexes the files of a cache filled before the index existed, using their modification times
+        """
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.is_file() and not entry.name.startswith(INDEX_FILENAME) and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((entry.name, stat.st_size, stat.st_mtime, stat.st_mtime))
+        if len(entries) > 0:
+            logging.debug("indexing %i files of the WMS image cache", len(entries))
+            self._connection.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", entries)
+
+    def lookup(self, filename):
+        """
+        Returns whether filename is in the cache and marks it as recently used
+        """
+        name = self._name(filename)
+        with self._lock, self._connection:
+            cursor = self._connection.execute("UPDATE entries SET accessed = ? WHERE name = ?", (time.time(), name))
+            if cursor.rowcount == 0:
+                return False
+            if not os.path.isfile(filename):
+                # removed by someone else
+                self._connection.execute("DELETE FROM entries WHERE name = ?", (name,))
+                return False
+        return True
+
+    @contextlib.contextmanager
+    def write(self, filename):
+        """
+        Context manager yielding a temporary filename to write the content of filename to.
+
+        The file replaces filename and is added to the cache only if the block completes,
+        so that other threads and processes never see partially written files.
+        """
+        handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(handle)
+        try:
+            yield temporary
+            size = os.path.getsize(temporary)
+            os.replace(temporary, filename)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temporary)
+            raise
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (self._name(filename), size, now, now))
+
+    def service(self, max_size_bytes, max_age_seconds):
+        """
+        Removes all files older than max_age_seconds and the least recently used files beyond
+        max_size_bytes. Returns the number of removed files.
+        """
+        with self._lock, self._connection:
+            names = [name for name, in self._connection.execute(
+                "SELECT name FROM (SELECT name, created, SUM(size) OVER "
+                "(ORDER BY accessed DESC, name ROWS UNBOUNDED PRECEDING) AS cum_size FROM entries) "
+                "WHERE cum_size > ? OR created < ?", (max_size_bytes, time.time() - max_age_seconds))]
+            return self._remove(names)
+
+    def clear(self):
+        """
+        Removes all files of the cache, including those left over by interrupted writes.
+        Returns the number of removed files.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM entries")
+            return self._remove([name for name in os.listdir(self.directory)
+                                 if not name.startswith(INDEX_FILENAME) and
+                                 os.path.isfile(os.path.join(self.directory, name))])
+
+    def _remove(self, names):
+        removed = []
+        try:
+            for name in names:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.directory, name))
+                removed.append((name,))
+        finally:
+            # only forget about the files actually removed
+            self._connection.executemany("DELETE FROM entries WHERE name = ?", removed)
+        return len(removed)
@@ -26,7 +26,7 @@
     limitations under the License.
 """
 
-import time
+import concurrent.futures
 from datetime import datetime
 
 import io
@@ -35,6 +35,7 @@ import logging
 import mpl_toolkits.basemap as basemap
 import os
 import requests
+import sqlite3
 import traceback
 import urllib.parse
 import defusedxml.ElementTree as etree
@@ -47,6 +48,7 @@ from PIL import Image, ImageOps
 from keyring.errors import NoKeyringError, PasswordSetError, InitError
 
 from mslib.msui import constants, wms_capabilities
+from mslib.msui.wms_cache import get_image_cache
 from mslib.msui.qt5 import ui_wms_dockwidget as ui
 from mslib.msui.qt5 import ui_wms_password_dialog as ui_pw
 from mslib.utils.qt import Worker
@@ -255,10 +257,14 @@ class WMSMapFetcher(QtCore.QObject):
 
     This class uses code that is very similar to the actual code in the getMap call. Might be refactored
     in some way...
+
+    The maps and legends of a list are retrieved concurrently by a bounded pool of threads. A new
+    list cancels the retrievals of the previous one that have not yet started and discards the results
+    of those that have.
     """
 
-    # start fetching next URL in queue
-    process = QtCore.pyqtSignal()
+    # a retrieval of the list with the given number has completed
+    process = QtCore.pyqtSignal(int)
     # present a final image including legend
     finished = QtCore.pyqtSignal([object, object, object, object, object, object, object])
     # triggered in case of caught exception
@@ -269,51 +275,73 @@ class WMSMapFetcher(QtCore.QObject):
     def __init__(self, wms_cache, parent=None):
         super().__init__(parent)
         self.wms_cache = wms_cache
+        # the number of the current list of maps and its (kwargs, md5_filename, map future, legend future)
+        self.list_number = 0
         self.maps = []
-        self.map_imgs = []
-        self.legend_imgs = []
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config_loader(dataset="WMS_concurrent_requests"), thread_name_prefix="WMSMapFetcher")
         self.process.connect(self.process_map, QtCore.Qt.QueuedConnection)
         self.long_request = False
 
+    @property
+    def image_cache(self):
+        return get_image_cache(self.wms_cache)
+
     @QtCore.pyqtSlot(list)
     def fetch_maps(self, map_list):
         """
         Initializes the list of maps to be fetched. Overwrites any remaining ones.
-        Starts processing loop
+        Starts the retrieval of all maps and legends
         """
-        self.maps = map_list
-        self.process.emit()
-
-    @QtCore.pyqtSlot()
-    def process_map(self):
+        for _, _, map_future, legend_future in self.maps:
+            map_future.cancel()
+            legend_future.cancel()
+        self.list_number += 1
+        self.maps = []
+        self.long_request = False
+        # layers of one server often share a legend, which is only retrieved once
+        legend_futures = {}
+        for layer, kwargs, md5_filename, use_cache, legend_kwargs in map_list:
+            map_future = self.executor.submit(self.fetch_map, layer, kwargs, use_cache, md5_filename)
+            urlstr = legend_kwargs.get("urlstr")
+            if urlstr not in legend_futures:
+                legend_futures[urlstr] = self.executor.submit(self.fetch_legend, use_cache=use_cache, **legend_kwargs)
+            self.maps.append((kwargs, md5_filename, map_future, legend_futures[urlstr]))
+        for future in [map_future for _, _, map_future, _ in self.maps] + list(legend_futures.values()):
+            future.add_done_callback(lambda _, list_number=self.list_number: self.process.emit(list_number))
+
+    @QtCore.pyqtSlot(int)
+    def process_map(self, list_number):
         """
-        Processing. Self emits into event queue until list is empty. In this way,
-        fetch_map events may interrupt.
+        Processing. Presents the maps of the current list in its order once all of them have been
+        retrieved. Retrievals of previous lists are ignored.
         """
-        if len(self.maps) == 0:
+        if list_number != self.list_number or len(self.maps) == 0 or not all(
+                map_future.done() and legend_future.done() for _, _, map_future, legend_future in self.maps):
             return
-        layer, kwargs, md5_filename, use_cache, legend_kwargs = self.maps[0]
-        self.maps = self.maps[1:]
-        self.long_request = False
-        try:
-            self.map_imgs.append(self.fetch_map(layer, kwargs, use_cache, md5_filename))
-            self.legend_imgs.append(self.fetch_legend(use_cache=use_cache, **legend_kwargs))
-        except Exception as ex:
-            logging.error("MapPrefetcher Exception %s - %s.", type(ex), ex)
-            # emit finished so progress dialog will be closed
-            self.finished.emit(None, None, None, None, None, None, md5_filename)
-            self.exception.emit(ex)
-            self.map_imgs = []
-            self.legend_imgs = []
-        else:
-            if len(self.maps) > 0:
-                self.process.emit()
-            else:
-                self.finished.emit(
-                    self.map_imgs, self.legend_imgs, kwargs["layers"][0], kwargs["styles"][0], kwargs["init_time"],
-                    kwargs["time"], md5_filename)
-                self.map_imgs = []
-                self.legend_imgs = []
+        maps, self.maps = self.maps, []
+        map_imgs, legend_imgs = [], []
+        for kwargs, md5_filename, map_future, legend_future in maps:
+            try:
+                map_imgs.append(map_future.result())
+                legend_imgs.append(legend_future.result())
+            except Exception as ex:
+                logging.error("MapPrefetcher Exception %s - %s.", type(ex), ex)
+                # emit finished so progress dialog will be closed
+                self.finished.emit(None, None, None, None, None, None, md5_filename)
+                self.exception.emit(ex)
+                return
+        self.finished.emit(
+            map_imgs, legend_imgs, kwargs["layers"][0], kwargs["styles"][0], kwargs["init_time"],
+            kwargs["time"], md5_filename)
+
+    def shutdown(self):
+        """
+        Cancels all waiting retrievals and lets the threads finish once the running ones are done
+        """
+        self.list_number += 1
+        self.maps = []
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
     def fetch_map(self, layer, kwargs, use_cache, md5_filename):
         """
@@ -321,7 +349,7 @@ class WMSMapFetcher(QtCore.QObject):
         """
         logging.debug("MapPrefetcher %s %s.", kwargs["time"], kwargs["level"])
 
-        if use_cache and os.path.exists(md5_filename):
+        if use_cache and self.image_cache.lookup(md5_filename):
             if ".png" in md5_filename:
                 img = Image.open(md5_filename)
                 img.load()
@@ -335,7 +363,7 @@ class WMSMapFetcher(QtCore.QObject):
             urlobject = layer.get_wms().getmap(**kwargs)
 
             if "xml" in urlobject.info()["content-type"].lower():
-                with open(md5_filename, "w") as cache:
+                with self.image_cache.write(md5_filename) as temporary, open(temporary, "w") as cache:
                     cache.write(str(urlobject.read(), encoding="utf8"))
                 return etree.fromstring(urlobject.read())
 
@@ -343,10 +371,11 @@ class WMSMapFetcher(QtCore.QObject):
             img = Image.open(image_io)
             # Check if the image is stored as indexed palette
             # with a transparent colour. Store correspondingly.
-            if img.mode == "P" and "transparency" in img.info:
-                img.save(md5_filename, transparency=img.info["transparency"])
-            else:
-                img.save(md5_filename)
+            with self.image_cache.write(md5_filename) as temporary:
+                if img.mode == "P" and "transparency" in img.info:
+                    img.save(temporary, format="PNG", transparency=img.info["transparency"])
+                else:
+                    img.save(temporary, format="PNG")
             logging.debug("MapPrefetcher %s - saved filed: %s.", self, md5_filename)
         return img.convert("RGBA")
 
@@ -357,7 +386,7 @@ class WMSMapFetcher(QtCore.QObject):
         if urlstr is None:
             return None
 
-        if use_cache and os.path.exists(md5_filename):
+        if use_cache and self.image_cache.lookup(md5_filename):
             legend_img = Image.open(md5_filename)
             legend_img.load()
             logging.debug("MapPrefetcher - found legend cache")
@@ -369,7 +398,7 @@ class WMSMapFetcher(QtCore.QObject):
             # Image.open(). See
             #    http://www.pythonware.com/library/pil/handbook/image.htm
             logging.debug("Retrieving legend from '%s'", urlstr)
-            urlobject = requests.get(urlstr, timeout=(2, 10))
+            urlobject = ogcwms.get_session(urlstr).get(urlstr, timeout=(2, 10))
             image_io = io.BytesIO(urlobject.content)
             try:
                 legend_img_raw = Image.open(image_io)
@@ -383,10 +412,12 @@ class WMSMapFetcher(QtCore.QObject):
             legend_img = legend_img_raw.crop(legend_img_raw.getbbox())
             # Store the retrieved image in the cache, if enabled.
             try:
-                legend_img.save(md5_filename, transparency=0)
+                with self.image_cache.write(md5_filename) as temporary:
+                    legend_img.save(temporary, format="PNG", transparency=0)
             except Exception as ex:
                 logging.debug("Wildecard Exception %s - %s.", type(ex), ex)
-                legend_img.save(md5_filename)
+                with self.image_cache.write(md5_filename) as temporary:
+                    legend_img.save(temporary, format="PNG")
         return legend_img.convert("RGBA")
 
 
@@ -543,6 +574,9 @@ class WMSControlWidget(QtWidgets.QWidget, ui.Ui_WMSDockWidget):
         if self.wms_cache is not None:
             self.service_cache()
         # properly terminate background threads. wait is necessary!
+        for fetcher in (self.prefetcher, self.fetcher):
+            if fetcher is not None:
+                fetcher.shutdown()
         self.thread_prefetch.quit()
         self.thread_prefetch.wait()
         self.thread_fetch.quit()
@@ -738,6 +772,7 @@ class WMSControlWidget(QtWidgets.QWidget, ui.Ui_WMSDockWidget):
                 raise e
             except (requests.exceptions.TooManyRedirects,
                     requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
                     requests.exceptions.InvalidURL,
                     requests.exceptions.InvalidSchema,
                     requests.exceptions.MissingSchema) as ex:
@@ -750,7 +785,7 @@ class WMSControlWidget(QtWidgets.QWidget, ui.Ui_WMSDockWidget):
                 self.cpdlg.close()
 
         self.display_capabilities_dialog()
-        Worker.create(lambda: requests.get(base_url, params=params, timeout=(5, 60)),
+        Worker.create(lambda: ogcwms.get_session(base_url).get(base_url, params=params, timeout=(5, 60)),
                       on_success, on_failure)
 
     def activate_wms(self, wms, cache=False):
@@ -783,8 +818,10 @@ class WMSControlWidget(QtWidgets.QWidget, ui.Ui_WMSDockWidget):
 
         if self.prefetcher is not None:
             self.prefetch.disconnect(self.prefetcher.fetch_maps)
+            self.prefetcher.shutdown()
         if self.fetcher is not None:
             self.fetch.disconnect(self.fetcher.fetch_maps)
+            self.fetcher.shutdown()
 
         self.prefetcher = WMSMapFetcher(self.wms_cache)
         self.prefetcher.moveToThread(self.thread_prefetch)
@@ -1413,57 +1450,36 @@ class WMSControlWidget(QtWidgets.QWidget, ui.Ui_WMSDockWidget):
         if clear:
             # Delete all files in cache.
             if self.wms_cache is not None:
-                cached_files = os.listdir(self.wms_cache)
-                logging.debug("clearing cache; deleting %i files...", len(cached_files))
+                logging.debug("clearing cache...")
                 try:
-                    for f in cached_files:
-                        os.remove(os.path.join(self.wms_cache, f))
-                except (IOError, OSError) as ex:
-                    msg = f"ERROR: Cannot delete file '{f}'. ({type(ex)}: {ex})"
+                    removed_files = get_image_cache(self.wms_cache).clear()
+                except (IOError, OSError, sqlite3.Error) as ex:
+                    msg = f"ERROR: Cannot clear the cache '{self.wms_cache}'. ({type(ex)}: {ex})"
                     logging.error(msg)
                     QtWidgets.QMessageBox.critical(self, self.tr("Web Map Service"), self.tr(msg))
                 else:
-                    logging.debug("cache has been cleared.")
+                    logging.debug("cache has been cleared (%i files removed).", removed_files)
             else:
                 logging.debug("no cache exists that can be cleared.")
 
     def service_cache(self):
         """Service the cache: Remove all files older than the maximum file
-           age specified in msui_settings, and remove the oldest files if the
-           maximum cache size has been reached.
+           age specified in msui_settings, and remove the least recently used
+           files if the maximum cache size has been reached.
+
+           The sizes and access times are taken from the index of the cache,
+           see mslib.msui.wms_cache.
         """
         logging.debug("servicing cache...")
-
-        # Create a list of all files in the cache.
-        files = [os.path.join(self.wms_cache, f) for f in os.listdir(self.wms_cache)]
-        # Add the ages of the files (via modification times in sec since epoch)
-        # and the file sizes.
-        # (current time in sec since epoch)
-        current_time = time.time()
-        files = [(f, os.path.getsize(f), current_time - os.path.getmtime(f))
-                 for f in files if os.path.isfile(f)]
-        # Sort the files accordings to their age (i.e. use the
-        # third argument of the tuples (file, fsize, fage) as the sorting key).
-        files.sort(key=lambda x: x[2])
-
-        # Loop over all cached files, staring with the youngest. Once the
-        # maximum cache size has been reached, all files left will be
-        # removed (i.e. the oldest files). All files exceeding the maximum
-        # file age will also be removed.
-        cum_size_bytes = 0
-        removed_files = 0
         try:
-            for f, fsize, fage in files:
-                cum_size_bytes += fsize
-                if (cum_size_bytes > config_loader(dataset="wms_cache_max_size_bytes") or
-                        fage > config_loader(dataset="wms_cache_max_age_seconds")):
-                    os.remove(f)
-                    removed_files += 1
-        except (IOError, OSError) as ex:
-            msg = f"ERROR: Cannot delete file '{f}'. ({type(ex)}: {ex})"
+            removed_files = get_image_cache(self.wms_cache).service(
+                config_loader(dataset="wms_cache_max_size_bytes"), config_loader(dataset="wms_cache_max_age_seconds"))
+        except (IOError, OSError, sqlite3.Error) as ex:
+            msg = f"ERROR: Cannot service the cache '{self.wms_cache}'. ({type(ex)}: {ex})"
             logging.error(msg)
             QtWidgets.QMessageBox.critical(self, self.tr("Web Map Service"), self.tr(msg))
-        logging.debug("cache has been cleaned (%i files removed).", removed_files)
+        else:
+            logging.debug("cache has been cleaned (%i files removed).", removed_files)
 
     def squash_multiple_images(self, imgs):
         """
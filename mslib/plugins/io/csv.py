@@ -26,11 +26,15 @@
     limitations under the License.
 """
 
+import itertools
 import unicodecsv as csv
 import os
 
+import numpy as np
 import mslib.msui.flighttrack as ft
 from fs import open_fs
+from mslib.utils.config import config_loader
+from mslib.utils.coordinate import decimate_path
 
 
 def save_to_csv(filename, name, waypoints):
@@ -56,27 +60,31 @@ def save_to_csv(filename, name, waypoints):
 
 
 def load_from_csv(filename):
-    waypoints = []
     _dirname, _name = os.path.split(filename)
     _fs = open_fs(_dirname)
     with _fs.open(_name, "rb") as in_file:
-        lines = in_file.readlines()
-    if len(lines) < 4:
+        # name, header and first row
+        lines = [in_file.readline() for _ in range(3)]
+        if not lines[-1]:
+            raise SyntaxError("CSV file requires at least 4 lines!")
+        dialect = csv.Sniffer().sniff(lines[-1].decode("utf-8"))
+        csv_reader = csv.reader(itertools.chain(lines[-1:], in_file), encoding="utf-8", dialect=dialect)
+        rows = [row[:9] for row in csv_reader]
+    if len(rows) < 2:
         raise SyntaxError("CSV file requires at least 4 lines!")
-    dialect = csv.Sniffer().sniff(lines[-1].decode("utf-8"))
-    csv_reader = csv.reader(lines, encoding="utf-8", dialect=dialect)
-    name = next(csv_reader)[0]
-    next(csv_reader)  # header
-    for row in csv_reader:
-        wp = ft.Waypoint()
-        wp.location = row[1]
-        wp.lat = float(row[2])
-        wp.lon = float(row[3])
-        wp.flightlevel = float(row[4])
-        wp.pressure = float(row[5]) * 100.
-        wp.distance_to_prev = float(row[6])
-        wp.distance_total = float(row[7])
-        wp.comments = row[8]
-        waypoints.append(wp)
+    columns = list(zip(*rows))
+    if len(columns) < 9:
+        raise SyntaxError("CSV file requires 9 columns in every row!")
+    lats, lons, flightlevels, pressures, legs, totals = np.asarray(columns[2:8], dtype=float)
+    keep = decimate_path(lats, lons, config_loader(dataset="import_plugins_max_points"),
+                         config_loader(dataset="import_plugins_tolerance_km"))
+    waypoints = ft.create_waypoints(lats[keep].tolist(), lons[keep].tolist(), flightlevels[keep].tolist())
+    for wp, i, pressure, leg, total in zip(
+            waypoints, keep.tolist(), pressures[keep].tolist(), legs[keep].tolist(), totals[keep].tolist()):
+        wp.location = columns[1][i]
+        wp.pressure = pressure * 100.
+        wp.distance_to_prev = leg
+        wp.distance_total = total
+        wp.comments = columns[8][i]
     name = os.path.basename(filename.replace(".csv", "").strip())
     return name, waypoints
@@ -31,12 +31,12 @@ import os
 from fs import open_fs
 
 import mslib.msui.flighttrack as ft
-from mslib.utils import thermolib
-from mslib.utils.units import units
+from mslib.utils.config import config_loader
+from mslib.utils.coordinate import decimate_path
 
 
 def load_from_flitestar(filename):
-    waypoints = []
+    locations, fields = [], []
     _dirname, _name = os.path.split(filename)
     _fs = open_fs(_dirname)
     with _fs.open(_name, 'r') as f:
@@ -49,29 +49,25 @@ def load_from_flitestar(filename):
                 line = line.split()
                 if len(line) < 10:
                     raise SyntaxError(f"Line {line} has less than 9 fields.")
-                alt = round(float(line[-1]) / 100., 2)
-                if line[4] == 'N':
-                    NS = 1.
-                elif line[4] == 'S':
-                    NS = -1.
-                else:
-                    NS = np.nan
-                lat = round((float(line[5]) + (float(line[6]) / 60.)) * NS, 3)
-                if line[7] == 'E':
-                    EW = 1.
-                elif line[7] == 'W':
-                    EW = -1.
-                else:
-                    EW = np.nan
-                lon = round((float(line[8]) + (float(line[9]) / 60.)) * EW, 3)
+                locations.append(line[3])
+                fields.append(line[4:10] + line[-1:])
 
-                wp = ft.Waypoint()
-                wp.location = line[3]
-                wp.lat = float(lat)
-                wp.lon = float(lon)
-                wp.flightlevel = float(alt)
-                wp.pressure = thermolib.flightlevel2pressure(float(wp.flightlevel) * units.hft).magnitude
-                waypoints.append(wp)
+    north_south = np.asarray([field[0] for field in fields], dtype=str)
+    east_west = np.asarray([field[3] for field in fields], dtype=str)
+    numbers = np.asarray([field[1:3] + field[4:] for field in fields], dtype=float).reshape(-1, 5)
+    lats = (numbers[:, 0] + numbers[:, 1] / 60.) * \
+        np.select([north_south == "N", north_south == "S"], [1., -1.], np.nan)
+    lons = (numbers[:, 2] + numbers[:, 3] / 60.) * \
+        np.select([east_west == "E", east_west == "W"], [1., -1.], np.nan)
+    # rounded by python, as numpy does not round correctly in all cases
+    lats = np.asarray([round(lat, 3) for lat in lats.tolist()])
+    lons = np.asarray([round(lon, 3) for lon in lons.tolist()])
+    flightlevels = np.asarray([round(alt / 100., 2) for alt in numbers[:, 4].tolist()])
+    keep = decimate_path(lats, lons, config_loader(dataset="import_plugins_max_points"),
+                         config_loader(dataset="import_plugins_tolerance_km"))
+    waypoints = ft.create_waypoints(lats[keep].tolist(), lons[keep].tolist(), flightlevels[keep].tolist())
+    for wp, i in zip(waypoints, keep.tolist()):
+        wp.location = locations[i]
 
     name, _ = os.path.splitext(os.path.basename(filename))
     return name, waypoints
@@ -28,30 +28,52 @@
 """
 
 import os
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
 from fs import open_fs
-import gpxpy
+
+from mslib import __version__
+
+HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<gpx xmlns="http://www.topografix.com/GPX/1/1" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" \
+xsi:schemaLocation="http://www.topografix.com/GPX/1/1 http://www.topografix.com/GPX/1/1/gpx.xsd" version="1.1" \
+creator={creator}>
+  <metadata>
+    <name>{name}</name>
+    <desc>MSS flight track export</desc>
+  </metadata>
+  <trk>
+    <trkseg>
+"""
+TRACK_POINT = """      <trkpt lat="{lat}" lon="{lon}">
+        <name>{name}</name>
+      </trkpt>
+"""
+FOOTER = """    </trkseg>
+  </trk>
+</gpx>"""
+
+
+def _format_coordinate(value):
+    """
+    Returns the shortest decimal representation of value, without exponent as required by GPX
+    """
+    return np.format_float_positional(float(value), trim="-")
 
 
 def save_to_gpx(filename, name, waypoints):
+    """
+    Writes the waypoints as one track segment of a GPX 1.1 document, point by point
+    """
     if not filename:
         raise ValueError("fileexportname to save flight track cannot be None")
     _dirname, _name = os.path.split(filename)
     _fs = open_fs(_dirname)
-    gpx = gpxpy.gpx.GPX()
-    gpx_track = gpxpy.gpx.GPXTrack()
-    gpx.tracks.append(gpx_track)
-    gpx_segment = gpxpy.gpx.GPXTrackSegment()
-    gpx_track.segments.append(gpx_segment)
-
-    # add metadata
-    gpx.name = name
-    gpx.description = "MSS flight track export"
-
-    # create waypoints
-    for i, wp in enumerate(waypoints):
-        loc = str(wp.location)
-        wp_name = loc if loc else str(i)
-        gpx_segment.points.append(gpxpy.gpx.GPXTrackPoint(wp.lat, wp.lon, name=wp_name))
-
     with _fs.open(_name, "w") as fh:
-        fh.write(gpx.to_xml())
+        fh.write(HEADER.format(creator=quoteattr(f"MSS {__version__}"), name=escape(name)))
+        fh.writelines(
+            TRACK_POINT.format(lat=_format_coordinate(wp.lat), lon=_format_coordinate(wp.lon),
+                               name=escape(str(wp.location) if str(wp.location) else str(i)))
+            for i, wp in enumerate(waypoints))
+        fh.write(FOOTER)
@@ -56,22 +56,14 @@ def save_to_kml(filename, name, waypoints):
     footer = """</Document>
 </kml>"""
     with codecs.open(filename, "w", "utf_8") as out_file:
-        line_coords = ""
-        for i, wp in enumerate(waypoints):
-            lat = wp.lat
-            lon = wp.lon
-            lvl = wp.flightlevel
-            alt = lvl * 100 * 0.3048
-            line_coords += line.format(lon=lon, lat=lat, alt=alt)
         out_file.write(header)
-        out_file.write(path.format(coordinates=line_coords))
-        for i, wp in enumerate(waypoints):
-            name = str(wp.location)
-            if not name:
-                name = str(i)
-            lat = wp.lat
-            lon = wp.lon
-            lvl = wp.flightlevel
-            alt = lvl * 100 * 0.3048
-            out_file.write(waypoint.format(name=str(name), lon=lon, lat=lat, alt=alt))
+        # the coordinates are written line by line instead of formatting the path at once
+        path_start, path_end = path.split("{coordinates}")
+        out_file.write(path_start)
+        out_file.writelines(line.format(lon=wp.lon, lat=wp.lat, alt=wp.flightlevel * 100 * 0.3048)
+                            for wp in waypoints)
+        out_file.write(path_end)
+        out_file.writelines(waypoint.format(name=str(wp.location) if str(wp.location) else str(i),
+                                            lon=wp.lon, lat=wp.lat, alt=wp.flightlevel * 100 * 0.3048)
+                            for i, wp in enumerate(waypoints))
         out_file.write(footer)
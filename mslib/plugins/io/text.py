@@ -26,14 +26,14 @@
     limitations under the License.
 """
 
-import logging
 import codecs
 import os
 from fs import open_fs
 
+import numpy as np
 import mslib.msui.flighttrack as ft
-from mslib.utils.units import units
-from mslib.utils import thermolib
+from mslib.utils.config import config_loader
+from mslib.utils.coordinate import decimate_path
 
 
 def save_to_txt(filename, name, waypoints):
@@ -67,9 +67,9 @@ def save_to_txt(filename, name, waypoints):
 
 def load_from_txt(filename):
     name = os.path.basename(filename.replace(".txt", "").strip())
-    waypoints = []
     _dirname, _name = os.path.split(filename)
     _fs = open_fs(_dirname)
+    lines = []
     with _fs.open(_name, "r") as in_file:
         pos = []
         for line in in_file:
@@ -93,26 +93,26 @@ def load_from_txt(filename):
                 raise SyntaxError("TXT Import could not parse column headings.")
             if len(line) < max(pos):
                 raise SyntaxError(f"TXT Import could not parse line: '{line}'")
+            lines.append(line)
 
-            wp = ft.Waypoint()
-            attr_names = ["location", "lat", "lon", "flightlevel",
-                          "pressure", "distance_to_prev", "distance_total",
-                          "comments"]
-            setattr(wp, attr_names[0], line[pos[1]:pos[2]].strip())
-            setattr(wp, attr_names[7], line[pos[8]:].strip())
-            for i in range(2, len(pos) - 1):
-                if pos[i] >= 0:
-                    if i == 5:
-                        setattr(wp, attr_names[i - 1],
-                                float(line[pos[i]:pos[i + 1]].strip()) * 100.)
-                    else:
-                        setattr(wp, attr_names[i - 1],
-                                float(line[pos[i]:pos[i + 1]].strip()))
-                else:
-                    if i == 5:
-                        logging.debug('calculate pressure from FL ' + str(
-                            thermolib.flightlevel2pressure(float(wp.flightlevel) * units.hft).magnitude))
-                        setattr(wp, attr_names[i - 1],
-                                thermolib.flightlevel2pressure(float(wp.flightlevel) * units.hft).magnitude)
-            waypoints.append(wp)
+    # columns of lat, lon, flightlevel, pressure, distance_to_prev and distance_total,
+    # missing ones keep the defaults of the waypoints
+    columns = {}
+    for i in range(2, len(pos) - 1):
+        if pos[i] >= 0:
+            columns[i] = np.asarray([line[pos[i]:pos[i + 1]] for line in lines], dtype=float)
+    zeros = np.zeros(len(lines))
+    keep = decimate_path(columns.get(2, zeros), columns.get(3, zeros),
+                         config_loader(dataset="import_plugins_max_points"),
+                         config_loader(dataset="import_plugins_tolerance_km"))
+    waypoints = ft.create_waypoints(*(columns.get(i, zeros)[keep].tolist() for i in range(2, 5)))
+    for wp, i in zip(waypoints, keep.tolist()):
+        wp.location = lines[i][pos[1]:pos[2]].strip()
+        wp.comments = lines[i][pos[8]:].strip()
+    # the pressure is computed from the flight level if not given
+    for i, attr_name in [(5, "pressure"), (6, "distance_to_prev"), (7, "distance_total")]:
+        if i in columns:
+            values = columns[i][keep] * (100. if i == 5 else 1.)
+            for wp, value in zip(waypoints, values.tolist()):
+                setattr(wp, attr_name, value)
     return name, waypoints
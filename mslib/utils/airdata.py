@@ -34,9 +34,14 @@ import requests
 import re as regex
 from PyQt5 import QtWidgets
 import logging
+import tempfile
 import time
+import zipfile
+from collections.abc import Sequence
 
 import defusedxml.ElementTree as etree
+import numpy as np
+import shapely
 from mslib.msui.constants import MSUI_CONFIG_PATH
 
 OSDIR = fs.open_fs(MSUI_CONFIG_PATH).root_path
@@ -72,6 +77,130 @@ class Airspace:
                 ]
 
 
+class AirportList(Sequence):
+    """
+    The airports of airports.csv, stored by column
+
+    Behaves like the list of dicts read by csv.DictReader, but only decodes the
+    columns and creates the dicts of the airports that are actually used.
+    """
+
+    def __init__(self, fieldnames, columns, length):
+        """
+        fieldnames: the column names in the order of the file
+        columns: dictionary of column names to lists of values or to encoded strings
+        length: number of airports
+        """
+        self.fieldnames = fieldnames
+        self._columns = columns
+        self._length = length
+
+    def column(self, name):
+        """
+        Returns the values of the named column as list
+        """
+        values = self._columns[name]
+        if isinstance(values, np.ndarray):
+            values = self._columns[name] = _decode_strings(values, self._length)
+        return values
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if not -self._length <= index < self._length:
+            raise IndexError("airport index out of range")
+        return {name: self.column(name)[index] for name in self.fieldnames}
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(mine == theirs for mine, theirs in zip(self, other))
+        return NotImplemented
+
+
+def airport_column(airports, name):
+    """
+    Returns the named value of all airports as list
+    """
+    if isinstance(airports, AirportList):
+        return airports.column(name)
+    return [airport[name] for airport in airports]
+
+
+def _encode_strings(strings):
+    return np.frombuffer("\0".join(strings).encode("utf8"), dtype=np.uint8)
+
+
+def _decode_strings(data, length):
+    return data.tobytes().decode("utf8").split("\0") if length > 0 else []
+
+
+def _cache_path(path):
+    """
+    Returns the path of the parsed data of a downloaded file
+    """
+    return os.path.splitext(path)[0] + ".npz"
+
+
+def _load_cache(path):
+    """
+    Returns the arrays cached for the file at path, or None if there are none for
+    the current modification time and size of the file
+    """
+    try:
+        stat = os.stat(path)
+        with np.load(_cache_path(path), allow_pickle=False) as cache:
+            if cache["mtime"] != stat.st_mtime or cache["size"] != stat.st_size:
+                return None
+            return {key: cache[key] for key in cache.files}
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as ex:
+        logging.debug("No cached data of %s: %s", path, ex)
+        return None
+
+
+def _save_cache(path, arrays):
+    """
+    Stores the arrays parsed from the file at path next to it
+    """
+    cache_path = _cache_path(path)
+    try:
+        stat = os.stat(path)
+        # written to a temporary file first, so that no incomplete cache is ever read
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(cache_path), suffix=".npz", delete=False) as file:
+            np.savez(file, mtime=stat.st_mtime, size=stat.st_size, **arrays)
+        os.replace(file.name, cache_path)
+    except OSError as ex:
+        logging.warning("Could not cache the data of %s: %s", path, ex)
+
+
+def _read_airports(path):
+    """
+    Returns the airports of the csv file at path, parsing it only if it is not cached
+    """
+    cache = _load_cache(path)
+    if cache is not None:
+        fieldnames = _decode_strings(cache["fieldnames"], int(cache["length"]))
+        return AirportList(fieldnames, {name: cache[f"column_{i}"] for i, name in enumerate(fieldnames)},
+                           int(cache["length"]))
+
+    with open(path, "r", encoding="utf8") as file:
+        reader = csv.reader(file, delimiter=",")
+        fieldnames = next(reader, [])
+        rows = list(reader)
+    if any(len(row) != len(fieldnames) for row in rows):
+        # incomplete rows can not be stored by column
+        with open(path, "r", encoding="utf8") as file:
+            return list(csv.DictReader(file, delimiter=","))
+    columns = [list(column) for column in zip(*rows)] or [[] for _ in fieldnames]
+    airports = AirportList(fieldnames, dict(zip(fieldnames, columns)), len(rows))
+    if fieldnames:
+        _save_cache(path, dict(fieldnames=_encode_strings(fieldnames), length=len(airports),
+                               **{f"column_{i}": _encode_strings(column) for i, column in enumerate(columns)}))
+    return airports
+
+
 def download_progress(file_path, url, progress_callback=lambda f: logging.info("%sKB Downloaded", int(f))):
     """
     Downloads the file at the given url to file_path and keeps track of the progress
@@ -125,9 +254,9 @@ def get_airports(force_download=False, url=None):
         download_progress(os.path.join(OSDIR, "downloads", "aip", "airports.csv"), url)
 
     if os.path.exists(os.path.join(OSDIR, "downloads", "aip", "airports.csv")):
-        with open(os.path.join(OSDIR, "downloads", "aip", "airports.csv"), "r", encoding="utf8") as file:
-            _airports_mtime = os.path.getmtime(os.path.join(OSDIR, "downloads", "aip", "airports.csv"))
-            return list(csv.DictReader(file, delimiter=","))
+        Airspace.airports_mtime = os.path.getmtime(os.path.join(OSDIR, "downloads", "aip", "airports.csv"))
+        Airspace.airports = _read_airports(os.path.join(OSDIR, "downloads", "aip", "airports.csv"))
+        return Airspace.airports
 
     else:
         return []
@@ -180,6 +309,88 @@ def update_airspace(force_download=False, countries=None):
             download_progress(location, url)
 
 
+def _parse_airspaces(path):
+    """
+    Parses the airspaces of an openAIP file, returns None if the file contains none
+    """
+    root = etree.parse(path).getroot()
+    valid_file = len(set([elem.tag for elem in root.iter()])) == 12
+    if not valid_file:
+        return None
+    _airspaces = []
+    airspaces = (root.find('{https://www.openaip.net}AIRSPACES'))
+    names = [dat.text for dat in airspaces.findall(".//{https://www.openaip.net}NAME")]
+    polygons = [dat.text for dat in airspaces.findall(".//{https://www.openaip.net}POLYGON")]
+    countries = [dat.text for dat in airspaces.findall(".//{https://www.openaip.net}COUNTRY")]
+    tops = []
+    top_units = []
+    for dat in airspaces.findall(".//{https://www.openaip.net}ALTLIMIT_TOP"):
+        unit = dat[0]
+        top_units.append(unit.get("UNIT"))
+        _, data = dat.iter()
+        tops.append(float(data.text))
+    bottoms = []
+    bottom_units = []
+    for dat in airspaces.findall(".//{https://www.openaip.net}ALTLIMIT_BOTTOM"):
+        unit = dat[0]
+        bottom_units.append(unit.get("UNIT"))
+        _, data = dat.iter()
+        bottoms.append(float(data.text))
+
+    for index, value in enumerate(names):
+        airspace_data = {
+            "name": names[index],
+            "polygon": polygons[index],
+            "top": tops[index],
+            "top_unit": top_units[index],
+            "bottom": bottoms[index],
+            "bottom_unit": bottom_units[index],
+            "country": countries[index]
+        }
+
+        # Convert to kilometers
+        airspace_data["top"] /= 3281 if airspace_data["top_unit"] == "F" else 32.81
+        airspace_data["bottom"] /= 3281 if airspace_data["bottom_unit"] == "F" else 32.81
+        airspace_data["top"] = round(airspace_data["top"], 2)
+        airspace_data["bottom"] = round(airspace_data["bottom"], 2)
+        airspace_data.pop("top_unit")
+        airspace_data.pop("bottom_unit")
+
+        airspace_data["polygon"] = [(float(data.split()[0]), float(data.split()[-1]))
+                                    for data in airspace_data["polygon"].split(",")]
+        _airspaces.append(airspace_data)
+    return _airspaces
+
+
+def _read_airspaces(path):
+    """
+    Returns the airspaces of the openAIP file at path, parsing it only if it is not cached
+    """
+    cache = _load_cache(path)
+    if cache is not None:
+        count = len(cache["tops"])
+        vertices = list(zip(*cache["vertices"].T.tolist()))
+        ends = np.cumsum(cache["lengths"]).tolist()
+        return [{"name": name, "polygon": vertices[end - length:end], "top": top, "bottom": bottom,
+                 "country": country}
+                for name, length, end, top, bottom, country in zip(
+                    _decode_strings(cache["names"], count), cache["lengths"].tolist(), ends,
+                    cache["tops"].tolist(), cache["bottoms"].tolist(), _decode_strings(cache["countries"], count))]
+
+    airspaces = _parse_airspaces(path)
+    if airspaces is not None and all(isinstance(airspace["name"], str) and isinstance(airspace["country"], str)
+                                     for airspace in airspaces):
+        _save_cache(path, dict(
+            names=_encode_strings([airspace["name"] for airspace in airspaces]),
+            countries=_encode_strings([airspace["country"] for airspace in airspaces]),
+            tops=np.array([airspace["top"] for airspace in airspaces], dtype=float),
+            bottoms=np.array([airspace["bottom"] for airspace in airspaces], dtype=float),
+            lengths=np.array([len(airspace["polygon"]) for airspace in airspaces], dtype=int),
+            vertices=np.array([vertex for airspace in airspaces for vertex in airspace["polygon"]],
+                              dtype=float).reshape(-1, 2)))
+    return airspaces
+
+
 def get_airspaces(countries=None):
     """
     Gets the .xml files in ~/.config/msui/downloads/aip and returns all airspaces within
@@ -206,53 +417,72 @@ def get_airspaces(countries=None):
     _airspaces_mtime = {}
     _airspaces = []
     for file in files:
-        fpath = os.path.join(OSDIR, "downloads", "aip", file)
-        root = etree.parse(fpath).getroot()
-        valid_file = len(set([elem.tag for elem in root.iter()])) == 12
-        if valid_file:
-            airspaces = (root.find('{https://www.openaip.net}AIRSPACES'))
-            names = [dat.text for dat in airspaces.findall(".//{https://www.openaip.net}NAME")]
-            polygons = [dat.text for dat in airspaces.findall(".//{https://www.openaip.net}POLYGON")]
-            countries = [dat.text for dat in airspaces.findall(".//{https://www.openaip.net}COUNTRY")]
-            tops = []
-            top_units = []
-            for dat in airspaces.findall(".//{https://www.openaip.net}ALTLIMIT_TOP"):
-                unit = dat[0]
-                top_units.append(unit.get("UNIT"))
-                _, data = dat.iter()
-                tops.append(float(data.text))
-            bottoms = []
-            bottom_units = []
-            for dat in airspaces.findall(".//{https://www.openaip.net}ALTLIMIT_BOTTOM"):
-                unit = dat[0]
-                bottom_units.append(unit.get("UNIT"))
-                _, data = dat.iter()
-                bottoms.append(float(data.text))
-
-            for index, value in enumerate(names):
-                airspace_data = {
-                    "name": names[index],
-                    "polygon": polygons[index],
-                    "top": tops[index],
-                    "top_unit": top_units[index],
-                    "bottom": bottoms[index],
-                    "bottom_unit": bottom_units[index],
-                    "country": countries[index]
-                }
-
-                # Convert to kilometers
-                airspace_data["top"] /= 3281 if airspace_data["top_unit"] == "F" else 32.81
-                airspace_data["bottom"] /= 3281 if airspace_data["bottom_unit"] == "F" else 32.81
-                airspace_data["top"] = round(airspace_data["top"], 2)
-                airspace_data["bottom"] = round(airspace_data["bottom"], 2)
-                airspace_data.pop("top_unit")
-                airspace_data.pop("bottom_unit")
-
-                airspace_data["polygon"] = [(float(data.split()[0]), float(data.split()[-1]))
-                                            for data in airspace_data["polygon"].split(",")]
-                _airspaces.append(airspace_data)
+        airspaces = _read_airspaces(os.path.join(OSDIR, "downloads", "aip", file))
+        if airspaces is not None:
+            _airspaces.extend(airspaces)
+            if airspaces:
                 _airspaces_mtime[file] = os.path.getmtime(os.path.join(OSDIR, "downloads", "aip", file))
         else:
             QtWidgets.QMessageBox.information(None, "No Airspaces data in file:", f"{file}")
 
+    Airspace.data = _airspaces
+    Airspace.data_mtime = _airspaces_mtime
     return _airspaces
+
+
+class AirdataIndex:
+    """
+    Spatial index (STRtree) of airports or airspaces given in lon/lat
+
+    It is built once for the list returned by get_airports or get_airspaces
+    and selects the features within a region without looking at all of them.
+    """
+
+    def __init__(self, features, geometries):
+        self.features = features
+        self.length = len(features)
+        self.geometries = geometries
+        self.tree = shapely.STRtree(geometries)
+
+    def is_valid_for(self, features):
+        """
+        Checks whether the index still represents the given features
+        """
+        return features is self.features and len(features) == self.length
+
+    def query(self, bounds=None):
+        """
+        Returns the sorted indices of the features whose bounding box intersects
+        the bounds (lon0, lat0, lon1, lat1), or of all features if bounds is None
+        """
+        if bounds is None:
+            return np.arange(self.length)
+        return np.sort(self.tree.query(shapely.box(*bounds)))
+
+
+_airports_index = None
+_airspaces_index = None
+
+
+def get_airports_index(airports):
+    """
+    Returns the spatial index of the airport locations
+    """
+    global _airports_index
+    if _airports_index is None or not _airports_index.is_valid_for(airports):
+        lons = np.asarray(airport_column(airports, "longitude_deg"), dtype=float)
+        lats = np.asarray(airport_column(airports, "latitude_deg"), dtype=float)
+        _airports_index = AirdataIndex(airports, shapely.points(lons, lats))
+    return _airports_index
+
+
+def get_airspaces_index(airspaces):
+    """
+    Returns the spatial index of the bounding boxes of the airspace polygons
+    """
+    global _airspaces_index
+    if _airspaces_index is None or not _airspaces_index.is_valid_for(airspaces):
+        bounds = np.array([np.concatenate([np.min(airspace["polygon"], axis=0), np.max(airspace["polygon"], axis=0)])
+                           for airspace in airspaces]).reshape(-1, 4)
+        _airspaces_index = AirdataIndex(airspaces, shapely.box(bounds[:, 0], bounds[:, 1], bounds[:, 2], bounds[:, 3]))
+    return _airspaces_index
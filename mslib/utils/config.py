@@ -138,6 +138,12 @@ class MSUIDefaultConfig:
     # don't query for archived operations
     MSCOLAB_skip_archived_operations = False
 
+    # number of chat messages loaded at once, older messages are loaded when scrolling up
+    MSCOLAB_chat_page_size = 100
+
+    # number of changes loaded at once in the version history, older changes are loaded when scrolling down
+    MSCOLAB_changes_page_size = 100
+
     # list of MSC servers {"http://www.your-mscolab-server.de": "authuser",
     # "http://www.your-wms-server.de": "authuser"}
     MSS_auth = {}
@@ -145,6 +151,16 @@ class MSUIDefaultConfig:
     # timeout of Url request
     WMS_request_timeout = 30
 
+    # maximum number of connections kept open to each WMS server
+    WMS_connection_pool_size = 10
+
+    # number of retries of failed WMS requests and the backoff factor of the waiting time in seconds between them
+    WMS_request_retries = 2
+    WMS_request_backoff_factor = 0.5
+
+    # maximum number of maps and legends retrieved at the same time for the displayed and the prefetched maps each
+    WMS_concurrent_requests = 4
+
     WMS_preload = []
 
     # WMS image cache settings:
@@ -213,6 +229,11 @@ class MSUIDefaultConfig:
     # dictionary for import plugins, e.g. { "FliteStar": ["txt", "mslib.plugins.io.flitestar", "load_from_flitestar"] }
     import_plugins = {}
 
+    # flight tracks read by the csv, txt and FliteStar import plugins are reduced to this number of waypoints,
+    # 0 keeps all waypoints. More waypoints are kept to stay within the tolerance in km of the original track.
+    import_plugins_max_points = 0
+    import_plugins_tolerance_km = 0.1
+
     # dictionary to make title, label and ticklabel sizes for topview and sideview configurable.
     # You can put your default value here, whatever you want to give,it should be a number.
     topview = {"plot_title_size": 10,
@@ -241,14 +262,22 @@ class MSUIDefaultConfig:
         'num_labels',
         'num_interpolation_points',
         'new_flighttrack_flightlevel',
+        'import_plugins_max_points',
+        'import_plugins_tolerance_km',
         'MSCOLAB_category',
         'MSCOLAB_skip_archived_operations',
+        'MSCOLAB_chat_page_size',
+        'MSCOLAB_changes_page_size',
         'mscolab_server_url',
         'MSCOLAB_auth_user_name',
         'wms_cache',
         'wms_cache_max_size_bytes',
         'wms_cache_max_age_seconds',
         'WMS_request_timeout',
+        'WMS_connection_pool_size',
+        'WMS_request_retries',
+        'WMS_request_backoff_factor',
+        'WMS_concurrent_requests',
     ]
 
     # Dictionary options with predefined structure
@@ -300,6 +329,8 @@ class MSUIDefaultConfig:
         "data_dir": "Documentation Required",
         "predefined_map_sections": "Documentation Required",
         "num_interpolation_points": "Documentation Required",
+        "import_plugins_max_points": "Documentation Required",
+        "import_plugins_tolerance_km": "Documentation Required",
         "num_labels": "Documentation Required",
         "default_WMS": "Documentation Required",
         "default_VSEC_WMS": "Documentation Required",
@@ -308,7 +339,13 @@ class MSUIDefaultConfig:
         "MSS_auth": "Documentation Required",
         "MSCOLAB_auth_user_name": "Documentation Required",
         "MSCOLAB_timeout": "Documentation Required",
+        "MSCOLAB_chat_page_size": "Documentation Required",
+        "MSCOLAB_changes_page_size": "Documentation Required",
         "WMS_request_timeout": "Documentation Required",
+        "WMS_connection_pool_size": "Documentation Required",
+        "WMS_request_retries": "Documentation Required",
+        "WMS_request_backoff_factor": "Documentation Required",
+        "WMS_concurrent_requests": "Documentation Required",
         "WMS_preload": "Documentation Required",
         "wms_cache": "Documentation Required",
         "wms_cache_max_size_bytes": "Documentation Required",
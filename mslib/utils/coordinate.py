@@ -32,12 +32,18 @@ import numpy as np
 from pyproj import Geod
 from scipy.interpolate import interp1d
 from scipy.ndimage import map_coordinates
+from scipy.spatial import cKDTree
 
 from mslib.utils.config import config_loader
 
 
 __PR = Geod(ellps='WGS84')
 
+# Mean earth radius in km and a safety margin covering the difference between great circle
+# distances on this sphere and geodesic distances on the WGS84 ellipsoid (less than 0.6%).
+EARTH_RADIUS_KM = 6371.0088
+_SPHERE_MARGIN = 1.02
+
 
 def get_distance(lat0, lon0, lat1, lon1):
     """
@@ -54,6 +60,92 @@ def get_distance(lat0, lon0, lat1, lon1):
     return __PR.inv(lon0, lat0, lon1, lat1)[-1] / 1000.
 
 
+def _call_vectorised(method, *arrays):
+    """
+    Calls the pyproj method (e.g. Geod.inv) for numpy arrays of equal length and
+    returns arrays, as pyproj takes arrays of a single element for scalars.
+    """
+    if len(arrays[0]) == 1:
+        return tuple(np.array([value]) for value in method(*(array[0] for array in arrays)))
+    return method(*arrays)
+
+
+def _get_distances(lats0, lons0, lats1, lons1):
+    """
+    Computes the distances in km between the points of numpy arrays of equal length
+    """
+    return _call_vectorised(__PR.inv, lons0, lats0, lons1, lats1)[-1] / 1000.
+
+
+def _unit_vectors(lons, lats):
+    """
+    Returns the points given in degrees as an array of 3D unit vectors.
+    """
+    lons, lats = np.deg2rad(lons), np.deg2rad(lats)
+    return np.column_stack([np.cos(lats) * np.cos(lons), np.cos(lats) * np.sin(lons), np.sin(lats)])
+
+
+class LocationIndex:
+    """
+    Spatial index of named locations for nearest location lookups.
+
+    The locations are stored as unit vectors in a k-d tree. A lookup only
+    computes the geodesic distances to the few locations close enough to be
+    the nearest one, so it gives the same result as comparing the distances
+    to all locations.
+    """
+
+    def __init__(self, locations):
+        """
+        locations: dictionary of location names to [lat, lon]
+        """
+        self.key = self._key(locations)
+        self.names = list(locations)
+        coordinates = np.array(list(locations.values()), dtype=float).reshape(-1, 2)
+        self.lats, self.lons = coordinates[:, 0], coordinates[:, 1]
+        self.tree = cKDTree(_unit_vectors(self.lons, self.lats)) if self.names else None
+
+    @staticmethod
+    def _key(locations):
+        return tuple(locations), tuple(map(tuple, locations.values()))
+
+    def is_valid_for(self, locations):
+        """
+        Checks whether the index still represents the given locations.
+
+        The names and coordinates are compared, which takes far less time than
+        building the index, so locations edited in place are noticed as well.
+        """
+        return self._key(locations) == self.key
+
+    def find(self, lat, lon, tolerance=5):
+        """
+        Returns the name of the location nearest to lat/lon, if it is not
+        farther away than tolerance (in km), or None.
+        """
+        if self.tree is None:
+            return None
+        point = _unit_vectors(lon, lat)[0]
+        # The location nearest on the sphere is close to the nearest one on the ellipsoid.
+        # Only locations within its geodesic distance (or the tolerance) can be nearer.
+        _, nearest = self.tree.query(point)
+        radius = min(get_distance(lat, lon, self.lats[nearest], self.lons[nearest]), tolerance)
+        angle = radius * _SPHERE_MARGIN / EARTH_RADIUS_KM
+        chord = 2 * np.sin(angle / 2) if angle < np.pi else 2
+        candidates = self.tree.query_ball_point(point, chord * (1 + 1e-9) + 1e-12)
+        if len(candidates) == 0:
+            return None
+        distances = _get_distances(np.full(len(candidates), lat), np.full(len(candidates), lon),
+                                   self.lats[candidates], self.lons[candidates])
+        distance, name = min(zip(distances.tolist(), (self.names[i] for i in candidates)))
+        if distance <= tolerance:
+            return name
+        return None
+
+
+_location_index = None
+
+
 def find_location(lat, lon, tolerance=5):
     """
     Checks if a location is present at given coordinates
@@ -62,24 +154,24 @@ def find_location(lat, lon, tolerance=5):
     :param tolerance: maximum distance between location and coordinates in km
     :return: None or lat/lon, name
     """
+    global _location_index
     locations = config_loader(dataset='locations')
-    distances = sorted([(get_distance(lat, lon, loc_lat, loc_lon), loc)
-                        for loc, (loc_lat, loc_lon) in locations.items()])
-    if len(distances) > 0 and distances[0][0] <= tolerance:
-        return locations[distances[0][1]], distances[0][1]
-    else:
+    # the index is built again whenever the locations change
+    if _location_index is None or not _location_index.is_valid_for(locations):
+        _location_index = LocationIndex(locations)
+    name = _location_index.find(lat, lon, tolerance)
+    if name is None:
         return None
+    return locations[name], name
 
 
 def fix_angle(ang):
     """
-    Normalizes an angle between -180 and 180 degree.
+    Normalizes an angle (or an array of angles) between 0 and 360 degree.
     """
-    while ang > 360:
-        ang -= 360
-    while ang < 0:
-        ang += 360
-    return ang
+    result = np.mod(ang, 360)
+    # positive multiples of 360 become 360, as when subtracting 360 while above it
+    return np.where((result == 0) & (np.asarray(ang) > 0), 360, result)[()]
 
 
 def normalize_longitude(lons, lon_min, lon_max):
@@ -259,6 +351,157 @@ def interpolate_vertsec(data3D, data3D_lats, data3D_lons, lats, lons):
     return np.ma.masked_invalid(curtain)
 
 
+def _segment_fractions(npoints):
+    """
+    Locates the points of a path whose segment i is densified by npoints[i] intermediate points.
+
+    Returns for every point but the first one the index of its segment and its
+    position within the segment as a fraction between 0 and 1 (1 for the end point).
+    """
+    counts = np.asarray(npoints, dtype=int) + 1
+    segments = np.repeat(np.arange(len(counts)), counts)
+    steps = np.arange(1, counts.sum() + 1) - np.repeat(np.cumsum(counts) - counts, counts)
+    return segments, steps / counts[segments]
+
+
+def _interpolate_segments(values, segments, fractions):
+    """
+    Linearly interpolates values at the points located by _segment_fractions, including
+    the first point. The end points of the segments are not touched by rounding errors.
+    """
+    values = np.asarray(values, dtype=float)
+    start, end = values[segments], values[segments + 1]
+    result = np.where(fractions < 1, start + (end - start) * fractions, end)
+    return np.concatenate([values[:1], result])
+
+
+def _great_circle_points(lons, lats, segments, fractions):
+    """
+    Computes the points at the given fractions of the great circles between
+    the points segments and segments + 1 of a path on a sphere.
+
+    Returns lons, lats and a mask of the points whose segment joins two
+    antipodal points, for which the great circle is not defined.
+    """
+    vectors = _unit_vectors(lons, lats)
+    p0, p1 = vectors[segments], vectors[segments + 1]
+    sin_omega = np.linalg.norm(np.cross(p0, p1), axis=1)
+    omega = np.arctan2(sin_omega, (p0 * p1).sum(axis=1))
+    degenerate = sin_omega < 1e-12
+    sin_omega[degenerate] = 1
+    weight0 = np.where(degenerate, 1 - fractions, np.sin((1 - fractions) * omega) / sin_omega)
+    weight1 = np.where(degenerate, fractions, np.sin(fractions * omega) / sin_omega)
+    points = weight0[:, np.newaxis] * p0 + weight1[:, np.newaxis] * p1
+    r_lons = np.rad2deg(np.arctan2(points[:, 1], points[:, 0]))
+    r_lats = np.rad2deg(np.arctan2(points[:, 2], np.hypot(points[:, 0], points[:, 1])))
+    return r_lons, r_lats, degenerate & (omega > np.pi / 2)
+
+
+def geodesic_path(lons, lats, npoints, geod=None):
+    """
+    Densifies the path through the given points by npoints[i] equally spaced
+    points on the geodesic between point i and point i + 1.
+
+    All segments are computed at once, the given points are kept exactly. The
+    intermediate points are the same as those of Geod.npts() for each segment.
+    On a sphere they are computed directly by numpy, otherwise by one
+    vectorised call of pyproj.
+
+    Arguments:
+    lons, lats -- coordinates of the points of the path
+    npoints -- number of intermediate points of each segment
+    geod -- pyproj.Geod instance, defaults to the WGS84 ellipsoid
+
+    Returns two arrays lons, lats of all points of the path.
+    """
+    geod = __PR if geod is None else geod
+    lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+    segments, fractions = _segment_fractions(npoints)
+    r_lons = np.concatenate([lons[:1], lons[segments + 1]])
+    r_lats = np.concatenate([lats[:1], lats[segments + 1]])
+    inner = fractions < 1
+    if geod.sphere and inner.any():
+        i_lons, i_lats, undefined = _great_circle_points(lons, lats, segments[inner], fractions[inner])
+        r_lons[1:][inner], r_lats[1:][inner] = i_lons, i_lats
+        # only the segments between antipodal points are left to pyproj
+        inner[inner] = undefined
+    if inner.any():
+        azimuths, _, distances = _call_vectorised(geod.inv, lons[:-1], lats[:-1], lons[1:], lats[1:])
+        idcs = segments[inner]
+        r_lons[1:][inner], r_lats[1:][inner], _ = _call_vectorised(
+            geod.fwd, lons[idcs], lats[idcs], azimuths[idcs], distances[idcs] * fractions[inner])
+    return r_lons, r_lats
+
+
+def _segment_distances(vectors, starts, ends):
+    """
+    Returns the distances in km of the points given as unit vectors to the great circle
+    segments between the unit vectors starts and ends.
+    """
+    to_ends = np.minimum(np.arccos(np.clip((vectors * starts).sum(axis=1), -1, 1)),
+                         np.arccos(np.clip((vectors * ends).sum(axis=1), -1, 1)))
+    normals = np.cross(starts, ends)
+    norms = np.linalg.norm(normals, axis=1)
+    degenerate = norms < 1e-12
+    normals /= np.where(degenerate, 1, norms)[:, np.newaxis]
+    sin_distances = (vectors * normals).sum(axis=1)
+    # points whose projection onto the great circle lies between start and end are closest to its inner part
+    projections = vectors - sin_distances[:, np.newaxis] * normals
+    inner = (~degenerate & ((np.cross(starts, projections) * normals).sum(axis=1) >= 0) &
+             ((np.cross(projections, ends) * normals).sum(axis=1) >= 0))
+    return EARTH_RADIUS_KM * np.where(inner, np.arcsin(np.minimum(np.abs(sin_distances), 1)), to_ends)
+
+
+def decimate_path(lats, lons, max_points, tolerance):
+    """
+    Selects the points of a path to keep when reducing it to max_points points.
+
+    The points are chosen like by the Douglas-Peucker algorithm on great circles,
+    i.e. segments of the reduced path are split at their point farthest from
+    them, the segments deviating most first. All segments of the reduced path
+    are handled at once in every step. Additional points are kept until no
+    removed point is farther than tolerance km from the reduced path. The first
+    and last point are always kept, as are points with non-finite coordinates
+    and their neighbours, so the path is decimated separately between them.
+
+    Arguments:
+    lats, lons -- coordinates of the points of the path
+    max_points -- number of points of the reduced path, 0 keeps all points
+    tolerance -- maximum distance in km of removed points to the reduced path
+
+    Returns the sorted indices of the kept points.
+    """
+    if not max_points >= 0:
+        raise ValueError(f"The number of points to keep must not be negative, not '{max_points}'.")
+    if not tolerance >= 0:
+        raise ValueError(f"The tolerance must not be negative, not '{tolerance}'.")
+    with np.errstate(invalid="ignore"):
+        vectors = _unit_vectors(lons, lats)
+    if max_points == 0 or len(vectors) <= max(max_points, 2):
+        return np.arange(len(vectors))
+    invalid = np.flatnonzero(~np.isfinite(vectors).all(axis=1))
+    keep = np.union1d([0, len(vectors) - 1], np.clip(np.concatenate([invalid - 1, invalid, invalid + 1]),
+                                                     0, len(vectors) - 1))
+    while True:
+        segments = np.minimum(np.searchsorted(keep, np.arange(len(vectors)), side="right") - 1, len(keep) - 2)
+        distances = _segment_distances(vectors, vectors[keep[segments]], vectors[keep[segments + 1]])
+        distances[keep] = 0
+        # the first point of every segment with the largest distance to it
+        deviations = np.maximum.reduceat(distances, keep[:-1])
+        candidates = np.flatnonzero(distances == deviations[segments])
+        _, first = np.unique(segments[candidates], return_index=True)
+        farthest = candidates[first]
+        deviations = distances[farthest]
+        split = deviations > tolerance
+        if not split.any():
+            # all points are within the tolerance, the farthest ones are added up to max_points
+            others = np.flatnonzero(deviations > 0)
+            split[others[np.argsort(-deviations[others], kind="stable")[:max(max_points - len(keep), 0)]]] = True
+            if not split.any():
+                return keep
+        keep = np.union1d(keep, farthest[split])
+
+
 def latlon_points(lat0, lon0, lat1, lon1, numpoints=100, connection='linear'):
     """
     Compute intermediate points between two given points.
@@ -318,17 +561,15 @@ def path_points(lats, lons, numpoints=100, times=None, alts=None, connection='li
 
     # First compute the lengths of the individual path segments, i.e.
     # the distances between the points.
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
     if connection == 'linear':
-        lats, lons = np.asarray(lats), np.asarray(lons)
         distances = np.hypot(lats[:-1] - lats[1:], lons[:-1] - lons[1:])
     else:
-        distances = [
-            get_distance(lats[i], lons[i], lats[i + 1], lons[i + 1])
-            for i in range(len(lats) - 1)]
+        distances = _get_distances(lats[:-1], lons[:-1], lats[1:], lons[1:])
 
     # Compute the total length of the path and the length of the point
     # segments to be computed.
-    total_length = sum(distances)
+    total_length = distances.sum()
     length_point_segment = total_length / (numpoints + len(lats) - 2)
 
     # If the total length of the path is zero, all given waypoints have the
@@ -344,30 +585,20 @@ def path_points(lats, lons, numpoints=100, times=None, alts=None, connection='li
 
     # For each segment, determine the number of points to be computed
     # from the distance between the two bounding points and the
-    # length of the point segments. Then compute the intermediate
-    # points. Cut the first point from each segment other than the
-    # first segment to avoid double points.
-    r_lats, r_lons, r_times, r_alts = [], [], [], []
-    startidx = 0
-    for i in range(len(lats) - 1):
-        segment_points = int(round(distances[i] / length_point_segment))
-        # Enforce that a segment consists of at least two points
-        # (otherwise latlon_points will throw an exception).
-        segment_points = max(segment_points, 2)
-        lats_, lons_ = latlon_points(
-            lats[i], lons[i], lats[i + 1], lons[i + 1],
-            numpoints=segment_points, connection=connection)
-        r_lons.extend(lons_[startidx:])
-        r_lats.extend(lats_[startidx:])
-        if times is not None:
-            r_times.extend(np.linspace(times[i], times[i + 1], segment_points)[startidx:])
-        if alts is not None:
-            r_alts.extend(np.linspace(alts[i], alts[i + 1], segment_points)[startidx:])
-        startidx = 1
+    # length of the point segments. Every segment consists of at least
+    # its two bounding points, which are shared with the neighbouring
+    # segments. The points of all segments are computed at once.
+    segment_points = np.maximum(np.round(distances / length_point_segment).astype(int), 2)
+    segments, fractions = _segment_fractions(segment_points - 2)
+    if connection == 'linear':
+        r_lats = _interpolate_segments(lats, segments, fractions)
+        r_lons = _interpolate_segments(lons, segments, fractions)
+    else:
+        r_lons, r_lats = geodesic_path(lons, lats, segment_points - 2)
 
     result = [r_lats, r_lons]
     if times is not None:
-        result.append(nc.num2date(r_times, "seconds since 2000-01-01"))
+        result.append(nc.num2date(_interpolate_segments(times, segments, fractions), "seconds since 2000-01-01"))
     if alts is not None:
-        result.append(r_alts)
+        result.append(_interpolate_segments(alts, segments, fractions))
     return result
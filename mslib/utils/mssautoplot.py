@@ -25,11 +25,16 @@
     limitations under the License.
 """
 
+import collections
+import concurrent.futures
+import contextlib
 from datetime import datetime, timedelta
 import io
+import itertools
 import logging
 import os
 import sys
+import threading
 
 import click
 import defusedxml.ElementTree as etree
@@ -59,9 +64,66 @@ TEXT_CONFIG = {
     "bbox": dict(boxstyle="round", facecolor="white", alpha=0.5, edgecolor="none"), "fontweight": "bold",
     "zorder": 4, "fontsize": 6, "clip_on": True}
 
+# display time of each frame of animations in milliseconds
+ANIMATION_FRAME_DURATION = 500
+
 mpl_logger = configure_mpl_logger()
 
 
+@contextlib.contextmanager
+def atomic_output(filename):
+    """
+    Context manager yielding a temporary filename to write the content of filename to,
+    which replaces filename only if the block completes.
+    """
+    temporary = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield temporary
+        os.replace(temporary, filename)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporary)
+        raise
+
+
+def unique_names(names, details):
+    """
+    Makes the names unique by appending the details of every name given more than once,
+    e.g. style and elevation, and then numbering those still equal in their order.
+    """
+    counts = collections.Counter(names)
+    names = [name + "".join(f"_{detail}" for detail in details if detail != "") if counts[name] > 1 else name
+             for name, details in zip(names, details)]
+    counts, numbers = collections.Counter(names), collections.Counter()
+    result = []
+    for name in names:
+        if counts[name] > 1:
+            numbers[name] += 1
+            name = f"{name}_{numbers[name]}"
+        result.append(name)
+    return result
+
+
+def save_animation(filenames, filename, kind):
+    """
+    Combines the images filenames into an animated GIF (kind "gif") or PNG (kind "apng")
+    or a sprite sheet with the images side by side (kind "sprite") saved to filename.
+    """
+    frames = [PIL.Image.open(name).convert("RGB") for name in filenames]
+    with atomic_output(filename) as temporary:
+        if kind == "sprite":
+            sheet = PIL.Image.new("RGB", (sum(frame.width for frame in frames), max(frame.height for frame in frames)),
+                                  "white")
+            left = 0
+            for frame in frames:
+                sheet.paste(frame, (left, 0))
+                left += frame.width
+            sheet.save(temporary, format="PNG")
+        else:
+            frames[0].save(temporary, format="GIF" if kind == "gif" else "PNG", save_all=True,
+                           append_images=frames[1:], duration=ANIMATION_FRAME_DURATION, loop=0)
+
+
 def load_from_ftml(filename):
     """Load a flight track from an XML file at <filename>.
     """
@@ -78,6 +140,9 @@ def load_from_ftml(filename):
 
 
 class Plotting:
+    # matplotlib is not thread-safe, so the figures of all workers are drawn one after another
+    draw_lock = threading.Lock()
+
     def __init__(self, cpath):
         read_config_file(cpath)
         self.config = config_loader()
@@ -95,8 +160,37 @@ class Plotting:
             sys.exit("Invalid SECTION and/or CRS")
         self.params["basemap"].update(self.config["predefined_map_sections"][section]["map"])
         self.bbox_units = self.params["bbox"]
+        self.wms = {}
+        # the flight track drawn by the last call of draw, all other parts of the figure but the map stay the same
+        self.drawn_filename = None
         self.read_ftml(filename)
 
+    def get_wms(self, url):
+        """
+        Returns the (cached) web map service at url, whose requests share one pooled session
+        """
+        if url not in self.wms:
+            auth_username, auth_password = get_auth_from_url_and_name(url, self.config["MSS_auth"])
+            self.wms[url] = MSUIWebMapService(url,
+                                              username=auth_username,
+                                              password=auth_password,
+                                              version='1.3.0')
+        return self.wms[url]
+
+    def get_image(self, url, kwargs):
+        """
+        Returns the map retrieved from the web map service at url as PIL image
+        """
+        img = self.get_wms(url).getmap(**kwargs)
+        return PIL.Image.open(io.BytesIO(img.read()))
+
+    def savefig(self, filename, **kwargs):
+        """
+        Saves the figure to filename, which is replaced only once the new image is complete
+        """
+        with atomic_output(filename) as temporary:
+            self.fig.savefig(temporary, format="png", **kwargs)
+
     def read_ftml(self, filename):
         dirpath = "./"
         file_path = os.path.join(dirpath, filename)
@@ -133,10 +227,22 @@ class TopViewPlotting(Plotting):
         self.plotter.update_from_waypoints(self.wp_model_data)
         self.plotter.redraw_path(waypoints_model_data=self.wp_model_data)
 
-    def draw(self, flight, section, vertical, filename, init_time, time, url, layer, style, elevation, no_of_plots):
-        self.update_path(filename)
-
-        width, height = self.myfig.get_plot_size_in_px()
+    def draw_image(self, img):
+        """
+        Shows img as map, the figure is redrawn only when saved
+        """
+        if self.myfig.map.image is None:
+            self.myfig.draw_image(img)
+        else:
+            self.myfig.map.image.set_data(img)
+
+    def draw(self, flight, section, vertical, filename, init_time, time, url, layer, style, elevation, no_of_plots,
+             output=None):
+        with self.draw_lock:
+            if filename != self.drawn_filename:
+                self.update_path(filename)
+                self.drawn_filename = filename
+            width, height = self.myfig.get_plot_size_in_px()
         self.bbox = self.params['basemap']
         if not init_time:
             init_time = None
@@ -155,17 +261,10 @@ class TopViewPlotting(Plotting):
                   "size": (width, height)
                 }
 
-        auth_username, auth_password = get_auth_from_url_and_name(url, self.config["MSS_auth"])
-        wms = MSUIWebMapService(url,
-                                username=auth_username,
-                                password=auth_password,
-                                version='1.3.0')
-
-        img = wms.getmap(**kwargs)
-        image_io = io.BytesIO(img.read())
-        img = PIL.Image.open(image_io)
-        self.myfig.draw_image(img)
-        self.myfig.fig.savefig(f"{flight}_{layer}_{no_of_plots}.png")
+        img = self.get_image(url, kwargs)
+        with self.draw_lock:
+            self.draw_image(img)
+            self.savefig(output or f"{flight}_{layer}_{no_of_plots}.png")
 
 
 class SideViewPlotting(Plotting):
@@ -194,9 +293,10 @@ class SideViewPlotting(Plotting):
         self.myfig.redraw_xaxis(self.lats, self.lons, times, times_visible)
 
     def update_path(self, filename=None):
-        self.setup()
+        # the axes are set up for the new flight track
         if filename is not None:
             self.read_ftml(filename)
+        self.setup()
         self.fig.canvas.draw()
         self.plotter.update_from_waypoints(self.wp_model_data)
         indices = list(zip(self.intermediate_indexes, self.wp_press))
@@ -205,9 +305,24 @@ class SideViewPlotting(Plotting):
         highlight = [[wp[0], wp[1]] for wp in self.wps]
         self.myfig.draw_vertical_lines(highlight, self.lats, self.lons)
 
-    def draw(self, flight, section, vertical, filename, init_time, time, url, layer, style, elevation, no_of_plots):
-        self.update_path(filename)
-        width, height = self.myfig.get_plot_size_in_px()
+    def draw_image(self, img):
+        """
+        Shows img as vertical section, the figure is redrawn only when saved
+        """
+        if self.myfig.image is None:
+            self.myfig.draw_image(img)
+        else:
+            self.myfig.image.set_data(img)
+            self.myfig.imgax.set_xlim(0, img.size[0] - 1)
+            self.myfig.imgax.set_ylim(img.size[1] - 1, 0)
+
+    def draw(self, flight, section, vertical, filename, init_time, time, url, layer, style, elevation, no_of_plots,
+             output=None):
+        with self.draw_lock:
+            if filename != self.drawn_filename:
+                self.update_path(filename)
+                self.drawn_filename = filename
+            width, height = self.myfig.get_plot_size_in_px()
         p_bot, p_top = [float(x) * 100 for x in vertical.split(",")]
         self.bbox = tuple([x for x in (self.num_interpolation_points,
                           p_bot / 100, self.num_labels, p_top / 100)]
@@ -227,18 +342,10 @@ class SideViewPlotting(Plotting):
                   "format": "image/png",
                   "size": (width, height)
                 }
-        auth_username, auth_password = get_auth_from_url_and_name(url, self.config["MSS_auth"])
-        wms = MSUIWebMapService(url,
-                                username=auth_username,
-                                password=auth_password,
-                                version='1.3.0')
-
-        img = wms.getmap(**kwargs)
-
-        image_io = io.BytesIO(img.read())
-        img = PIL.Image.open(image_io)
-        self.myfig.draw_image(img)
-        self.myfig.fig.savefig(f"{flight}_{layer}_{no_of_plots}.png", bbox_inches='tight')
+        img = self.get_image(url, kwargs)
+        with self.draw_lock:
+            self.draw_image(img)
+            self.savefig(output or f"{flight}_{layer}_{no_of_plots}.png", bbox_inches='tight')
 
 
 class LinearViewPlotting(Plotting):
@@ -266,11 +373,7 @@ class LinearViewPlotting(Plotting):
                 if not init_time:
                     init_time = None
 
-                auth_username, auth_password = get_auth_from_url_and_name(url, self.config["MSS_auth"])
-                wms = MSUIWebMapService(url,
-                                        username=auth_username,
-                                        password=auth_password,
-                                        version='1.3.0')
+                wms = self.get_wms(url)
 
                 path_string = ""
                 for i, wp in enumerate(self.wps):
@@ -307,6 +410,49 @@ class LinearViewPlotting(Plotting):
                 self.myfig.fig.savefig(f"{flight}_{layer}.png", bbox_inches='tight')
 
 
+def draw_plot(plotting, plot):
+    """
+    Draws one plot given as tuple of the arguments of plotting.draw, reports the outcome and
+    returns whether the plot was saved
+    """
+    layer = plot[7]
+    try:
+        plotting.draw(*plot)
+    except Exception as e:
+        if "times" in str(e):
+            print("Invalid times and/or levels requested")
+        elif "LAYER" in str(e):
+            print("Invalid LAYER '{}' requested".format(layer))
+        elif "404 Client Error" or "NOT FOUND for url" in e:
+            print("Invalid STYLE and/or URL requested")
+        else:
+            print(str(e))
+        return False
+    print("Plot downloaded!")
+    return True
+
+
+def draw_plots(plotting_class, cpath, plots, workers=1):
+    """
+    Draws the plots given as tuples of the arguments of plotting_class.draw with a pool of workers.
+
+    Every worker creates its own plotting_class object, i.e. map canvas and web map services,
+    and reuses it for all its plots. While a worker waits for the web map service, the others
+    draw and save their plots. Returns for every plot whether it was saved.
+    """
+    local = threading.local()
+
+    def draw(plot):
+        if not hasattr(local, "plotting"):
+            with Plotting.draw_lock:
+                local.plotting = plotting_class(cpath)
+        return draw_plot(local.plotting, plot)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # re-raises unexpected errors, e.g. of the creation of the plotting objects
+        return list(executor.map(draw, plots))
+
+
 @click.command()
 @click.option('--cpath', default=constants.MSS_AUTOPLOT, help='Path of the configuration file.')
 @click.option('--view', default="top", help='View of the plot (top/side/linear).')
@@ -316,42 +462,37 @@ class LinearViewPlotting(Plotting):
 @click.option('--intv', default=0, help='Time interval.')
 @click.option('--stime', default="", help='Starting time for downloading multiple plots with a fixed interval.')
 @click.option('--etime', default="", help='Ending time for downloading multiple plots with a fixed interval.')
-def main(cpath, view, ftrack, itime, vtime, intv, stime, etime):
+@click.option('--workers', default=4, help='Number of plots downloaded and drawn in parallel.')
+@click.option('--animation', default="none", type=click.Choice(["none", "gif", "apng", "sprite"]),
+              help='Additionally combine the plots of each time series into an animated GIF or PNG or a sprite sheet.')
+def main(cpath, view, ftrack, itime, vtime, intv, stime, etime, workers, animation):
     conf.read_config_file(path=cpath)
     config = conf.config_loader()
     if view == "top":
-        top_view = TopViewPlotting(cpath)
+        plotting_class = TopViewPlotting
         sec = "automated_plotting_hsecs"
     else:
-        side_view = SideViewPlotting(cpath)
+        plotting_class = SideViewPlotting
         sec = "automated_plotting_vsecs"
 
-    def draw(no_of_plots):
-        try:
-            if view == "top":
-                top_view.draw(flight, section, vertical, filename, init_time,
-                              time, url, layer, style, elevation, no_of_plots=no_of_plots)
-            elif view == "side":
-                side_view.draw(flight, section, vertical, filename, init_time,
-                               time, url, layer, style, elevation, no_of_plots=no_of_plots)
-        except Exception as e:
-            if "times" in str(e):
-                print("Invalid times and/or levels requested")
-            elif "LAYER" in str(e):
-                print("Invalid LAYER '{}' requested".format(layer))
-            elif "404 Client Error" or "NOT FOUND for url" in e:
-                print("Invalid STYLE and/or URL requested")
-            else:
-                print(str(e))
-        else:
-            print("Plot downloaded!")
+    plots = []
+    # the number of the flight and section combination of every plot
+    plot_entries = []
+    entries = itertools.count()
+
+    def add_plot(no_of_plots):
+        if view in ("top", "side"):
+            plots.append((flight, section, vertical, filename, init_time,
+                          time, url, layer, style, elevation, no_of_plots))
+            plot_entries.append(entry)
 
     for flight, section, vertical, filename, init_time, time in \
         config["automated_plotting_flights"]:
         for url, layer, style, elevation in config[sec]:
+            entry = next(entries)
             if vtime == "" and stime == "":
                 no_of_plots = 1
-                draw(no_of_plots)
+                add_plot(no_of_plots)
             elif intv == 0:
                 if itime != "":
                     init_time = datetime.strptime(itime, "%Y-%m-%dT" "%H:%M:%S")
@@ -359,7 +500,7 @@ def main(cpath, view, ftrack, itime, vtime, intv, stime, etime):
                 if ftrack != "":
                     flight = ftrack
                 no_of_plots = 1
-                draw(no_of_plots)
+                add_plot(no_of_plots)
             elif intv > 0:
                 if itime != "":
                     init_time = datetime.strptime(itime, "%Y-%m-%dT" "%H:%M:%S")
@@ -372,12 +513,32 @@ def main(cpath, view, ftrack, itime, vtime, intv, stime, etime):
                     if ftrack != "":
                         flight = ftrack
                     no_of_plots = i
-                    draw(no_of_plots)
+                    add_plot(no_of_plots)
                     time = time + timedelta(hours=intv)
                     i = i + 1
             else:
                 raise Exception("Invalid interval")
 
+    # plots of the same flight and layer, e.g. of several elevations, must not overwrite each other
+    outputs = unique_names([f"{plot[0]}_{plot[7]}_{plot[10]}" for plot in plots],
+                           [(plot[8], plot[9]) for plot in plots])
+    plots = [plot + (f"{output}.png",) for plot, output in zip(plots, outputs)]
+    saved = draw_plots(plotting_class, cpath, plots, workers=workers)
+
+    if animation != "none" and intv > 0:
+        # the plots of every flight and section combination, without those that could not be downloaded
+        series, details = {}, {}
+        for entry, plot, plot_saved in zip(plot_entries, plots, saved):
+            series.setdefault(entry, [])
+            details[entry] = (f"{plot[0]}_{plot[7]}", plot[8:10])
+            if plot_saved:
+                series[entry].append(plot[11])
+        suffix = {"gif": ".gif", "apng": ".apng", "sprite": "_sprite.png"}[animation]
+        names = unique_names(*zip(*details.values()))
+        for name, filenames in zip(names, series.values()):
+            if len(filenames) > 0:
+                save_animation(filenames, f"{name}{suffix}", animation)
+
 
 if __name__ == '__main__':
     main()
@@ -47,6 +47,7 @@
 #   -- renamed to ogcwms (2017-04-28)
 #   -- PEP8 review
 #   -- adopted it to the recent 0.14 version https://pypi.python.org/pypi/OWSLib/0.14.0
+#   -- requests share a pooled session per server (2024)
 # ******************************************************************************
 #
 # =============================================================================
@@ -60,6 +61,11 @@ Currently supports only versions 1.1.1/1.3.0 of the WMS protocol.
 import defusedxml.ElementTree as etree
 import requests
 import logging
+import threading
+import urllib.parse
+
+from requests.adapters import HTTPAdapter, Retry
+from urllib3.exceptions import ReadTimeoutError
 
 from owslib.util import ServiceException
 from owslib.etree import ParseError
@@ -67,6 +73,61 @@ from owslib.map import wms111, wms130, common
 from owslib.util import ResponseWrapper, Authentication, strip_bom
 from mslib.utils.config import config_loader
 
+# (mss) requests.Session objects shared by all threads, by server and credentials
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class _Retry(Retry):
+    """
+    Retry which does not repeat requests whose response timed out
+
+    Otherwise a slow GetMap would block for (retries + 1) times the timeout, while
+    connections closed by the server, e.g. idle ones of the pool, are still retried.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if isinstance(error, ReadTimeoutError):
+            raise error.with_traceback(_stacktrace)
+        return super().increment(method=method, url=url, response=response, error=error, _pool=_pool,
+                                 _stacktrace=_stacktrace)
+
+
+def get_session(url, auth=None):
+    """
+    Returns the requests.Session used for all requests to the server of url with the
+    (username, password) tuple auth.
+
+    The session keeps its connections alive, so that subsequent requests do not need
+    a new connection and TLS handshake. Failed connections and temporary server
+    errors of idempotent requests are retried with an exponential backoff, see _Retry.
+    """
+    scheme, netloc = urllib.parse.urlsplit(url)[:2]
+    key = (scheme.lower(), netloc.lower(), auth)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            retries = _Retry(total=config_loader(dataset="WMS_request_retries"),
+                             backoff_factor=config_loader(dataset="WMS_request_backoff_factor"),
+                             status_forcelist=[502, 503, 504], raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config_loader(dataset="WMS_connection_pool_size"),
+                                  max_retries=retries)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+    return session
+
+
+def close_sessions():
+    """
+    Closes all connections of the shared sessions, e.g. after changing their settings
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
 
 def openURL(url_base, data=None, method='Get', cookies=None,
             username=None, password=None,
@@ -79,6 +140,7 @@ def openURL(url_base, data=None, method='Get', cookies=None,
 
     Uses requests library but with additional checks for OGC service exceptions and url formatting.
     Also handles cookies and simple user password authentication.
+    (mss) The requests of all threads to one server share a pooled session, see get_session.
     """
     headers = headers if headers is not None else {}
     rkwargs = {}
@@ -123,12 +185,14 @@ def openURL(url_base, data=None, method='Get', cookies=None,
     if cookies is not None:
         rkwargs['cookies'] = cookies
 
-    req = requests.request(method.upper(),
-                           url_base,
-                           headers=headers,
-                           # MSS
-                           proxies=proxies,
-                           **rkwargs)
+    # (mss) reuse the connections to the server
+    session = get_session(url_base, rkwargs.get('auth'))
+    req = session.request(method.upper(),
+                          url_base,
+                          headers=headers,
+                          # MSS
+                          proxies=proxies,
+                          **rkwargs)
 
     if req.status_code in [400, 401]:
         raise ServiceException(req.text)
@@ -135,7 +135,78 @@ _STANDARD_ATMOSPHERE = [
     (51 * units.km, 270.65 * units.K, 66.9389 * units.Pa, 0.0028 * units.K / units.m),
     (71 * units.km, 214.65 * units.K, 3.95642 * units.Pa, float("NaN") * units.K / units.m)
 ]
-_HEIGHT, _TEMPERATURE, _PRESSURE, _TEMPERATURE_GRADIENT = 0, 1, 2, 3
+
+
+def _isa_coefficients():
+    """
+    Returns the coefficients of the layers of _STANDARD_ATMOSPHERE in SI units by name, such that
+
+    p = p0 * exp(exponent * log(1 - gradient * (z - z0) / t0) - scale * (z - z0))
+    z = z0 + inverse_height * (1 - exp(inverse_exponent * log(p / p0))) - inverse_scale * log(p / p0)
+
+    evaluate the layers with and without temperature gradient alike. The coefficients of
+    the top level are NaN, so that heights above 71km yield NaN.
+    """
+    z0, t0, p0, gamma = (np.array([layer[index].to_base_units().magnitude for layer in _STANDARD_ATMOSPHERE])
+                         for index in range(4))
+    g_rd = (g / Rd).to_base_units().magnitude
+    isothermal = gamma == 0
+    with np.errstate(divide="ignore"):
+        return {
+            "height": z0, "temperature": t0, "pressure": p0, "gradient": gamma,
+            "relative_gradient": gamma / t0,
+            "exponent": np.where(isothermal, 0, g_rd / gamma),
+            "scale": np.where(isothermal, g_rd / t0, 0),
+            "inverse_height": np.where(isothermal, 0, t0 / gamma),
+            "inverse_exponent": np.where(isothermal, 0, gamma / g_rd),
+            "inverse_scale": np.where(isothermal, t0 / g_rd, 0),
+        }
+
+
+_ISA = _isa_coefficients()
+# units resolved once, looking them up in the registry is costlier than the conversions
+_METRE, _PASCAL, _KELVIN, _HECTOFOOT = (units.Unit(name) for name in ("m", "Pa", "K", "hft"))
+_METRES_PER_HECTOFOOT = units.Quantity(1, _HECTOFOOT).m_as(_METRE)
+
+
+def _height_layer(height):
+    """
+    Index of the layer of height (m) in _ISA. The lowest layer extends below 0km,
+    heights above 71km or NaN get the index of the top level.
+    """
+    return np.searchsorted(_ISA["height"][1:], height, side="right")
+
+
+def _flightlevel2pressure(height):
+    """
+    flightlevel2pressure for heights (m) without units, returns pressure (Pa)
+    """
+    layer = _height_layer(height)
+    dz = height - _ISA["height"].take(layer)
+    with np.errstate(invalid="ignore"):
+        return _ISA["pressure"].take(layer) * np.exp(
+            _ISA["exponent"].take(layer) * np.log1p(-_ISA["relative_gradient"].take(layer) * dz) -
+            _ISA["scale"].take(layer) * dz)
+
+
+def _pressure2flightlevel(pressure):
+    """
+    pressure2flightlevel for pressures (Pa) without units, returns height (m)
+    """
+    # the pressure decreases from layer to layer
+    layer = np.searchsorted(-_ISA["pressure"][1:], -np.asarray(pressure), side="right")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_p = np.log(pressure / _ISA["pressure"].take(layer))
+        return (_ISA["height"].take(layer) - _ISA["inverse_scale"].take(layer) * log_p -
+                _ISA["inverse_height"].take(layer) * np.expm1(_ISA["inverse_exponent"].take(layer) * log_p))
+
+
+def _isa_temperature(height):
+    """
+    isa_temperature for heights (m) without units, returns temperature (K)
+    """
+    layer = _height_layer(height)
+    return _ISA["temperature"].take(layer) - _ISA["gradient"].take(layer) * (height - _ISA["height"].take(layer))
 
 
 @preprocess_and_wrap(wrap_like='height')
@@ -165,28 +236,11 @@ def flightlevel2pressure(height):
               p_0 \cdot \exp\left(\frac{-g \cdot (Z - Z_0)}{R \cdot T_0}\right) &\text{else}
               \end{cases}
     """
-    is_array = hasattr(height.magnitude, "__len__")
-    if not is_array:
-        height = [height.magnitude] * height.units
-
-    # Initialize the return array.
-    p = np.full_like(height, np.nan) * units.Pa
-
-    for i, ((z0, t0, p0, gamma), (z1, t1, p1, _)) in enumerate(zip(_STANDARD_ATMOSPHERE[:-1],
-                                                                   _STANDARD_ATMOSPHERE[1:])):
-        indices = (height >= z0) & (height < z1)
-        if i == 0:
-            indices |= height < z0
-        if gamma != 0:
-            p[indices] = p0 * ((t0 - gamma * (height[indices] - z0)) / t0) ** (g / (gamma * Rd))
-        else:
-            p[indices] = p0 * np.exp(-g * (height[indices] - z0) / (Rd * t0))
-
+    p = _flightlevel2pressure(height.m_as(_METRE))
     if np.isnan(p).any():
         raise ValueError("flight level to pressure conversion not "
                          "implemented for z > 71km")
-
-    return p if is_array else p[0]
+    return units.Quantity(p, _PASCAL)
 
 
 @preprocess_and_wrap(wrap_like='pressure')
@@ -216,29 +270,11 @@ def pressure2flightlevel(pressure):
               Z_0 - \frac{R \cdot T_0}{g \cdot \log(\frac{p}{p_0})} &\text{else}
               \end{cases}
     """
-    is_array = hasattr(pressure.magnitude, "__len__")
-    if not is_array:
-        pressure = [pressure.magnitude] * pressure.units
-
-    # Initialize the return array.
-    z = np.full_like(pressure, np.nan) * units.hft
-
-    for i, ((z0, t0, p0, gamma), (z1, t1, p1, _)) in enumerate(zip(_STANDARD_ATMOSPHERE[:-1],
-                                                                   _STANDARD_ATMOSPHERE[1:])):
-        p1 = _STANDARD_ATMOSPHERE[i + 1][_PRESSURE]
-        indices = (pressure > p1) & (pressure <= p0)
-        if i == 0:
-            indices |= (pressure >= p0)
-        if gamma != 0:
-            z[indices] = z0 + 1. / gamma * (t0 - t0 * np.exp(gamma * Rd / g * np.log(pressure[indices] / p0)))
-        else:
-            z[indices] = z0 - (Rd * t0) / g * np.log(pressure[indices] / p0)
-
+    z = _pressure2flightlevel(pressure.m_as(_PASCAL))
     if np.isnan(z).any():
         raise ValueError("flight level to pressure conversion not "
                          "implemented for z > 71km")
-
-    return z if is_array else z[0]
+    return units.Quantity(z / _METRES_PER_HECTOFOOT, _HECTOFOOT)
 
 
 @preprocess_and_wrap(wrap_like='height')
@@ -256,13 +292,11 @@ def isa_temperature(height):
     Returns:
         temperature (K)
     """
-    for i, ((z0, t0, p0, gamma), (z1, t1, p1, _)) in enumerate(zip(_STANDARD_ATMOSPHERE[:-1],
-                                                                   _STANDARD_ATMOSPHERE[1:])):
-        if ((i == 0) and (height < z0)) or (z0 <= height < z1):
-            return t0 - gamma * (height - z0)
-
-    raise ValueError("ISA temperature from flight level not "
-                     "implemented for z > 71km")
+    t = _isa_temperature(height.m_as(_METRE))
+    if np.isnan(t).any():
+        raise ValueError("ISA temperature from flight level not "
+                         "implemented for z > 71km")
+    return units.Quantity(t, _KELVIN)
 
 
 def convert_pressure_to_vertical_axis_measure(vertical_axis, pressure):
@@ -26,9 +26,11 @@
     limitations under the License.
 """
 
+import functools
 import logging
 
 from metpy.units import units, check_units  # noqa
+import numpy as np
 import pint
 
 # ToDo send PR with our units to pint
@@ -94,21 +96,51 @@ except pint.errors.RedefinitionError:
     pass
 
 
-def convert_to(value, from_unit, to_unit, default=1.):
+def _linearise(convert):
+    """
+    Returns a function equivalent to convert, which maps magnitudes with pint, as
+    value * scale + offset if convert is affine, or convert itself otherwise
+    """
+    with np.errstate(all="ignore"):
+        offset = convert(0.)
+        scale = convert(1.) - offset
+        if not (np.isfinite(offset) and np.isfinite(scale) and
+                np.isclose(convert(10.), 10. * scale + offset, rtol=1e-12, atol=0)):
+            return convert
+    if offset == 0 and scale == 1:
+        # keeps integer values integer, as pint does
+        return lambda value: value * 1
+    if offset == 0:
+        return lambda value: value * scale
+    return lambda value: value * scale + offset
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_converter(from_unit, to_unit):
+    """
+    Returns a function converting magnitudes from from_unit to to_unit, or None and the
+    warning to log if the units cannot be converted. Cached, as pint resolves the unit
+    strings and conversion factors anew for every Quantity.
+    """
     try:
-        value_unit = units.Quantity(value, from_unit)
-        result = value_unit.to(to_unit).magnitude
+        return _linearise(lambda value: units.Quantity(value, from_unit).to(to_unit).magnitude), None
     except pint.UndefinedUnitError:
-        logging.warning("Error in unit conversion (undefined) '%s'/'%s'", from_unit, to_unit)
-        result = value * default
+        return None, "Error in unit conversion (undefined) '%s'/'%s'"
     except pint.DimensionalityError:
         if units(to_unit).to_base_units().units == units.m:
             try:
-                result = (value_unit / units.Quantity(9.81, "m s^-2")).to(to_unit).magnitude
+                return _linearise(lambda value: (units.Quantity(value, from_unit) /
+                                                 units.Quantity(9.81, "m s^-2")).to(to_unit).magnitude), None
             except pint.DimensionalityError:
-                logging.warning("Error in unit conversion (dimensionality) '%s'/'%s'", from_unit, to_unit)
-                result = value * default
-        else:
-            logging.warning("Error in unit conversion (dimensionality) '%s'/'%s'", from_unit, to_unit)
-            result = value * default
-    return result
+                pass
+        return None, "Error in unit conversion (dimensionality) '%s'/'%s'"
+
+
+def convert_to(value, from_unit, to_unit, default=1.):
+    converter, warning = _get_converter(from_unit, to_unit)
+    if converter is None:
+        logging.warning(warning, from_unit, to_unit)
+        return value * default
+    if isinstance(value, (list, tuple)):
+        value = np.asarray(value)
+    return converter(value)
@@ -53,6 +53,31 @@ class Test_Chat_Manager:
                                           reply_id=None)
             assert message.text == 'some message'
 
+    def test_get_messages(self):
+        with self.app.test_client():
+            message_ids = []
+            for index in range(5):
+                message = self.cm.add_message(self.user, f'message {index}',
+                                              self.operation.id, message_type=MessageType.TEXT,
+                                              reply_id=None)
+                message_ids.append(message.id)
+            self.cm.add_message(self.user, 'a reply', self.operation.id, reply_id=message_ids[0])
+            messages = self.cm.get_messages(self.operation.id)
+            assert [message["id"] for message in messages] == message_ids
+            assert [reply["text"] for reply in messages[0]["replies"]] == ['a reply']
+            # newest page first, then backwards by cursor
+            messages = self.cm.get_messages(self.operation.id, limit=2)
+            assert [message["id"] for message in messages] == message_ids[3:]
+            messages = self.cm.get_messages(self.operation.id, limit=2, before_id=message_ids[3])
+            assert [message["id"] for message in messages] == message_ids[1:3]
+            messages = self.cm.get_messages(self.operation.id, limit=2, before_id=message_ids[1])
+            assert [message["id"] for message in messages] == message_ids[:1]
+            # forwards from a cursor
+            messages = self.cm.get_messages(self.operation.id, limit=2, after_id=message_ids[0])
+            assert [message["id"] for message in messages] == message_ids[1:3]
+            messages = self.cm.get_messages(self.operation.id, after_id=message_ids[2])
+            assert [message["id"] for message in messages] == message_ids[3:]
+
     def test_edit_messages(self):
         with self.app.test_client():
             message = self.cm.add_message(self.user, 'some test message',
@@ -25,9 +25,11 @@
     limitations under the License.
 """
 import datetime
+import git
 import pytest
 import os
 
+from flask import g
 from werkzeug.datastructures import FileStorage
 
 from mslib.mscolab.models import Operation, User
@@ -222,6 +224,21 @@ class Test_FileManager:
             assert self.fm.auth_type(self.user.id, operation.id) != "collaborator"
             assert self.fm.auth_type(self.user.id, operation.id) == "creator"
 
+    def test_permission_cache(self):
+        with self.app.test_client():
+            flight_path, operation = self._create_operation(flight_path="cached")
+            g.permission_cache = {}
+            assert self.fm.is_creator(self.user.id, operation.id) is True
+            assert g.permission_cache == {(self.user.id, str(operation.id)): "creator"}
+            assert self.fm.is_admin(self.user.id, operation.id) is False
+            assert self.fm.is_member(self.vieweruser.id, operation.id) is False
+            assert g.permission_cache[(self.vieweruser.id, str(operation.id))] is None
+            # changing permissions drops the request local access levels
+            assert self.fm.add_bulk_permission(operation.id, self.user, [self.vieweruser.id], "viewer")
+            assert g.permission_cache == {}
+            assert self.fm.is_viewer(self.vieweruser.id, operation.id) is True
+            g.pop("permission_cache")
+
     def test_update_operation(self):
         with self.app.test_client():
             flight_path, operation = self._create_operation(flight_path='operation3')
@@ -316,6 +333,45 @@ class Test_FileManager:
             all_changes = self.fm.get_all_changes(operation.id, self.user)
             assert self.fm.get_change_content(all_changes[1]["id"], self.user) == self.content1
 
+    def test_get_all_changes_pages(self):
+        with self.app.test_client():
+            flight_path, operation = self._create_operation(flight_path="operation8")
+            for content in (self.content1, self.content2, self.content1):
+                assert self.fm.save_file(operation.id, content, self.user)
+            all_changes = self.fm.get_all_changes(operation.id, self.user)
+            page = self.fm.get_all_changes(operation.id, self.user, limit=2)
+            assert page == all_changes[:2]
+            assert self.fm.get_all_changes(operation.id, self.user, limit=2, before_id=page[-1]["id"]) == \
+                all_changes[2:]
+
+    def test_get_change_content_packed(self, monkeypatch):
+        monkeypatch.setattr(mscolab_settings, "GIT_GC_INTERVAL", 2)
+        with self.app.test_client():
+            flight_path, operation = self._create_operation(flight_path="operation8")
+            assert self.fm.save_file(operation.id, self.content1, self.user)
+            assert self.fm.save_file(operation.id, self.content2, self.user)
+            # packed in the background
+            self.fm.packing_threads[operation.id].join(30)
+            repo = git.Repo(os.path.join(mscolab_settings.OPERATIONS_DATA, operation.path))
+            assert repo.git.count_objects("-v").splitlines()[0] == "count: 0"
+            all_changes = self.fm.get_all_changes(operation.id, self.user)
+            assert self.fm.get_change_content(all_changes[0]["id"], self.user) == self.content2
+            assert self.fm.get_change_content(all_changes[1]["id"], self.user) == self.content1
+
+    def test_get_change_diff(self):
+        with self.app.test_client():
+            flight_path, operation = self._create_operation(flight_path="operation8")
+            assert self.fm.save_file(operation.id, self.content1, self.user)
+            assert self.fm.save_file(operation.id, self.content2, self.user)
+            new_change, old_change = self.fm.get_all_changes(operation.id, self.user)
+            diff = self.fm.get_change_diff(old_change["id"], new_change["id"], self.user)
+            assert [(hunk["tag"], hunk["old_start"], hunk["old_end"]) for hunk in diff] == [("delete", 2, 5)]
+            assert [waypoint["location"] for waypoint in diff[0]["old"]] == ["Shannon", "EDMO", "C"]
+            # compared to the current version
+            assert self.fm.get_change_diff(old_change["id"], None, self.user) == diff
+            assert self.fm.get_change_diff(new_change["id"], None, self.user) == []
+            assert self.fm.get_change_diff(old_change["id"], new_change["id"], self.vieweruser) is False
+
     def test_set_version_name(self):
         with self.app.test_client():
             flight_path, operation = self._create_operation(flight_path="operation8")
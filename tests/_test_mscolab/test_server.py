@@ -114,6 +114,25 @@ class Test_Server:
             response = test_client.get('/test_authorized', data={"token": "effsdfs"})
             assert response.data.decode('utf-8') == "False"
 
+    def test_authorized_from_token_cache(self):
+        assert add_user(self.userdata[0], self.userdata[1], self.userdata[2])
+        with self.app.test_client() as test_client:
+            token = self._get_token(test_client, self.userdata)
+            response = test_client.get('/user', data={"token": token})
+            assert response.status_code == 200
+            user = self.fm.user_cache.get(token)
+            assert user is not None
+            assert user.username == self.userdata[1]
+            response = test_client.get('/user', data={"token": token})
+            data = json.loads(response.data.decode('utf-8'))
+            assert data["user"]["username"] == self.userdata[1]
+            # an account change drops the cached user
+            assert self.fm.modify_user(user, attribute="username", value="UV11")
+            assert self.fm.user_cache.get(token) is None
+            response = test_client.get('/user', data={"token": token})
+            data = json.loads(response.data.decode('utf-8'))
+            assert data["user"]["username"] == "UV11"
+
     def test_user_register_handler(self):
         with self.app.test_client() as test_client:
             response = test_client.post('/register', data={"email": self.userdata[0],
@@ -191,6 +210,30 @@ class Test_Server:
             data = json.loads(response.data.decode('utf-8'))
             assert data["messages"] == []
 
+    def test_messages_pagination(self):
+        assert add_user(self.userdata[0], self.userdata[1], self.userdata[2])
+        with self.app.test_client() as test_client:
+            operation, token = self._create_operation(test_client, self.userdata)
+            user = get_user(self.userdata[0])
+            message_ids = [self.sockio.sm.cm.add_message(user, f"message {index}", operation.id).id
+                           for index in range(3)]
+            response = test_client.get('/messages', data={"token": token,
+                                                          "op_id": operation.id,
+                                                          "limit": 2})
+            assert response.status_code == 200
+            data = json.loads(response.data.decode('utf-8'))
+            assert [message["id"] for message in data["messages"]] == message_ids[1:]
+            response = test_client.get('/messages', data={"token": token,
+                                                          "op_id": operation.id,
+                                                          "limit": 2,
+                                                          "before_id": message_ids[1]})
+            data = json.loads(response.data.decode('utf-8'))
+            assert [message["text"] for message in data["messages"]] == ["message 0"]
+            for arguments in ({"limit": "two"}, {"limit": 0}, {"limit": -1}, {"before_id": "x"}, {"after_id": -5}):
+                response = test_client.get('/messages', data=dict(arguments, token=token, op_id=operation.id))
+                assert response.status_code == 400
+                assert json.loads(response.data.decode('utf-8'))["success"] is False
+
     def test_message_attachment(self):
         assert add_user(self.userdata[0], self.userdata[1], self.userdata[2])
         with self.app.test_client() as test_client:
@@ -306,6 +349,14 @@ class Test_Server:
             assert all_changes[0]["id"] > all_changes[1]["id"]
             assert all_changes[0]["created_at"] > all_changes[1]["created_at"]
 
+            response = test_client.get('/get_all_changes', data={"token": token, "op_id": operation.id,
+                                                                 "limit": 1, "before_id": all_changes[0]["id"]})
+            assert json.loads(response.data.decode('utf-8'))["changes"] == all_changes[1:]
+            for arguments in ({"limit": "one"}, {"limit": 0}, {"before_id": -1}):
+                response = test_client.get('/get_all_changes',
+                                           data=dict(arguments, token=token, op_id=operation.id))
+                assert response.status_code == 400
+
     def test_get_change_content(self):
         assert add_user(self.userdata[0], self.userdata[1], self.userdata[2])
         with self.app.test_client() as test_client:
@@ -326,6 +377,24 @@ class Test_Server:
             data = json.loads(response.data.decode('utf-8'))
             assert data == {'content': XML_CONTENT1}
 
+    def test_get_change_diff(self):
+        assert add_user(self.userdata[0], self.userdata[1], self.userdata[2])
+        with self.app.test_client() as test_client:
+            operation, token = self._create_operation(test_client, self.userdata)
+            user = self._save_content(operation, self.userdata)
+            assert self.fm.save_file(operation.id, XML_CONTENT2, user)
+            new_change, old_change = self.fm.get_all_changes(operation.id, user)
+            response = test_client.get('/get_change_diff', data={"token": token,
+                                                                 "ch_id": old_change["id"],
+                                                                 "other_ch_id": new_change["id"]})
+            assert response.status_code == 200
+            diff = json.loads(response.data.decode('utf-8'))["diff"]
+            assert diff == self.fm.get_change_diff(old_change["id"], new_change["id"], user)
+            assert len(diff) > 0
+            response = test_client.get('/get_change_diff', data={"token": token,
+                                                                 "ch_id": new_change["id"]})
+            assert json.loads(response.data.decode('utf-8')) == {"diff": []}
+
     def test_set_version_name(self):
         assert add_user(self.userdata[0], self.userdata[1], self.userdata[2])
         with self.app.test_client() as test_client:
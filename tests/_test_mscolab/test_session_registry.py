@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+
+    tests._test_mscolab.test_session_registry
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    tests for the socket session registries
+
+    This file is part of MSS.
+
+    :copyright: Copyright 2024 by the MSS team, see AUTHORS.
+    :license: APACHE-2.0, see LICENSE for details.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import mock
+import pytest
+
+from mslib.mscolab.session_registry import MemorySessionRegistry, RedisSessionRegistry, create_session_registry
+
+
+def _redis_registries():
+    fakeredis = pytest.importorskip("fakeredis")
+    # two registries on one server behave like two MSColab processes sharing a store
+    server = fakeredis.FakeServer()
+    return (RedisSessionRegistry(fakeredis.FakeRedis(server=server, decode_responses=True)),
+            RedisSessionRegistry(fakeredis.FakeRedis(server=server, decode_responses=True)))
+
+
+@pytest.fixture(params=["memory", "redis"])
+def registries(request):
+    if request.param == "memory":
+        registry = MemorySessionRegistry()
+        return registry, registry
+    return _redis_registries()
+
+
+def test_create_session_registry():
+    assert isinstance(create_session_registry(), MemorySessionRegistry)
+
+
+def test_sessions(registries):
+    registry, other = registries
+    registry.add_session("s1", 5)
+    other.add_session("s2", 5)
+    registry.add_session("s3", 7)
+    assert other.get_user_id("s1") == 5
+    assert registry.get_user_id("s3") == 7
+    assert registry.get_user_id("unknown") is None
+    assert registry.get_session_ids(5) == {"s1", "s2"}
+    assert other.remove_session("s1") == 5
+    assert registry.get_session_ids(5) == {"s2"}
+    assert registry.remove_session("s1") is None
+    assert registry.remove_session("s2") == 5
+    assert other.get_session_ids(5) == set()
+
+
+def test_active_users(registries):
+    registry, other = registries
+    assert registry.add_active_user(1, 5) == 1
+    assert other.add_active_user(1, 7) == 2
+    assert other.add_active_user(2, 5) == 1
+    assert registry.get_active_users(1) == {5, 7}
+    assert other.get_active_users_per_operation() == {1: {5, 7}, 2: {5}}
+    assert registry.remove_active_user(1, 7) == 1
+    assert registry.remove_active_user(1, 7) is None
+    assert other.remove_active_user_from_all(5) == {1: 0, 2: 0}
+    assert registry.get_active_users(1) == set()
+    assert registry.get_active_users_per_operation() == {}
+
+
+def test_remove_active_user_concurrently():
+    registry, other = _redis_registries()
+    registry.add_active_user(1, 5)
+    transaction = registry.client.transaction
+
+    def interrupted_transaction(func, *watches, **kwargs):
+        def interrupted(pipe):
+            result = func(pipe)
+            if not added:
+                # another process adds a user after the users were read
+                added.append(other.add_active_user(1, 7))
+            return result
+        return transaction(interrupted, *watches, **kwargs)
+
+    added = []
+    with mock.patch.object(registry.client, "transaction", interrupted_transaction):
+        assert registry.remove_active_user(1, 5) == 1
+    assert added == [2]
+    assert other.get_active_users_per_operation() == {1: {7}}
@@ -32,9 +32,10 @@ from fs.tempfs import TempFS
 from mslib.mscolab.conf import mscolab_settings
 from mslib.mscolab.models import Operation, Message, MessageType, User
 from mslib.mscolab.seed import add_user, get_user
-from mslib.mscolab.utils import (get_recent_op_id, get_session_id,
+from mslib.mscolab.utils import (get_recent_op_id,
                                  get_message_dict, create_files,
-                                 os_fs_create_dir, get_user_id)
+                                 os_fs_create_dir, AuthTokenCache,
+                                 stream_json_list, get_waypoints, diff_waypoints)
 
 
 class Test_Utils:
@@ -59,13 +60,29 @@ class Test_Utils:
             op_id = get_recent_op_id(self.fm, anotheruser)
             assert op_id is None
 
-    def test_get_session_id(self):
-        sockets = [{"u_id": 5, "s_id": 100}]
-        assert get_session_id(sockets, 5) == 100
-
-    def test_get_user_id(self):
-        sockets = [{"u_id": 9, "s_id": 101}]
-        assert get_user_id(sockets, 101) == 9
+    def test_auth_token_cache(self):
+        assert add_user(self.userdata[0], self.userdata[1], self.userdata[2])
+        user = get_user(self.userdata[0])
+        token = user.generate_auth_token()
+        cache = AuthTokenCache(30)
+        assert cache.get(token) is None
+        cache.set(token, user)
+        cached_user = cache.get(token)
+        assert cached_user.id == user.id
+        assert cached_user.username == self.userdata[1]
+        cache.invalidate(user.id)
+        assert cache.get(token) is None
+        cache.set(token, user)
+        cache.clear()
+        assert cache.get(token) is None
+
+    def test_auth_token_cache_disabled(self):
+        assert add_user(self.userdata[0], self.userdata[1], self.userdata[2])
+        user = get_user(self.userdata[0])
+        token = user.generate_auth_token()
+        cache = AuthTokenCache(0)
+        cache.set(token, user)
+        assert cache.get(token) is None
 
     def test_get_message_dict(self):
         message = Message(0, 0, "Moin")
@@ -74,6 +91,22 @@ class Test_Utils:
         result = get_message_dict(message)
         assert result["message_type"] == MessageType.TEXT
 
+    def test_stream_json_list(self):
+        assert json.loads("".join(stream_json_list("messages", []))) == {"messages": []}
+        items = [{"id": 1, "text": "Moin"}, {"id": 2, "text": "Hallo"}]
+        assert json.loads("".join(stream_json_list("messages", iter(items)))) == {"messages": items}
+
+    def test_waypoint_diff(self):
+        old = get_waypoints(mscolab_settings.STUB_CODE)
+        assert [waypoint["location"] for waypoint in old] == ["Kiruna", "Ny-Alesund"]
+        assert old[0] == {"location": "Kiruna", "lat": 67.821, "lon": 20.336, "flightlevel": 250.0,
+                          "comments": ""}
+        new = [old[0], dict(old[1], flightlevel=300.0), old[0]]
+        assert diff_waypoints(old, old) == []
+        assert diff_waypoints(old, new) == [{
+            "tag": "replace", "old_start": 1, "old_end": 2, "new_start": 1, "new_end": 3,
+            "old": [old[1]], "new": new[1:]}]
+
     def test_os_fs_create_dir(self):
         _fs = TempFS(identifier="msui")
         _dir = _fs.getsyspath("")
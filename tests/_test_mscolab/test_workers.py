@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+
+    tests._test_mscolab.test_workers
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    tests for several MSColab worker processes sharing a message queue
+
+    This file is part of MSS.
+
+    :copyright: Copyright 2024 by the MSS team, see AUTHORS.
+    :license: APACHE-2.0, see LICENSE for details.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import mock
+import pytest
+import requests
+import socketio
+
+from mslib.mscolab.utils import InterProcessLock
+from tests.utils import RoundRobinProxy, is_url_response_ok
+
+N_WORKERS = 3
+
+WORKER_SETTINGS = '''
+import os
+
+BASE_DIR = {base_dir!r}
+DATA_DIR = os.path.join(BASE_DIR, "colabdata")
+OPERATIONS_DATA = os.path.join(DATA_DIR, "filedata")
+UPLOAD_FOLDER = os.path.join(DATA_DIR, "uploads")
+SSO_DIR = os.path.join(DATA_DIR, "datasso")
+SQLALCHEMY_DB_URI = "sqlite:///" + os.path.join(BASE_DIR, "mscolab.db")
+SQLALCHEMY_ECHO = False
+SOCKETIO_LOGGER = False
+ENGINEIO_LOGGER = False
+# all workers have to use the same keys
+SECRET_KEY = "secret-key-shared-by-all-mscolab-workers"
+SECURITY_PASSWORD_SALT = "workers-password-salt"
+MAIL_ENABLED = False
+USE_SAML2 = False
+SOCKETIO_MESSAGE_QUEUE = {queue_url!r}
+SESSION_REGISTRY_URL = {queue_url!r}
+OPERATION_LOCK_DIR = os.path.join(BASE_DIR, "locks")
+'''
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url, process, timeout=60):
+    start = time.time()
+    while not is_url_response_ok(url):
+        assert process.poll() is None, "worker process died"
+        assert time.time() - start < timeout, f"{url} did not come up"
+        time.sleep(0.2)
+
+
+@pytest.fixture(scope="module")
+def workers(tmp_path_factory):
+    """
+    Runs N_WORKERS MSColab processes sharing a (fake) redis server behind a round robin proxy
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("redis")
+    base_dir = tmp_path_factory.mktemp("mscolab_workers")
+    redis_server = fakeredis.TcpFakeServer(("127.0.0.1", _free_port()), server_type="redis")
+    threading.Thread(target=redis_server.serve_forever, daemon=True).start()
+    settings_dir = base_dir / "settings"
+    settings_dir.mkdir()
+    (settings_dir / "mscolab_settings.py").write_text(WORKER_SETTINGS.format(
+        base_dir=str(base_dir), queue_url="redis://127.0.0.1:{}/0".format(redis_server.server_address[1])))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(settings_dir), os.getcwd()]))
+
+    processes, backends = [], []
+    try:
+        for _ in range(N_WORKERS):
+            port = _free_port()
+            process = subprocess.Popen(
+                [sys.executable, "-m", "mslib.mscolab.mscolab", "start", "--port", str(port)], env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            processes.append(process)
+            backends.append(("127.0.0.1", port))
+            # the first worker creates the database, the others only find it up to date
+            _wait_for(f"http://127.0.0.1:{port}/status", process)
+        with RoundRobinProxy(backends) as proxy:
+            yield proxy
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+        redis_server.shutdown()
+        redis_server.server_close()
+
+
+def _login(url, email, username):
+    data = {"email": email, "password": "password", "username": username}
+    requests.post(f"{url}/register", data=data)
+    response = requests.post(f"{url}/token", data=data)
+    assert response.status_code == 200
+    return response.json()["token"]
+
+
+def _socket_client(url, token):
+    client = socketio.Client()
+    received = []
+    client.on("active-user-update", received.append)
+    # without sticky sessions the long polling transport would be spread over several workers
+    client.connect(url, transports=["websocket"])
+    client.emit("start", {"token": token})
+    return client, received
+
+
+def _wait_until(condition, timeout=10):
+    start = time.time()
+    while not condition():
+        assert time.time() - start < timeout
+        time.sleep(0.1)
+
+
+def test_requests_are_spread_over_workers(workers):
+    token = _login(workers.url, "worker_a@example.org", "worker_a")
+    before = list(workers.connections)
+    for _ in range(2 * N_WORKERS):
+        # the token is verified by every worker and the operations are found in the shared database
+        response = requests.get(f"{workers.url}/operations", data={"token": token})
+        assert response.status_code == 200
+    assert [after - earlier for after, earlier in zip(workers.connections, before)] == [2] * N_WORKERS
+
+
+def test_operation_creation_across_workers(workers):
+    token = _login(workers.url, "worker_b@example.org", "worker_b")
+    for index in range(N_WORKERS):
+        response = requests.post(f"{workers.url}/create_operation", data={
+            "token": token, "path": f"workers_{index}", "description": "workers"})
+        assert response.text == "True"
+    response = requests.get(f"{workers.url}/operations", data={"token": token})
+    paths = {operation["path"] for operation in response.json()["operations"]}
+    assert {f"workers_{index}" for index in range(N_WORKERS)} <= paths
+
+
+def test_presence_and_events_across_workers(workers):
+    token = _login(workers.url, "worker_c@example.org", "worker_c")
+    other_token = _login(workers.url, "worker_d@example.org", "worker_d")
+    assert requests.post(f"{workers.url}/create_operation", data={
+        "token": token, "path": "workers_presence", "description": "workers"}).text == "True"
+    operations = requests.get(f"{workers.url}/operations", data={"token": token}).json()["operations"]
+    op_id = next(operation["op_id"] for operation in operations if operation["path"] == "workers_presence")
+
+    # consecutive connections through the proxy end up in different workers
+    client, received = _socket_client(workers.url, token)
+    other_client, other_received = _socket_client(workers.url, other_token)
+    try:
+        client.emit("operation-selected", {"token": token, "op_id": op_id})
+        _wait_until(lambda: len(received) == 1)
+        other_client.emit("operation-selected", {"token": other_token, "op_id": op_id})
+        # the event of the other worker reaches this client through the message queue
+        _wait_until(lambda: {"op_id": op_id, "count": 2} in received)
+        _wait_until(lambda: {"op_id": op_id, "count": 2} in other_received)
+        for _ in range(N_WORKERS):
+            response = requests.get(f"{workers.url}/active_users", data={"token": token, "op_id": op_id})
+            assert len(response.json()["active_users"]) == 2
+    finally:
+        client.disconnect()
+        other_client.disconnect()
+
+
+def _hold_lock(path, locked, release):
+    with InterProcessLock(path):
+        locked.set()
+        release.wait(10)
+
+
+def test_inter_process_lock(tmp_path):
+    path = str(tmp_path / "operation.lock")
+    ctx = multiprocessing.get_context("spawn")
+    locked, release = ctx.Event(), ctx.Event()
+    process = ctx.Process(target=_hold_lock, args=(path, locked, release), daemon=True)
+    process.start()
+    try:
+        assert locked.wait(30)
+        lock = InterProcessLock(path)
+        assert lock.acquire(blocking=False) is False
+        # a blocking acquire polls with the sleep that eventlet patches instead of blocking in flock
+        with mock.patch("mslib.mscolab.utils.time.sleep", wraps=time.sleep) as sleep:
+            waiting = threading.Thread(target=lock.acquire)
+            waiting.start()
+            _wait_until(lambda: sleep.call_args_list.count(mock.call(0.05)) > 1)
+            release.set()
+            process.join(10)
+            waiting.join(10)
+        assert not waiting.is_alive()
+        lock.release()
+        assert lock.acquire(blocking=False) is True
+        # the lock also excludes the threads of one process
+        assert lock.acquire(blocking=False) is False
+        lock.release()
+    finally:
+        release.set()
+        process.join()
@@ -25,6 +25,7 @@
     limitations under the License.
 """
 
+import numpy as np
 import pytest
 
 from mslib.msui.aircraft import SimpleAircraft, AIRCRAFT_DUMMY
@@ -104,3 +105,24 @@ class Test_SimpleAircraft2:
         check(360, 0, 600, 1500)
         check(410, 0, 700, 1000)
         check(500, 0, 700, 1000)
+
+
+def test_at_altitudes():
+    climb, descent, cruise = [], [], []
+    for weight in (60000., 75000., 90000.):
+        for altitude in (0., 15000., 30000., 45000.):
+            climb.append([weight, altitude, altitude / 1000, weight / 1000, altitude * weight / 1e7])
+            descent.append([weight, altitude, altitude / 2000, weight / 3000, altitude / 100])
+            cruise.append([weight, altitude, 400 + altitude / 100 - weight / 1000, 3000 + weight / 50])
+    aircraft = SimpleAircraft(dict(AIRCRAFT_DUMMY, climb=climb, descent=descent, cruise=cruise))
+    altitudes = [0, 5000, 15000, 27300, 45000, 50000]
+    performance = aircraft.at_altitudes(altitudes[:-1])
+    for altitude in altitudes:
+        for weight in np.linspace(50000, 100000, 11):
+            assert list(performance.get_climb_performance(altitude, weight)) == \
+                list(aircraft.get_climb_performance(altitude, weight))
+            assert list(performance.get_cruise_performance(altitude, weight)) == \
+                list(aircraft.get_cruise_performance(altitude, weight))
+            assert list(performance.get_descent_performance(altitude, weight)) == \
+                list(aircraft.get_descent_performance(altitude, weight))
+            assert performance.get_ceiling_altitude(weight) == aircraft.get_ceiling_altitude(weight)
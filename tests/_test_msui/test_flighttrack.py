@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+
+    tests._test_msui.test_flighttrack
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides pytest functions to tests msui.flighttrack
+
+    This file is part of MSS.
+
+    :copyright: Copyright 2024 by the MSS team, see AUTHORS.
+    :license: APACHE-2.0, see LICENSE for details.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+import logging
+import time
+
+import numpy as np
+import pytest
+from PyQt5 import QtCore
+
+from mslib.msui import flighttrack as ft
+from mslib.msui.aircraft import SimpleAircraft
+from mslib.utils.config import config_loader
+
+N_WAYPOINTS = 500
+N_EDITS = 100
+# the ascent rate of a waypoint following an edited one depends on the order of edits
+FIELDS = ["distance_to_prev", "distance_total", "leg_time", "cum_time", "utc_time", "weight", "leg_fuel",
+          "rem_fuel", "ceiling_alt"]
+
+
+def _synthetic_aircraft():
+    """
+    An aircraft with performance tables for several weights and altitudes
+    """
+    climb, descent, cruise = [], [], []
+    for weight in (60000., 75000., 90000.):
+        for altitude in np.arange(0., 45000., 2500.):
+            fraction = altitude / 45000.
+            climb.append([weight, altitude, 30 * fraction * (1 + weight / 1e5), 200 * fraction * (1 + weight / 2e5),
+                          3000 * fraction * weight / 7e4])
+            descent.append([weight, altitude, 20 * fraction, 120 * fraction * (1 + weight / 3e5), 500 * fraction])
+            cruise.append([weight, altitude, 300 + 200 * fraction - weight / 1000,
+                           5000 - 2000 * fraction + weight / 50])
+    return SimpleAircraft({"name": "SYNTHETIC", "takeoff_weight": 90000, "empty_weight": 55000, "climb": climb,
+                           "descent": descent, "cruise": cruise, "ceiling": [460, -0.002, 1e-8]})
+
+
+def _model(aircraft, waypoints):
+    model = ft.WaypointsTableModel("")
+    model.performance_settings = dict(model.performance_settings, aircraft=aircraft, takeoff_weight=90000,
+                                      empty_weight=55000)
+    model.insertRows(0, rows=len(waypoints), waypoints=waypoints)
+    return model
+
+
+def _state(model):
+    return [[getattr(wp, field) for field in FIELDS] for wp in model.waypoints]
+
+
+def test_update_distances_incremental(qtbot):
+    rng = np.random.default_rng(0)
+    aircraft = _synthetic_aircraft()
+    model = _model(aircraft, [
+        ft.Waypoint(45. + 5. * np.sin(i / 7.), -20. + 60. * i / N_WAYPOINTS, float(rng.choice([100, 250, 350, 410])))
+        for i in range(N_WAYPOINTS)])
+
+    begin = time.time()
+    for _ in range(N_EDITS):
+        kind, row = rng.integers(0, 4), int(rng.integers(0, len(model.waypoints)))
+        if kind == 0:
+            model.setData(model.createIndex(row, ft.LAT), QtCore.QVariant(float(rng.uniform(30, 60))))
+        elif kind == 1:
+            model.setData(model.createIndex(row, ft.FLIGHTLEVEL), QtCore.QVariant(float(rng.choice([120, 333]))))
+        elif kind == 2:
+            model.insertRows(row, rows=2, waypoints=[
+                ft.Waypoint(float(rng.uniform(30, 60)), float(rng.uniform(-30, 40)), 300.) for _ in range(2)])
+        else:
+            model.removeRows(row)
+    logging.info("%d edits of %d waypoints in %.3fs", N_EDITS, N_WAYPOINTS, time.time() - begin)
+
+    # the same results as computing the whole flight track again
+    reference = _model(aircraft, [ft.Waypoint(wp.lat, wp.lon, wp.flightlevel) for wp in model.waypoints])
+    assert _state(model) == _state(reference)
+
+
+def test_load_from_xml_data_bulk(qtbot):
+    n_waypoints = 10000
+    rng = np.random.default_rng(0)
+    known = list(config_loader(dataset="locations"))[:3]
+    lats, lons = rng.uniform(-80, 80, n_waypoints), rng.uniform(-180, 180, n_waypoints)
+    flightlevels = rng.uniform(0, 700, n_waypoints)
+    locations = [known[i % 5] if i % 5 < len(known) else "" for i in range(n_waypoints)]
+    comments = ["", " some comment\n", "x"] * (n_waypoints // 3) + [""] * (n_waypoints % 3)
+    model = ft.WaypointsTableModel("")
+    model.waypoints = [ft.Waypoint(*args) for args in zip(lats, lons, flightlevels, locations, comments)]
+    xml_content = model.get_xml_content()
+
+    begin = time.time()
+    waypoints = ft.load_from_xml_data(xml_content)
+    logging.info("%d waypoints loaded in %.3fs", n_waypoints, time.time() - begin)
+
+    # the same as creating the waypoints one by one from the written values
+    expected = [ft.Waypoint(float(str(wp.lat)), float(str(wp.lon)), float(str(wp.flightlevel)),
+                            location=wp.location, comments=wp.comments.strip()) for wp in model.waypoints]
+    assert [vars(wp) for wp in waypoints] == [vars(wp) for wp in expected]
+    # known locations replace the written coordinates
+    assert (waypoints[0].lat, waypoints[0].lon) == tuple(config_loader(dataset="locations")[known[0]])
+
+    loaded = ft.WaypointsTableModel("")
+    loaded.load_from_xml_data(xml_content)
+    assert len(loaded.waypoints) == n_waypoints
+
+
+@pytest.mark.parametrize("xml_content", [
+    "<FlightTrack><Waypoint lat='1' lon='2' flightlevel='3'><Comments/></Waypoint></FlightTrack>",
+    "<FlightTrack><Waypoint lat='1' lon='2' flightlevel='3'><Comments/></Waypoint>",
+    "<FlightTrack><Waypoint lat='x' lon='2' flightlevel='3'><Comments/></Waypoint>"
+    "<Waypoint lat='1' lon='2' flightlevel='3'><Comments/></Waypoint></FlightTrack>",
+    "<FlightTrack><Waypoint lat='1' lon='2' flightlevel='3'/>"
+    "<Waypoint lat='1' lon='2' flightlevel='3'><Comments/></Waypoint></FlightTrack>",
+])
+def test_load_from_xml_data_invalid(qtbot, xml_content):
+    with pytest.raises(SyntaxError):
+        ft.WaypointsTableModel("").load_from_xml_data(xml_content)
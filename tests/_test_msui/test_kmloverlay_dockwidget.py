@@ -25,13 +25,18 @@
     limitations under the License.
 """
 
+import logging
 import os
+import time
 import fs
 import mock
+import numpy as np
 import pytest
+from fastkml import kml
 from PyQt5 import QtCore, QtTest, QtGui
 from tests.constants import ROOT_DIR
 import mslib.msui.kmloverlay_dockwidget as kd
+from mslib.msui.mpl_qtwidget import MplTopViewCanvas
 
 sample_path = os.path.join(os.path.dirname(__file__), "..", "data")
 save_kml = os.path.join(ROOT_DIR, "merged_file123.kml")
@@ -46,7 +51,8 @@ class Test_KmlOverlayDockWidget:
         self.view = mock.Mock()
         self.view.map = mock.Mock(side_effect=lambda x, y: (x, y))
         self.view.map.plot = mock.Mock(return_value=[mock.Mock()])
-        self.view.map.gcpoints_path = mock.Mock(side_effect=lambda x, y: (x, y))
+        self.view.map.gcpoints_paths = mock.Mock(side_effect=lambda paths: paths)
+        self.view.map.ax.get_xlim.return_value = (-180, 180)
 
         self.window = kd.KMLOverlayControlWidget(view=self.view)
         self.window.show()
@@ -212,15 +218,15 @@ class Test_KmlOverlayDockWidget:
         self.window.remove_file()
 
         self.select_file("features.kml")
-        assert self.count_patches() == 17  # 3 Points, 11 LineStrings, 3 Polygons Patch
+        assert self.count_patches() == 3  # 3 Points, 11 LineStrings and 3 Polygons of 2 styles
         self.window.remove_file()
 
         self.select_file("polygon_inner.kml")
-        assert self.count_patches() == 5  # 5 Polygons Patch
+        assert self.count_patches() == 1  # 5 Polygons of one style
         self.window.remove_file()
 
         self.select_file("Multilinestrings.kml")
-        assert self.count_patches() == 10  # 10 LineStrings Patch
+        assert self.count_patches() == 1  # 10 LineStrings of one style
         self.window.remove_file()
 
         self.select_file("geometry_collection.kml")
@@ -234,3 +240,73 @@ class Test_KmlOverlayDockWidget:
         assert filename.endswith('kml')
         clr = [0.6666666, 0.6666666, 0.6666666]
         assert self.window.show_color_icon(filename, clr) is not None
+
+
+def test_simplify_lines():
+    x = np.linspace(0, 1, 101)
+    wavy = np.column_stack([x, 0.001 * np.sin(100 * x)])
+    undefined = np.array([[0, 0], [np.nan, np.nan], [1, 1]])
+    simplified = kd.simplify_lines([wavy, undefined, wavy[:2]], 0.01)
+    assert simplified[0].tolist() == [[0, 0], wavy[-1].tolist()]
+    assert simplified[1] is undefined
+    assert len(simplified[2]) == 2
+    assert len(kd.simplify_lines([wavy], 1e-6)[0]) == 101
+
+
+def _synthetic_kml(n_placemarks, n_points=40):
+    """
+    Circles of n_points points, drawn with the style of the patch or one of two styles
+    """
+    rng = np.random.default_rng(0)
+    placemarks = []
+    for i in range(n_placemarks):
+        lon, lat, radius = rng.uniform(-20, 30), rng.uniform(35, 65), rng.uniform(0.2, 2)
+        angles = np.linspace(0, 2 * np.pi, n_points)
+        coordinates = " ".join(f"{lon + radius * np.cos(angle):.5f},{lat + radius * np.sin(angle):.5f},0"
+                               for angle in angles)
+        style = "" if i % 3 == 0 else f"<styleUrl>#{'ab'[i % 2]}</styleUrl>"
+        placemarks.append(f"<Placemark><name>p{i}</name>{style}<LineString><coordinates>{coordinates}"
+                          "</coordinates></LineString></Placemark>")
+    document = kml.KML()
+    document.from_string(
+        '<?xml version="1.0" encoding="UTF-8"?><kml xmlns="http://www.opengis.net/kml/2.2"><Document>'
+        '<Style id="a"><LineStyle><color>ff0000ff</color><width>2</width></LineStyle></Style>'
+        '<Style id="b"><LineStyle><color>ff00ff00</color><width>1</width></LineStyle></Style>'
+        f'{"".join(placemarks)}</Document></kml>'.encode())
+    return document
+
+
+def test_kml_patch_benchmark(qtbot):
+    canvas = MplTopViewCanvas()
+    canvas.init_map()
+    document = _synthetic_kml(1000)
+
+    begin = time.time()
+    patch = kd.KMLPatch(canvas.map, document, color=(0, 0, 0, 1), linewidth=2)
+    canvas.draw()
+    drawn = time.time()
+    patch.update()
+    canvas.draw()
+    updated = time.time()
+    logging.info("KML patch of 1000 placemarks drawn in %.3fs, projected again in %.3fs",
+                 drawn - begin, updated - drawn)
+
+    # one collection for each of the three line styles
+    assert len(patch.patches) == 3
+    assert sum(len(segments) for segments in patch.segments.values()) == 1000
+    simplified = sum(len(segment) for collection in patch.line_collections.values()
+                     for segment in collection.get_segments())
+    assert simplified < sum(len(segment) for segments in patch.segments.values() for segment in segments)
+
+    # zooming in simplifies the lines less
+    xmin, xmax = canvas.map.ax.get_xlim()
+    canvas.map.ax.set_xlim(xmin, xmin + (xmax - xmin) / 4)
+    assert patch.simplified_width == pytest.approx((xmax - xmin) / 4)
+    assert sum(len(segment) for collection in patch.line_collections.values()
+               for segment in collection.get_segments()) > simplified
+
+    patch.update(color=(0, 0, 1, 1), linewidth=3)
+    assert tuple(patch.line_collections[None].get_color()[0]) == (0, 0, 1, 1)
+    assert patch.line_collections[None].get_linewidth()[0] == 3
+    patch.remove()
+    assert patch.patches == []
@@ -24,10 +24,19 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import logging
+import time
+
+import mock
+import numpy as np
 import pytest
 
 from matplotlib import pyplot as plt
+from matplotlib.backend_bases import MouseEvent
+from shapely.geometry import Polygon
 from mslib.msui.mpl_map import MapCanvas
+from mslib.utils import airdata
+from mslib.utils.coordinate import normalize_longitude
 
 
 class Test_MapCanvas:
@@ -51,3 +60,133 @@ class Test_MapCanvas:
         self.map.ax.set_xlim([1, 2])
         self.map.ax.set_ylim([62, 63])
         self.map.update_with_coordinate_change()
+
+    def test_update_extent(self):
+        """
+        Assert zooming into the projected region keeps the map coordinates and geometry
+        """
+        coastlines = self.map.map_coastlines
+        position = self.map(10, 50)
+        self.map.ax.set_xlim([0, 20])
+        self.map.ax.set_ylim([40, 60])
+        assert self.map.update_with_coordinate_change() is False
+        assert self.map.map_coastlines is coastlines
+        assert self.map(10, 50) == position
+        assert [self.map.kwargs[key] for key in ("llcrnrlon", "llcrnrlat", "urcrnrlon", "urcrnrlat")] == \
+            pytest.approx([0, 40, 20, 60])
+        assert self.map.ax.axis() == pytest.approx((0, 20, 40, 60))
+
+        # the same extent given by corner coordinates
+        assert self.map.update_with_coordinate_change(
+            dict(self.map.kwargs, llcrnrlon=-10, llcrnrlat=40, urcrnrlon=10, urcrnrlat=50)) is False
+        assert self.map.ax.axis() == pytest.approx((-10, 10, 40, 50))
+
+        # leaving the projected region rebuilds the map
+        self.map.ax.set_xlim([-30, 20])
+        assert self.map.update_with_coordinate_change() is True
+        assert self.map.map_coastlines is not coastlines
+        assert self.map.kwargs["llcrnrlon"] == pytest.approx(-30)
+        assert self.map.geometry_extent == pytest.approx((-30, 40, 20, 50))
+
+        # so does a new projection
+        assert self.map.update_with_coordinate_change({"projection": "stere", "lat_0": 90, "lon_0": 0}) is True
+
+    def test_gcpoints_path(self):
+        """
+        Assert the batched great circle points match those computed per segment
+        """
+        rng = np.random.default_rng(1)
+        lons = np.cumsum(rng.uniform(-2, 6, 1000)) % 360 - 180
+        lats = np.clip(np.cumsum(rng.uniform(-3, 3, 1000)), -80, 80)
+
+        start = time.time()
+        ref_lons, ref_lats = [lons[0]], [lats[0]]
+        for i in range(len(lons) - 1):
+            _, _, dist = self.map.gc.inv(lons[i], lats[i], lons[i + 1], lats[i + 1])
+            npoints = int((dist + 0.5 * 1000. * 100.) / (1000. * 100.))
+            if npoints > 0:
+                for lon, lat in self.map.gc.npts(lons[i], lats[i], lons[i + 1], lats[i + 1], npoints):
+                    ref_lons.append(lon)
+                    ref_lats.append(lat)
+            ref_lons.append(lons[i + 1])
+            ref_lats.append(lats[i + 1])
+        time_loop = time.time() - start
+        start = time.time()
+        gclons, gclats = self.map.gcpoints_path(lons, lats, map_coords=False)
+        time_vectorised = time.time() - start
+        logging.info("%d great circle points: %.4fs per segment, %.4fs vectorised",
+                     len(gclons), time_loop, time_vectorised)
+
+        assert len(gclons) == len(ref_lons)
+        valid = ~np.isnan(gclons)
+        ref_lons = normalize_longitude(np.asarray(ref_lons), self.map.llcrnrlon, self.map.urcrnrlon)
+        assert self.map.gc.inv(ref_lons[valid], np.asarray(ref_lats)[valid], gclons[valid], gclats[valid])[2].max() < 1
+
+        # several paths at once give the same points as each path on its own
+        paths = [(lons[:300], lats[:300]), (lons[300:302], lats[300:302]), (lons[302:], lats[302:])]
+        for (x, y), (lons_, lats_) in zip(self.map.gcpoints_paths(paths), paths):
+            ref_x, ref_y = self.map.gcpoints_path(lons_, lats_)
+            assert np.array_equal(x, ref_x, equal_nan=True)
+            assert np.array_equal(y, ref_y, equal_nan=True)
+
+    def _synthetic_airdata(self, n_airports=20000, n_airspaces=2000):
+        rng = np.random.default_rng(2)
+        lons, lats = rng.uniform(-180, 180, n_airports), np.rad2deg(np.arcsin(rng.uniform(-1, 1, n_airports)))
+        airports = [{"type": airport_type, "name": f"airport {i}", "longitude_deg": str(lon), "latitude_deg": str(lat)}
+                    for i, (airport_type, lon, lat) in enumerate(
+                        zip(rng.choice(["small_airport", "heliport"], n_airports), lons, lats))]
+        airspaces = []
+        for i in range(n_airspaces):
+            lon, lat, radius = rng.uniform(-175, 175), rng.uniform(-80, 80), rng.uniform(0.1, 3)
+            angles = np.linspace(0, 2 * np.pi, rng.integers(4, 20))
+            airspaces.append({"name": f"airspace {i}", "bottom": float(rng.uniform(0, 10)), "top": 20., "country": "xx",
+                              "polygon": [(lon + radius * np.cos(angle), lat + radius * np.sin(angle))
+                                          for angle in angles]})
+        return airports, airspaces
+
+    @pytest.mark.parametrize("projection", [{"epsg": "4326"}, {"projection": "stere", "lat_0": 90, "lon_0": 0}])
+    def test_airdata_culling(self, projection):
+        """
+        Assert only the airports and airspaces within the map are drawn and found on hover
+        """
+        airports, airspaces = self._synthetic_airdata()
+        self.map.update_with_coordinate_change(projection)
+        xmin, ymin, xmax, ymax = self.map.geometry_extent
+        x, y = self.map.projtran([float(airport["longitude_deg"]) for airport in airports],
+                                 [float(airport["latitude_deg"]) for airport in airports])
+        expected_airports = [(_x, _y) for airport, _x, _y in zip(airports, x, y)
+                             if airport["type"] == "small_airport" and xmin <= _x <= xmax and ymin <= _y <= ymax]
+        map_polygon = Polygon([(xmin, ymin), (xmax, ymin), (xmax, ymax), (xmin, ymax)])
+        expected_airspaces = [airspace["name"] for airspace in airspaces if Polygon(
+            list(zip(*self.map.projtran(*zip(*airspace["polygon"]))))).intersects(map_polygon)]
+
+        with mock.patch("mslib.msui.mpl_map.get_airports", return_value=airports), \
+                mock.patch("mslib.msui.mpl_map.get_airspaces", return_value=airspaces):
+            start = time.time()
+            self.map.set_draw_airports(True)
+            self.map.set_draw_airspaces(True, ["Test xx"])
+            index = airdata.get_airports_index(airports)
+            self.map.set_draw_airports(True)
+            logging.info("%d of %d airports drawn twice in %.3fs", len(expected_airports), len(airports),
+                         time.time() - start)
+            # the index is only built once for the loaded airports
+            assert airdata.get_airports_index(airports) is index
+
+        assert len(expected_airports) > 0
+        assert np.allclose(self.map.airports.get_offsets(), expected_airports)
+        assert len(self.map.airspaces.get_paths()) == len(expected_airspaces) > 0
+
+        self.map.ax.figure.canvas.draw()
+        on_move = self.map.ax.figure.canvas.callbacks.callbacks["motion_notify_event"][self.map.airports_event]()
+        position = self.map.ax.transData.transform(self.map.airports.get_offsets()[0])
+        on_move(MouseEvent("motion_notify_event", self.map.ax.figure.canvas, *position))
+        assert self.map.airtext.get_visible()
+        assert self.map.airtext.get_text() == airports[
+            [i for i, (_x, _y) in enumerate(zip(x, y)) if (_x, _y) == expected_airports[0]][0]]["name"]
+        # away from any airport
+        markers = self.map.ax.transData.transform(self.map.airports.get_offsets())
+        x0, y0, x1, y1 = self.map.ax.bbox.extents
+        position = next(position for position in np.mgrid[x0 + 5:x1 - 5:7j, y0 + 5:y1 - 5:7j].reshape(2, -1).T
+                        if np.hypot(*(markers - position).T).min() > 10)
+        on_move(MouseEvent("motion_notify_event", self.map.ax.figure.canvas, *position))
+        assert not self.map.airtext.get_visible()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+
+    tests._test_msui.test_mpl_pathinteractor
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides pytest functions to tests msui.mpl_pathinteractor
+
+    This file is part of MSS.
+
+    :copyright: Copyright 2024 by the MSS team, see AUTHORS.
+    :license: APACHE-2.0, see LICENSE for details.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+import logging
+import time
+
+import mock
+import numpy as np
+import pytest
+from matplotlib.backend_bases import MouseEvent
+from PyQt5 import QtTest
+
+from mslib.msui import flighttrack as ft
+from mslib.msui.mpl_qtwidget import MplSideViewCanvas, MplTopViewCanvas
+
+N_WAYPOINTS = 200
+N_MOVES = 50
+
+
+def _synthetic_model():
+    """
+    A flight track of N_WAYPOINTS waypoints zig-zagging over Europe
+    """
+    waypoints = [ft.Waypoint(45. + 5. * np.sin(i / 10.), -10. + 40. * i / N_WAYPOINTS, 250 + (i % 10) * 10)
+                 for i in range(N_WAYPOINTS)]
+    model = ft.WaypointsTableModel("")
+    model.insertRows(0, rows=len(waypoints), waypoints=waypoints)
+    return model
+
+
+def _drag(canvas, interactor, start, moves):
+    """
+    Drags the waypoint at display coordinates start along moves and returns its index
+    and the number of full redraws and blits during the motion and on release.
+    """
+    with mock.patch.object(canvas, "draw", wraps=canvas.draw) as draw, \
+            mock.patch.object(canvas, "blit", wraps=canvas.blit) as blit:
+        interactor.button_press_callback(MouseEvent("button_press_event", canvas, *start, button=1))
+        index = interactor._ind
+        assert index is not None
+        begin = time.time()
+        for pos in moves:
+            interactor.motion_notify_callback(MouseEvent("motion_notify_event", canvas, *pos, button=1))
+        elapsed = time.time() - begin
+        counts = {"draw": draw.call_count, "blit": blit.call_count}
+        interactor.button_release_move_callback(MouseEvent("button_release_event", canvas, *moves[-1], button=1))
+        counts["release_draw"] = draw.call_count - counts["draw"]
+    logging.info("%s: %d moves in %.3fs, %s", type(interactor).__name__, len(moves), elapsed, counts)
+    return index, counts
+
+
+@pytest.fixture
+def model(qtbot):
+    return _synthetic_model()
+
+
+def test_drag_topview(qtbot, model):
+    canvas = MplTopViewCanvas()
+    canvas.init_map(model=model)
+    canvas.show()
+    QtTest.QTest.qWaitForWindowExposed(canvas)
+    canvas.draw()
+    interactor = canvas.waypoints_interactor
+    index = N_WAYPOINTS // 2
+    start = interactor.plotter.ax.transData.transform(interactor.plotter.pathpatch.get_path().wp_vertices[index])
+    moves = [start + (i, i) for i in range(1, N_MOVES + 1)]
+    before = [(wp.lat, wp.lon) for wp in model.all_waypoint_data()]
+
+    index, counts = _drag(canvas, interactor, start, moves)
+
+    assert counts == {"draw": 0, "blit": N_MOVES, "release_draw": 1}
+    # the moved waypoint is submitted to the model on release (possibly snapped to a location)
+    assert (model.waypoint_data(index).lat, model.waypoint_data(index).lon) != before[index]
+    assert len(model.all_waypoint_data()) == N_WAYPOINTS
+
+
+def test_drag_sideview(qtbot, model):
+    canvas = MplSideViewCanvas(model=model)
+    canvas.show()
+    QtTest.QTest.qWaitForWindowExposed(canvas)
+    canvas.draw()
+    interactor = canvas.waypoints_interactor
+    index = N_WAYPOINTS // 2
+    start = interactor.plotter.ax.transData.transform(interactor.plotter.pathpatch.get_path().vertices[index])
+    moves = [start + (0, i) for i in range(1, N_MOVES + 1)]
+
+    index, counts = _drag(canvas, interactor, start, moves)
+
+    assert counts["draw"] == 0
+    assert counts["blit"] == N_MOVES
+    # the changed flight times additionally redraw the x-axis
+    assert counts["release_draw"] >= 1
+    pressure = interactor.plotter.ax.transData.inverted().transform(moves[-1])[1]
+    assert model.waypoint_data(index).pressure == pytest.approx(pressure, rel=1e-3)
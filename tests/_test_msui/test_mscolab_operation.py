@@ -27,13 +27,15 @@
 import pytest
 import datetime
 
+import mock
+
 from tests.constants import ROOT_DIR
-from mslib.mscolab.models import Message, MessageType
+from mslib.mscolab.models import db, Message, MessageType, Operation
 from PyQt5 import QtCore, QtTest, QtWidgets
 from mslib.msui import mscolab
 from mslib.msui import msui
 from mslib.mscolab.seed import add_user, get_user, add_operation, add_user_to_operation
-from mslib.utils.config import modify_config_file
+from mslib.utils.config import config_loader, modify_config_file
 from mslib.mscolab.utils import get_message_dict
 
 
@@ -139,6 +141,24 @@ class Test_MscolabOperation:
         with self.app.app_context():
             assert Message.query.filter_by(text='test edit').count() == 0
 
+    def test_reload_messages_while_scrolled(self, qtbot):
+        with self.app.app_context():
+            op_id = Operation.query.filter_by(path=self.operation_name).first().id
+            db.session.add_all([Message(op_id, self.user.id, f"message {index}") for index in range(40)])
+            db.session.commit()
+        page_size = 30
+        with mock.patch("mslib.msui.mscolab_chat.config_loader",
+                        side_effect=lambda dataset: page_size if dataset == "MSCOLAB_chat_page_size"
+                        else config_loader(dataset=dataset)):
+            self.chat_window.load_all_messages()
+            assert self.chat_window.messageList.verticalScrollBar().value() > 0
+            # clearing the scrolled list must not load older messages with the cursor of the previous list
+            with mock.patch.object(self.chat_window, "request_messages",
+                                   wraps=self.chat_window.request_messages) as request_messages:
+                self.chat_window.load_all_messages()
+        assert request_messages.call_args_list == [mock.call()]
+        assert self.chat_window.messageList.count() == page_size
+
     def _connect_to_mscolab(self, qtbot):
         self.connect_window = mscolab.MSColab_ConnectDialog(parent=self.window, mscolab=self.window.mscolab)
         self.window.mscolab.connect_window = self.connect_window
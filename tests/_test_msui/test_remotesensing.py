@@ -27,12 +27,18 @@
 
 
 import datetime
+import logging
+import time
 
+import mock
 from mock import Mock
 from matplotlib.collections import LineCollection
+import numpy as np
 import pytest
 import skyfield_data
-from mslib.msui.remotesensing_dockwidget import RemoteSensingControlWidget
+from skyfield.api import Topos, utc
+from mslib.msui.remotesensing_dockwidget import RemoteSensingControlWidget, EARTH_RADIUS
+from mslib.utils.time import jsec_to_datetime
 from mslib.msui import mpl_qtwidget as qt
 
 
@@ -184,12 +190,95 @@ class Test_RemoteSensingControlWidget:
         result = result.compute_solar_lines(self.bmap, self.coordinates, self.heights, self.times, self.solar_type)
         assert isinstance(result, LineCollection)
 
+    def _reference_body_angle(self, body, jsec, lon, lat):
+        # the former evaluation of a single point
+        t = self.remote_widget.timescale.utc(jsec_to_datetime(jsec).replace(tzinfo=utc))
+        loc = self.remote_widget.planets["earth"] + Topos(lat, lon)
+        alt, az, d = loc.at(t).observe(self.remote_widget.planets[body]).apparent().altaz()
+        return az.degrees, alt.degrees
+
+    def _reference_rating(self, x0, y0, h0, x1, y1, h1, jsec, obs_azi, obs_ele):
+        # the former per segment loop of compute_solar_lines
+        body, difftype = self.solar_type
+        sol_azi, sol_ele = self._reference_body_angle(body, jsec, x0, y0)
+        obs_azi, obs_ele = self.remote_widget.compute_view_angles(x0, y0, h0, x1, y1, h1, obs_azi, obs_ele)
+        if sol_azi < 0:
+            sol_azi += 360
+        if obs_azi < 0:
+            obs_azi += 360
+        delta_azi = obs_azi - sol_azi
+        delta_ele = obs_ele - sol_ele
+        thresh = -np.rad2deg(np.arccos(EARTH_RADIUS / (h0 + EARTH_RADIUS))) - 3
+        if sol_ele < thresh:
+            delta_ele = 180
+        return np.hypot(delta_azi, delta_ele)
+
+    def test_compute_solar_lines_vectorised(self):
+        rng = np.random.default_rng(0)
+        n_waypoints = 300
+        lons = np.cumsum(rng.uniform(-0.3, 0.8, n_waypoints)) - 20
+        lats = 50 + 10 * np.sin(np.arange(n_waypoints) / 30.)
+        vertices = list(zip(*self.bmap(lons, lats)))
+        heights = list(rng.uniform(5, 13, n_waypoints))
+        times = [datetime.datetime(2024, 6, 21, 3) + datetime.timedelta(minutes=2 * i) for i in range(n_waypoints)]
+
+        widget = self.remote_widget
+        with mock.patch.object(widget, "compute_body_angle", wraps=widget.compute_body_angle) as body_angle, \
+                mock.patch.object(widget, "compute_view_angles", wraps=widget.compute_view_angles) as view_angles:
+            begin = time.time()
+            result = widget.compute_solar_lines(self.bmap, vertices, heights, times, self.solar_type)
+            logging.info("solar lines of %d waypoints in %.3fs", n_waypoints, time.time() - begin)
+
+        ratings = result.get_array()
+        assert len(result.get_segments()) == len(ratings)
+        assert (ratings >= 0).all()
+
+        # the same ratings as the former evaluation of the segments one by one
+        jsecs = body_angle.call_args.args[1]
+        x0, y0, h0, x1, y1, h1, obs_azi, obs_ele = view_angles.call_args.args
+        assert len(jsecs) == len(x0) == len(ratings)
+        for i in range(0, len(ratings), 7):
+            expected = self._reference_rating(
+                float(x0[i]), float(y0[i]), h0[i], float(x1[i]), float(y1[i]), h1[i], jsecs[i], obs_azi, obs_ele)
+            assert ratings[i] == pytest.approx(expected, abs=1e-6)
+
     def test_tangent_point_coordinates(self):
         tangent_point_coordinates = self.remote_widget.tangent_point_coordinates
         coordinates = tangent_point_coordinates(lon_lin=self.lon_lin, lat_lin=self.lat_lin, cut_height=self.cut_height)
         result = [(round(x, 2), round(y, 2)) for x, y in coordinates]
         assert result == self.result_test_tangent_point_coordinates
 
+    def test_tangent_point_coordinates_altitudes(self):
+        rng = np.random.default_rng(0)
+        altitudes = rng.uniform(11, 14, len(self.lon_lin))
+        coordinates = self.remote_widget.tangent_point_coordinates(
+            lon_lin=self.lon_lin, lat_lin=self.lat_lin, flight_alt=altitudes, cut_height=self.cut_height)
+        assert len(coordinates) == len(self.lon_lin) - 1
+        # each tangent point only depends on the segment and the altitude at its start
+        for i, coordinate in enumerate(coordinates):
+            expected = self.remote_widget.tangent_point_coordinates(
+                lon_lin=self.lon_lin[i:i + 2], lat_lin=self.lat_lin[i:i + 2], flight_alt=altitudes[i],
+                cut_height=self.cut_height)
+            assert coordinate == pytest.approx(expected[0])
+
+    def test_compute_tangent_lines_benchmark(self):
+        rng = np.random.default_rng(0)
+        n_waypoints = 300
+        lons = np.cumsum(rng.uniform(-0.3, 0.8, n_waypoints)) - 20
+        lats = 50 + 10 * np.sin(np.arange(n_waypoints) / 30.)
+        vertices = list(zip(*self.bmap(lons, lats)))
+        heights = list(rng.uniform(5, 13, n_waypoints))
+
+        begin = time.time()
+        result = self.remote_widget.compute_tangent_lines(self.bmap, vertices, heights)
+        logging.info("tangent lines of %d waypoints in %.3fs", n_waypoints, time.time() - begin)
+
+        segments = result.get_segments()
+        linestyles = result.get_linestyles()
+        n_tangent_lines = sum(1 for linestyle in linestyles if linestyle == linestyles[0])
+        assert n_tangent_lines == n_waypoints - 1
+        assert all(len(segment) == 2 for segment in segments[n_tangent_lines:])
+
     @pytest.mark.parametrize("obs_azi, obs_ele, sol_azi, sol_ele, expected_rating", [
         (76.00, -1.0, 240.70, 58.33, 175.06),
         (76.11, -1.0, 239.90, 60.03, 174.79),
@@ -25,8 +25,12 @@
     limitations under the License.
 """
 
+import datetime
+import logging
 import os
+import time
 import mock
+import numpy as np
 import pytest
 from PyQt5 import QtCore, QtTest
 import mslib.msui.satellite_dockwidget as sd
@@ -42,23 +46,59 @@ class Test_SatelliteDockWidget:
         yield
         self.window.hide()
 
-    def test_load(self):
+    def test_load(self, qtbot):
         path = os.path.join(os.path.dirname(__file__), "../", "data", "satellite_predictor.txt")
         self.window.leFile.setText(path)
         assert self.window.cbSatelliteOverpasses.count() == 0
         QtTest.QTest.mouseClick(self.window.btLoadFile, QtCore.Qt.LeftButton)
-        assert self.window.cbSatelliteOverpasses.count() == 11
+        qtbot.waitUntil(lambda: self.window.cbSatelliteOverpasses.count() == 11)
+        assert self.window.btLoadFile.isEnabled()
         assert self.view.plot_satellite_overpass.call_count == 1
         self.window.cbSatelliteOverpasses.currentIndexChanged.emit(2)
         assert self.view.plot_satellite_overpass.call_count == 2
         self.view.reset_mock()
 
     @mock.patch("PyQt5.QtWidgets.QMessageBox.critical")
-    def test_load_no_file(self, mockbox):
+    def test_load_no_file(self, mockbox, qtbot):
         QtTest.QTest.mouseClick(self.window.btLoadFile, QtCore.Qt.LeftButton)
+        qtbot.waitUntil(lambda: mockbox.call_count == 1)
         assert self.window.cbSatelliteOverpasses.count() == 0
         mockbox.assert_called_once_with(
             self.window,
             "Satellite Overpass Tool",
             "ERROR:\n<class 'fs.errors.FileExpected'>\npath '' should be a file",
         )
+
+
+def test_read_nasa_satellite_prediction():
+    path = os.path.join(os.path.dirname(__file__), "../", "data", "satellite_predictor.txt")
+    segments = sd.read_nasa_satellite_prediction(path)
+    assert [len(segment["utc"]) for segment in segments] == [4, 31, 36, 17, 15, 34, 31, 30, 5]
+    assert segments[0]["utc"][0] == datetime.datetime(2017, 1, 27)
+    assert segments[0]["utc"][-1] == datetime.datetime(2017, 1, 27, 0, 1)
+    assert segments[0]["satpos"][1].tolist() == [31.2049, 32.1739]
+    assert segments[0]["heading"].mask.tolist()[:2] == [True, False]
+    # without swath, the satellite position is used instead
+    assert (segments[0]["swath_left"] == segments[0]["satpos"]).all()
+    assert (segments[0]["swath_right"] == segments[0]["satpos"]).all()
+
+
+def test_read_nasa_satellite_prediction_benchmark(tmp_path):
+    # three weeks of positions every 20 s with swath, an overpass every 100 minutes
+    rng = np.random.default_rng(0)
+    seconds = np.arange(0, 86400, 20)
+    seconds = seconds[seconds % 6000 < 3000]
+    lines = ["2017/01/27 Orbital Tracks",
+             "   GMT      SUBLAT    SUBLON  HEADING  LEFTLAT  LEFTLON RIGHTLAT RIGHTLON"]
+    for second in seconds:
+        values = " ".join(f"{value:9.4f}" for value in rng.uniform(-90, 90, 7))
+        lines.append(f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d} {values}")
+    lines = lines[:2] + lines[2:] * 21
+    path = tmp_path / "prediction.txt"
+    path.write_text("\n".join(lines))
+
+    begin = time.time()
+    segments = sd.read_nasa_satellite_prediction(str(path))
+    logging.info("read %d segments of %d lines in %.3fs", len(segments), len(lines) - 2, time.time() - begin)
+    assert len(segments) == 14 * 21
+    assert all(segment["swath_left"].shape == (len(segment["utc"]), 2) for segment in segments)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+
+    tests._test_msui.test_wms_cache
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides pytest functions to tests msui.wms_cache
+
+    This file is part of MSS.
+
+    :copyright: Copyright 2024 by the MSS team, see AUTHORS.
+    :license: APACHE-2.0, see LICENSE for details.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import logging
+import os
+import time
+
+import mock
+import pytest
+
+from mslib.msui import wms_cache
+
+N_FILES = 20000
+
+
+def _write(cache, filename, size):
+    with cache.write(filename) as temporary:
+        with open(temporary, "wb") as handle:
+            handle.write(b"x" * size)
+
+
+def test_write_and_lookup(tmp_path):
+    cache = wms_cache.WMSImageCache(tmp_path)
+    filename = str(tmp_path / "a.png")
+    assert not cache.lookup(filename)
+    _write(cache, filename, 10)
+    assert cache.lookup(filename)
+    with open(filename, "rb") as handle:
+        assert handle.read() == b"x" * 10
+    # a file removed by someone else
+    os.remove(filename)
+    assert not cache.lookup(filename)
+    assert wms_cache.get_image_cache(str(tmp_path) + os.sep) is wms_cache.get_image_cache(tmp_path)
+
+
+def test_write_is_atomic(tmp_path):
+    cache = wms_cache.WMSImageCache(tmp_path)
+    filename = str(tmp_path / "a.png")
+    _write(cache, filename, 10)
+    with pytest.raises(ValueError):
+        with cache.write(filename) as temporary:
+            with open(temporary, "wb") as handle:
+                handle.write(b"y" * 5)
+            raise ValueError("interrupted")
+    # neither the old file is damaged nor is a temporary file left behind
+    assert sorted(os.listdir(tmp_path)) == ["a.png"] + sorted(
+        name for name in os.listdir(tmp_path) if name.startswith(wms_cache.INDEX_FILENAME))
+    assert cache.lookup(filename)
+    with open(filename, "rb") as handle:
+        assert handle.read() == b"x" * 10
+
+
+def test_service_lru(tmp_path):
+    cache = wms_cache.WMSImageCache(tmp_path)
+    now = time.time()
+    for index in range(5):
+        with mock.patch("time.time", return_value=now + index):
+            _write(cache, str(tmp_path / f"{index}.png"), 100)
+    # recently used files are kept even if they were written first
+    with mock.patch("time.time", return_value=now + 10):
+        assert cache.lookup(str(tmp_path / "0.png"))
+    assert cache.service(max_size_bytes=300, max_age_seconds=3600) == 2
+    assert [cache.lookup(str(tmp_path / f"{index}.png")) for index in range(5)] == [True, False, False, True, True]
+    # the age is counted from writing the file
+    with mock.patch("time.time", return_value=now + 3600 + 3.5):
+        assert cache.service(max_size_bytes=1000, max_age_seconds=3600) == 2
+    assert [cache.lookup(str(tmp_path / f"{index}.png")) for index in range(5)] == [False, False, False, False, True]
+
+
+def test_existing_files_and_clear(tmp_path):
+    for index in range(3):
+        (tmp_path / f"{index}.png").write_bytes(b"x" * 100)
+        os.utime(tmp_path / f"{index}.png", (time.time() - 100 * index,) * 2)
+    (tmp_path / "left_over.tmp").write_bytes(b"x")
+    cache = wms_cache.WMSImageCache(tmp_path)
+    assert cache.lookup(str(tmp_path / "2.png"))
+    assert cache.service(max_size_bytes=1000, max_age_seconds=150) == 1
+    assert not cache.lookup(str(tmp_path / "2.png"))
+    # another instance, like another msui, shares the index
+    assert wms_cache.WMSImageCache(tmp_path).lookup(str(tmp_path / "1.png"))
+    assert cache.clear() == 3
+    assert all(name.startswith(wms_cache.INDEX_FILENAME) for name in os.listdir(tmp_path))
+    assert not cache.lookup(str(tmp_path / "0.png"))
+
+
+def test_service_many_files(tmp_path):
+    cache = wms_cache.WMSImageCache(tmp_path)
+    names = [f"{index:032x}.png" for index in range(N_FILES)]
+    for name in names:
+        (tmp_path / name).write_bytes(b"x")
+    now = time.time()
+    with cache._lock, cache._connection:
+        cache._connection.executemany("INSERT INTO entries VALUES (?, 1, ?, ?)",
+                                      [(name, now, now - N_FILES + index) for index, name in enumerate(names)])
+    begin = time.time()
+    assert cache.lookup(str(tmp_path / names[0]))
+    lookup = time.time() - begin
+    begin = time.time()
+    assert cache.service(max_size_bytes=N_FILES // 2, max_age_seconds=3600) == N_FILES // 2
+    logging.info("lookup in %.6fs, %d files removed in %.3fs", lookup, N_FILES // 2, time.time() - begin)
+    # the first file has just been used
+    assert cache.lookup(str(tmp_path / names[0]))
+    assert not cache.lookup(str(tmp_path / names[1]))
+    assert cache.lookup(str(tmp_path / names[-1]))
@@ -29,12 +29,16 @@ import os
 import mock
 import shutil
 import tempfile
+import time
 import pytest
 import hashlib
 import urllib
 from PyQt5 import QtCore, QtTest
 from mslib.msui import flighttrack as ft
 import mslib.msui.wms_control as wc
+from mslib.utils import ogcwms
+from mslib.utils.config import config_loader
+from tests.utils import WMSStandIn
 
 
 class HSecViewMockup(mock.Mock):
@@ -725,3 +729,74 @@ class TestWMSControlWidgetSetupSimple:
         self.window.activate_wms(wc.MSUIWebMapService(None, version='1.1.1', xml=testxml))
         assert [self.window.cbValidTime.itemText(i) for i in range(self.window.cbValidTime.count())] == []
         assert [self.window.cbInitTime.itemText(i) for i in range(self.window.cbInitTime.count())] == []
+
+
+class _StandInLayer:
+    """
+    A layer of the WMSStandIn server, the width of its images is given by the size argument of getmap
+    """
+    def __init__(self, url):
+        self.url = url
+
+    def get_wms(self):
+        return self
+
+    def getmap(self, **kwargs):
+        width, height = kwargs["size"]
+        return ogcwms.openURL(self.url, urllib.parse.urlencode({"request": "GetMap", "width": width, "height": height}))
+
+
+class Test_WMSMapFetcher:
+    DELAY = 0.2
+
+    @pytest.fixture(autouse=True)
+    def setup(self, qtbot, tmp_path):
+        with WMSStandIn(delay=self.DELAY) as server:
+            self.server = server
+            self.layer = _StandInLayer(server.url)
+            self.fetcher = wc.WMSMapFetcher(str(tmp_path))
+            self.tmp_path = tmp_path
+            yield
+            self.fetcher.shutdown()
+
+    def _maps(self, widths, prefix="map"):
+        legend_kwargs = {"urlstr": f"{self.server.url}?request=GetLegendGraphic",
+                         "md5_filename": str(self.tmp_path / "legend.png")}
+        return [(self.layer, {"layers": [f"layer{width}"], "styles": [""], "init_time": None, "time": None,
+                              "level": None, "size": (width, 10)},
+                 str(self.tmp_path / f"{prefix}{width}.png"), False, legend_kwargs) for width in widths]
+
+    def test_fetch_maps_concurrently(self, qtbot):
+        widths = list(range(10, 10 + config_loader(dataset="WMS_concurrent_requests") + 1))
+        start = time.time()
+        with qtbot.wait_signal(self.fetcher.finished) as blocker:
+            self.fetcher.fetch_maps(self._maps(widths))
+        elapsed = time.time() - start
+        imgs, legend_imgs, layer, style, init_time, valid_time, md5_filename = blocker.args
+        # the images are presented in the order of the list
+        assert [img.size[0] for img in imgs] == widths
+        assert len(legend_imgs) == len(widths) and legend_imgs[0] is legend_imgs[-1]
+        assert md5_filename == str(self.tmp_path / f"map{widths[-1]}.png")
+        # the shared legend is only retrieved once
+        assert len(self.server.requests) == len(widths) + 1
+        assert elapsed < len(widths) * self.DELAY
+
+    def test_fetch_maps_cancels_previous_list(self, qtbot):
+        finished = []
+        self.fetcher.finished.connect(lambda *args: finished.append(args))
+        self.fetcher.fetch_maps(self._maps(range(10, 30), prefix="stale"))
+        self.fetcher.fetch_maps(self._maps([30, 31]))
+        qtbot.wait_until(lambda: len(finished) == 1)
+        qtbot.wait(int(3 * self.DELAY * 1000))
+        assert len(finished) == 1
+        assert [img.size[0] for img in finished[0][0]] == [30, 31]
+        # the waiting maps of the previous list are not retrieved
+        assert len(self.server.requests) < 20
+
+    def test_fetch_maps_exception(self, qtbot):
+        maps = self._maps([10, 11, 12])
+        maps[1] = (mock.Mock(get_wms=mock.Mock(side_effect=ValueError("invalid layer"))),) + maps[1][1:]
+        with qtbot.wait_signal(self.fetcher.exception):
+            with qtbot.wait_signal(self.fetcher.finished) as blocker:
+                self.fetcher.fetch_maps(maps)
+        assert blocker.args == [None] * 6 + [str(self.tmp_path / "map11.png")]
@@ -24,10 +24,14 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import logging
 import os
+import time
 
 import mslib.msui.flighttrack as ft
+from mslib.utils.config import read_config_file
 from tests.constants import ROOT_DIR
+from tests.utils import create_long_track, create_msui_settings_file
 from mslib.plugins.io import csv
 
 
@@ -67,3 +71,25 @@ def test_load_from_csv():
 def _example_waypoints():
     return [ft.Waypoint(lat=61.168, lon=-149.960, flightlevel=350, location="Anchorage", comments="start"),
             ft.Waypoint(lat=51.878, lon=-176.646, flightlevel=350, location="Adak", comments="last")]
+
+
+def test_load_from_csv_long_track():
+    filename = os.path.join(ROOT_DIR, "testlongtrack.csv")
+    waypoints = create_long_track()
+    start = time.time()
+    csv.save_to_csv(filename, "testlongtrack", waypoints)
+    time_save = time.time() - start
+    start = time.time()
+    name, loaded = csv.load_from_csv(filename)
+    time_load = time.time() - start
+    logging.info("csv: saved %d waypoints in %.3fs, loaded in %.3fs", len(waypoints), time_save, time_load)
+    assert name == "testlongtrack"
+    assert [(wp.location, wp.lat, wp.lon, wp.flightlevel) for wp in loaded] == \
+        [(wp.location, wp.lat, wp.lon, wp.flightlevel) for wp in waypoints]
+
+    create_msui_settings_file('{"import_plugins_max_points": 1000, "import_plugins_tolerance_km": 1.0}')
+    read_config_file()
+    _, decimated = csv.load_from_csv(filename)
+    assert 1000 <= len(decimated) < len(waypoints)
+    assert [(wp.location, wp.lat, wp.lon, wp.flightlevel) for wp in decimated[::len(decimated) - 1]] == \
+        [(wp.location, wp.lat, wp.lon, wp.flightlevel) for wp in waypoints[::len(waypoints) - 1]]
@@ -24,9 +24,13 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import logging
 import os
+import time
 
+from mslib.utils.config import read_config_file
 from tests.constants import ROOT_DIR
+from tests.utils import create_long_track, create_msui_settings_file
 from mslib.plugins.io import flitestar
 
 
@@ -59,3 +63,26 @@ def test_load_from_flitestar():
     assert wp[5].lat == 51.5
     assert wp[5].lon == -28
     assert wp[5].flightlevel == 470.0
+
+
+def test_load_from_flitestar_long_track():
+    filename = os.path.join(ROOT_DIR, "testlongtrack.fls")
+    waypoints = create_long_track()
+    with open(filename, "w") as f:
+        f.write("# FliteStar/FliteMap generated flight plan.\nFPL 00\n")
+        for i, wp in enumerate(waypoints):
+            f.write(f"FWP p i W{i} {'N' if wp.lat >= 0 else 'S'} {int(abs(wp.lat))} {abs(wp.lat) % 1 * 60:.4f} "
+                    f"{'E' if wp.lon >= 0 else 'W'} {int(abs(wp.lon))} {abs(wp.lon) % 1 * 60:.4f} "
+                    f"{round(wp.flightlevel, 2) * 100:.0f}\n")
+    start = time.time()
+    name, loaded = flitestar.load_from_flitestar(filename)
+    logging.info("fls: loaded %d waypoints in %.3fs", len(loaded), time.time() - start)
+    assert name == "testlongtrack"
+    assert [(wp.location, wp.lat, wp.lon, wp.flightlevel) for wp in loaded] == \
+        [(f"W{i}", wp.lat, wp.lon, round(wp.flightlevel, 2)) for i, wp in enumerate(waypoints)]
+
+    create_msui_settings_file('{"import_plugins_max_points": 1000, "import_plugins_tolerance_km": 1.0}')
+    read_config_file()
+    _, decimated = flitestar.load_from_flitestar(filename)
+    assert 1000 <= len(decimated) < len(waypoints)
+    assert [wp.location for wp in decimated[::len(decimated) - 1]] == ["W0", f"W{len(waypoints) - 1}"]
@@ -24,10 +24,16 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import logging
 import os
+import time
+
+import gpxpy
 
 import mslib.msui.flighttrack as ft
+from mslib import __version__
 from tests.constants import ROOT_DIR
+from tests.utils import create_long_track
 from mslib.plugins.io import gpx
 
 
@@ -37,31 +43,43 @@ def test_save_to_gpx():
     name = "testgpxdata"
     gpx.save_to_gpx(filename, name, wp)
     with open(filename) as f:
-        data = f.readlines()
-    assert data == ['<?xml version="1.0" encoding="UTF-8"?>\n',
-                    '<gpx xmlns="http://www.topografix.com/GPX/1/1" '
-                    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
-                    'xsi:schemaLocation="http://www.topografix.com/GPX/1/1 '
-                    'http://www.topografix.com/GPX/1/1/gpx.xsd" version="1.1" creator="gpx.py -- '
-                    'https://github.com/tkrajina/gpxpy">\n',
-                    '  <metadata>\n',
-                    '    <name>testgpxdata</name>\n',
-                    '    <desc>MSS flight track export</desc>\n',
-                    '  </metadata>\n',
-                    '  <trk>\n',
-                    '    <trkseg>\n',
-                    '      <trkpt lat="61.168" lon="-149.96">\n',
-                    '        <name>Anchorage</name>\n',
-                    '      </trkpt>\n',
-                    '      <trkpt lat="51.878" lon="-176.646">\n',
-                    '        <name>Adak</name>\n',
-                    '      </trkpt>\n',
-                    '    </trkseg>\n',
-                    '  </trk>\n',
-                    '</gpx>'
-                    ]
+        document = gpxpy.parse(f)
+    assert document.version == "1.1"
+    assert document.creator == f"MSS {__version__}"
+    assert document.name == name
+    assert document.description == "MSS flight track export"
+    assert len(document.tracks) == 1 and len(document.tracks[0].segments) == 1
+    assert [(point.latitude, point.longitude, point.name) for point in document.tracks[0].segments[0].points] == \
+        [(61.168, -149.96, "Anchorage"), (51.878, -176.646, "Adak")]
+
+
+def test_save_to_gpx_special_values():
+    filename = os.path.join(ROOT_DIR, "testgpxspecial.gpx")
+    wp = [ft.Waypoint(lat=50, lon=0.00001, location="<A & B>"), ft.Waypoint(lat=-1e-7, lon=-180.)]
+    gpx.save_to_gpx(filename, "a & b", wp)
+    with open(filename) as f:
+        data = f.read()
+    # coordinates without exponent, as xsd:decimal
+    assert '<trkpt lat="50" lon="0.00001">' in data
+    assert '<trkpt lat="-0.0000001" lon="-180">' in data
+    document = gpxpy.parse(data)
+    assert document.name == "a & b"
+    assert [(point.latitude, point.longitude, point.name) for point in document.tracks[0].segments[0].points] == \
+        [(50, 0.00001, "<A & B>"), (-1e-7, -180, "1")]
 
 
 def _example_waypoints():
     return [ft.Waypoint(lat=61.168, lon=-149.960, flightlevel=350, location="Anchorage", comments="start"),
             ft.Waypoint(lat=51.878, lon=-176.646, flightlevel=350, location="Adak", comments="last")]
+
+
+def test_save_to_gpx_long_track():
+    filename = os.path.join(ROOT_DIR, "testlongtrack.gpx")
+    waypoints = create_long_track()
+    start = time.time()
+    gpx.save_to_gpx(filename, "testlongtrack", waypoints)
+    logging.info("gpx: saved %d waypoints in %.3fs", len(waypoints), time.time() - start)
+    with open(filename) as f:
+        data = f.read()
+    assert data.count("<trkpt ") == len(waypoints)
+    assert data.count("<name>P100</name>") == 1
@@ -24,10 +24,13 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import logging
 import os
+import time
 
 import mslib.msui.flighttrack as ft
 from tests.constants import ROOT_DIR
+from tests.utils import create_long_track
 from mslib.plugins.io import kml
 
 
@@ -71,3 +74,15 @@ def test_save_to_kml():
 def _example_waypoints():
     return [ft.Waypoint(lat=61.168, lon=-149.960, flightlevel=350, location="Anchorage", comments="start"),
             ft.Waypoint(lat=51.878, lon=-176.646, flightlevel=350, location="Adak", comments="last")]
+
+
+def test_save_to_kml_long_track():
+    filename = os.path.join(ROOT_DIR, "testlongtrack.kml")
+    waypoints = create_long_track()
+    start = time.time()
+    kml.save_to_kml(filename, "testlongtrack", waypoints)
+    logging.info("kml: saved %d waypoints in %.3fs", len(waypoints), time.time() - start)
+    with open(filename) as f:
+        data = f.read()
+    assert data.count("<Placemark>") == len(waypoints) + 1
+    assert data.count("<name>P100</name>") == 1
@@ -24,11 +24,12 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import csv
 import os
 import mock
 from PyQt5 import QtWidgets
 from mslib.utils.airdata import download_progress, get_airports, \
-    get_available_airspaces, update_airspace, get_airspaces
+    get_available_airspaces, update_airspace, get_airspaces, Airspace
 from tests.constants import ROOT_DIR
 
 
@@ -134,6 +135,40 @@ def test_get_downloaded_airports(mockbox):
         assert 'continent' in airports[0].keys()
 
 
+@mock.patch("PyQt5.QtWidgets.QMessageBox.question", return_value=QtWidgets.QMessageBox.No)
+def test_get_airports_cached(mockbox):
+    _cleanup_test_files()
+    file_path = os.path.join(ROOT_DIR, "downloads", "aip", "airports.csv")
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    fieldnames = ["id", "ident", "type", "name", "latitude_deg", "longitude_deg", "keywords"]
+    rows = [[str(i), f"X{i}", "small_airport", f'Airport "{i}", Zürich', str(45 + i / 100), str(i / 100), ""]
+            for i in range(100)]
+    with open(file_path, "w", newline="", encoding="utf8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(rows)
+    with open(file_path, "r", encoding="utf8") as f:
+        expected = list(csv.DictReader(f))
+
+    assert get_airports() == expected
+    assert os.path.exists(os.path.join(ROOT_DIR, "downloads", "aip", "airports.npz"))
+    # after a restart the parsed airports are read from the cache
+    Airspace.airports = []
+    with mock.patch("mslib.utils.airdata.csv.reader", side_effect=AssertionError):
+        airports = get_airports()
+    assert airports == expected
+    assert airports[-1] == expected[-1]
+    assert airports[10:12] == expected[10:12]
+
+    # a changed file is parsed again
+    Airspace.airports = []
+    with open(file_path, "a", newline="", encoding="utf8") as f:
+        csv.writer(f).writerow(["100", "X100", "heliport", "Heliport", "0", "0", "helicopters"])
+    airports = get_airports()
+    assert len(airports) == 101
+    assert airports[100]["keywords"] == "helicopters"
+
+
 def test_get_available_airspaces():
     _cleanup_test_files()
     airspaces = get_available_airspaces()
@@ -204,6 +239,19 @@ def test_get_airspaces(mockbox):
     ]
 
 
+@mock.patch("mslib.utils.airdata.download_progress", _download_progress_airspace)
+@mock.patch("PyQt5.QtWidgets.QMessageBox.question", return_value=QtWidgets.QMessageBox.Yes)
+def test_get_airspaces_cached(mockbox):
+    _cleanup_test_files()
+    airspaces = get_airspaces(countries=["bg"])
+    assert len(airspaces) == 1
+    assert os.path.exists(os.path.join(ROOT_DIR, "downloads", "aip", "bg_asp.npz"))
+    # after a restart the parsed airspaces are read from the cache
+    Airspace.data = []
+    with mock.patch("mslib.utils.airdata._parse_airspaces", side_effect=AssertionError):
+        assert get_airspaces(countries=["bg"]) == airspaces
+
+
 @mock.patch("mslib.utils.airdata.download_progress", _download_incomplete_airspace)
 @mock.patch("PyQt5.QtWidgets.QMessageBox.information")
 @mock.patch("PyQt5.QtWidgets.QMessageBox.question", return_value=QtWidgets.QMessageBox.Yes)
@@ -26,9 +26,12 @@
 """
 import logging
 import datetime
+import time
 
+import mock
 import numpy as np
 import pytest
+from pyproj import Geod
 
 import mslib.utils.coordinate as coordinate
 
@@ -51,6 +54,54 @@ class TestGetDistance:
         assert coordinate.find_location(50.92, 6.36) == ([50.92, 6.36], 'Juelich')
         assert coordinate.find_location(50.9200002, 6.36) == ([50.92, 6.36], 'Juelich')
 
+    @staticmethod
+    def _find_location_brute_force(lat, lon, tolerance, locations):
+        distances = sorted([(coordinate.get_distance(lat, lon, loc_lat, loc_lon), loc)
+                            for loc, (loc_lat, loc_lon) in locations.items()])
+        if len(distances) > 0 and distances[0][0] <= tolerance:
+            return locations[distances[0][1]], distances[0][1]
+        return None
+
+    def test_find_location_index(self):
+        rng = np.random.default_rng(34)
+        n_locations = 50000
+        lats = np.rad2deg(np.arcsin(rng.uniform(-1, 1, n_locations)))
+        lons = rng.uniform(-180, 180, n_locations)
+        locations = {f"L{index:05d}": [float(lat), float(lon)] for index, (lat, lon) in enumerate(zip(lats, lons))}
+        # equidistant locations are resolved by name, as before
+        locations.update({"B_twin": [10., 10.], "A_twin": [10., 10.], "pole": [90., 0.], "dateline": [0., 180.]})
+        queries = [(10., 10., 5), (89.99, 123., 5), (0., -179.99, 5), (0., 179.9, 1e-3), (-90., 0., 100)]
+        queries += [(locations[name][0], locations[name][1], 1e-3) for name in list(locations)[:20]]
+        queries += [(float(np.rad2deg(np.arcsin(rng.uniform(-1, 1)))), float(rng.uniform(-180, 180)), float(tolerance))
+                    for tolerance in rng.choice([1e-3, 5, 50, 500, 5000, 30000], 40)]
+
+        with mock.patch("mslib.utils.coordinate.config_loader", return_value=locations):
+            start = time.time()
+            results = [coordinate.find_location(*query) for query in queries]
+            elapsed = time.time() - start
+            start = time.time()
+            expected = [self._find_location_brute_force(*query, locations) for query in queries]
+            LOGGER.info("find_location: %.2fms per lookup (%.2fms without index)",
+                        1000 * elapsed / len(queries), 1000 * (time.time() - start) / len(queries))
+            assert results == expected
+            assert results[0] == ([10., 10.], "A_twin")
+            assert any(result is None for result in results)
+
+            # the index follows changes of the locations
+            locations["new"] = [0., 0.]
+            assert coordinate.find_location(0., 0.001) == ([0., 0.], "new")
+            del locations["new"]
+            assert coordinate.find_location(0., 0.001) is None
+            # also when a location is moved in place
+            locations["pole"] = [0., 0.]
+            assert coordinate.find_location(0., 0.001) == ([0., 0.], "pole")
+            locations["pole"][1] = 90.
+            assert coordinate.find_location(0., 0.001) is None
+        with mock.patch("mslib.utils.coordinate.config_loader", return_value={"other": [0., 0.]}):
+            assert coordinate.find_location(0., 0.001) == ([0., 0.], "other")
+        with mock.patch("mslib.utils.coordinate.config_loader", return_value={}):
+            assert coordinate.find_location(0., 0.) is None
+
 
 class TestProjections:
     def test_get_projection_params(self):
@@ -76,6 +127,9 @@ class TestAngles:
         assert coordinate.fix_angle(-180) == 180
         assert coordinate.fix_angle(-181) == 179
         assert coordinate.fix_angle(420) == 60
+        assert coordinate.fix_angle(720) == 360
+        angles = np.array([0, 180, 270, -90, -180, -181, 420, 720, -360])
+        assert list(coordinate.fix_angle(angles)) == [coordinate.fix_angle(_x) for _x in angles]
 
     def test_rotate_point(self):
         assert coordinate.rotate_point([0, 0], 0) == (0.0, 0.0)
@@ -190,3 +244,128 @@ def test_pathpoints():
     for i in range(3):
         assert pytest.approx(result[i][0]) == ref[i][0]
         assert pytest.approx(result[i][-1]) == ref[i][-1]
+
+
+def _synthetic_track(n_points=1000):
+    rng = np.random.default_rng(1)
+    lons = np.cumsum(rng.uniform(-2, 6, n_points)) % 360 - 180
+    lats = np.clip(np.cumsum(rng.uniform(-3, 3, n_points)), -80, 80)
+    return lons, lats
+
+
+@pytest.mark.parametrize("geod", [Geod(ellps="WGS84"), Geod(a=6370997, b=6370997)])
+def test_geodesic_path(geod):
+    lons, lats = _synthetic_track()
+    # include identical and antipodal points
+    lons[10:12], lats[10:12] = [15, 15], [30, 30]
+    lons[20:22], lats[20:22] = [10, -170], [45, -45]
+    npoints = np.arange(len(lons) - 1) % 7
+
+    start = time.time()
+    ref_lons, ref_lats = [lons[0]], [lats[0]]
+    for i in range(len(lons) - 1):
+        lonlats = geod.npts(lons[i], lats[i], lons[i + 1], lats[i + 1], npoints[i]) if npoints[i] > 0 else []
+        for lon, lat in lonlats:
+            ref_lons.append(lon)
+            ref_lats.append(lat)
+        ref_lons.append(lons[i + 1])
+        ref_lats.append(lats[i + 1])
+    time_loop = time.time() - start
+    start = time.time()
+    r_lons, r_lats = coordinate.geodesic_path(lons, lats, npoints, geod=geod)
+    time_vectorised = time.time() - start
+    LOGGER.info("geodesic path of %d points: %.4fs per segment, %.4fs vectorised",
+                len(r_lons), time_loop, time_vectorised)
+
+    assert len(r_lons) == len(ref_lons)
+    assert geod.inv(ref_lons, ref_lats, r_lons, r_lats)[2].max() < 1
+    # the given points are kept exactly
+    ends = np.cumsum(np.concatenate([[0], npoints + 1]))
+    assert (r_lons[ends] == lons).all()
+    assert (r_lats[ends] == lats).all()
+
+
+@pytest.mark.parametrize("connection", ["linear", "greatcircle"])
+def test_pathpoints_segments(connection):
+    lons, lats = _synthetic_track()
+    times = [datetime.datetime(2012, 7, 1, 10, 30) + datetime.timedelta(minutes=i) for i in range(len(lons))]
+    alts = np.linspace(0, 15, len(lons))
+
+    start = time.time()
+    r_lats, r_lons = coordinate.path_points(lats, lons, 5000, connection=connection)
+    time_vectorised = time.time() - start
+    result = coordinate.path_points(lats, lons, 5000, times=times, alts=alts, connection=connection)
+
+    # per segment computation of the intermediate points
+    start = time.time()
+    if connection == "linear":
+        distances = np.hypot(lats[:-1] - lats[1:], lons[:-1] - lons[1:])
+    else:
+        distances = [coordinate.get_distance(lats[i], lons[i], lats[i + 1], lons[i + 1]) for i in range(len(lats) - 1)]
+    length_point_segment = sum(distances) / (5000 + len(lats) - 2)
+    ref_lats, ref_lons, ref_alts = [], [], []
+    for i in range(len(lats) - 1):
+        segment_points = max(int(round(distances[i] / length_point_segment)), 2)
+        lats_, lons_ = coordinate.latlon_points(
+            lats[i], lons[i], lats[i + 1], lons[i + 1], numpoints=segment_points, connection=connection)
+        startidx = 0 if i == 0 else 1
+        ref_lats.extend(lats_[startidx:])
+        ref_lons.extend(lons_[startidx:])
+        ref_alts.extend(np.linspace(alts[i], alts[i + 1], segment_points)[startidx:])
+    time_loop = time.time() - start
+    LOGGER.info("%s path of %d points: %.4fs per segment, %.4fs vectorised",
+                connection, len(ref_lats), time_loop, time_vectorised)
+
+    assert all(len(_x) == len(ref_lats) for _x in result)
+    assert Geod(ellps="WGS84").inv(ref_lons, ref_lats, r_lons, r_lats)[2].max() < 1
+    assert (result[0] == r_lats).all() and (result[1] == r_lons).all()
+    assert np.allclose(result[3], ref_alts)
+    assert result[2][0] == times[0]
+    assert result[2][-1] == times[-1]
+
+
+@pytest.mark.parametrize("max_points, tolerance", [(50, 1e5), (50, 200.), (1000, 10.)])
+def test_decimate_path(max_points, tolerance):
+    lons, lats = _synthetic_track(2000)
+    start = time.time()
+    keep = coordinate.decimate_path(lats, lons, max_points, tolerance)
+    LOGGER.info("decimated path of %d points to %d points in %.4fs", len(lons), len(keep), time.time() - start)
+
+    assert keep[0] == 0 and keep[-1] == len(lons) - 1
+    assert (np.diff(keep) > 0).all()
+    assert len(keep) == max_points if tolerance == 1e5 else len(keep) >= max_points
+    # cross track distances of the removed points to the great circle segments of the reduced path
+    geod = Geod(a=coordinate.EARTH_RADIUS_KM * 1000, b=coordinate.EARTH_RADIUS_KM * 1000)
+    segments = np.searchsorted(keep, np.arange(len(lons)), side="right") - 1
+    removed = np.setdiff1d(np.arange(len(lons)), keep)
+    first, last = keep[segments[removed]], keep[segments[removed] + 1]
+    azimuth_12, _, distance_12 = geod.inv(lons[first], lats[first], lons[last], lats[last])
+    azimuth_13, _, distance_13 = geod.inv(lons[first], lats[first], lons[removed], lats[removed])
+    _, _, distance_23 = geod.inv(lons[last], lats[last], lons[removed], lats[removed])
+    radius = coordinate.EARTH_RADIUS_KM * 1000
+    cross_track = np.arcsin(np.sin(distance_13 / radius) * np.sin(np.deg2rad(azimuth_13 - azimuth_12)))
+    along_track = radius * np.arccos(np.clip(np.cos(distance_13 / radius) / np.cos(cross_track), -1, 1))
+    inner = (np.cos(np.deg2rad(azimuth_13 - azimuth_12)) > 0) & (along_track <= distance_12)
+    distances = np.where(inner, radius * np.abs(cross_track), np.minimum(distance_13, distance_23)) / 1000
+    assert distances.max() <= tolerance * (1 + 1e-6)
+
+    assert (coordinate.decimate_path(lats, lons, 0, tolerance) == np.arange(len(lons))).all()
+    assert (coordinate.decimate_path(lats[:10], lons[:10], max_points, tolerance) == np.arange(10)).all()
+
+
+def test_decimate_path_invalid():
+    lons, lats = _synthetic_track(50)
+    with pytest.raises(ValueError):
+        coordinate.decimate_path(lats[:4], lons[:4], 2, -1)
+    with pytest.raises(ValueError):
+        coordinate.decimate_path(lats[:4], lons[:4], -1, 0.1)
+
+    # points with unknown coordinates are kept with their neighbours, the path is decimated around them
+    lats[20] = np.nan
+    keep = coordinate.decimate_path(lats, lons, 5, 0.1)
+    assert {0, 19, 20, 21, 49} <= set(keep.tolist())
+    assert len(keep) > 5
+    finite = np.isfinite(lats)
+    reference = coordinate.decimate_path(lats[21:], lons[21:], 5, 0.1)
+    assert (keep[keep >= 21] == reference + 21).all()
+    assert finite[keep].sum() == len(keep) - 1
@@ -26,9 +26,27 @@
 """
 
 
+import datetime
+import filecmp
+import io
+import json
+import logging
 import os
+import shutil
+import threading
+import time
+import zlib
 
-from mslib.utils.mssautoplot import load_from_ftml
+import mock
+import numpy as np
+import PIL.Image
+import pytest
+from click.testing import CliRunner
+
+from mslib.utils.mssautoplot import load_from_ftml, main, SideViewPlotting, TopViewPlotting
+from tests.utils import XML_CONTENT1
+
+GETMAP_DELAY = 0.5
 
 
 def test_load_from_ftml():
@@ -43,3 +61,208 @@ def test_load_from_ftml():
                          (63.74, 1.73, 0.0, 'C', 'Landing')]
     assert len(wp_list) == 5
     assert type(wp_list[0]).__name__ == 'Waypoint'
+
+
+class _StandInWebMapService:
+    """
+    A local web map service answering each GetMap request after GETMAP_DELAY seconds
+    with an image depending on the requested layer and time
+    """
+    delay = GETMAP_DELAY
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+    def __init__(self, url, username=None, password=None, version=None):
+        pass
+
+    def getmap(self, layers=None, size=None, **kwargs):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            time.sleep(self.delay)
+            crc = zlib.crc32(f"{layers}{kwargs['time']}{kwargs.get('level')}".encode())
+            image = PIL.Image.new("RGBA", size, (crc & 255, (crc >> 8) & 255, (crc >> 16) & 255, 128))
+            image.paste((255, 255, 255, 255), (0, 0, size[0] // 2, size[1] // 3))
+            result = io.BytesIO()
+            image.save(result, format="PNG")
+            result.seek(0)
+            return result
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+@pytest.mark.parametrize("view", ["top", "side"])
+def test_parallel_plots(tmp_path, monkeypatch, view):
+    example_file = os.path.join(os.path.dirname(__file__), "..", "data", "example.ftml")
+    layers = ["layer1", "layer2"]
+    config = {
+        "automated_plotting_flights": [["flight", "01 Europe (cyl)", "1000,200", "example.ftml", "", ""]],
+        "automated_plotting_hsecs": [["http://localhost/wms", layer, "", "300"] for layer in layers],
+        "automated_plotting_vsecs": [["http://localhost/wms", layer, "", ""] for layer in layers],
+    }
+    cpath = tmp_path / "mssautoplot.json"
+    cpath.write_text(json.dumps(config))
+    args = ["--cpath", str(cpath), "--view", view,
+            "--stime", "2019-09-01T00:00:00", "--etime", "2019-09-02T06:00:00", "--intv", "6"]
+    elapsed, max_active = {}, {}
+    with mock.patch("mslib.utils.mssautoplot.MSUIWebMapService", _StandInWebMapService):
+        for workers in [1, 4]:
+            directory = tmp_path / str(workers)
+            directory.mkdir()
+            shutil.copy(example_file, directory)
+            monkeypatch.chdir(directory)
+            _StandInWebMapService.max_active = 0
+            begin = time.time()
+            result = CliRunner().invoke(main, args + ["--workers", str(workers)])
+            elapsed[workers] = time.time() - begin
+            assert result.exit_code == 0, result.output
+            assert result.output.count("Plot downloaded!") == 12
+            max_active[workers] = _StandInWebMapService.max_active
+    logging.info("%s view: 12 plots sequentially in %.3fs, with 4 workers in %.3fs (speedup %.1f)",
+                 view, elapsed[1], elapsed[4], elapsed[1] / elapsed[4])
+
+    filenames = sorted([f"flight_{layer}_{i}.png" for layer in layers for i in range(1, 7)] + ["example.ftml"])
+    assert sorted(os.listdir(tmp_path / "1")) == filenames
+    assert sorted(os.listdir(tmp_path / "4")) == filenames
+    match, mismatch, errors = filecmp.cmpfiles(tmp_path / "1", tmp_path / "4", filenames, shallow=False)
+    assert mismatch == [] and errors == []
+    # the requests to the web map service overlap, but never more than workers at a time
+    assert max_active[1] == 1 and 1 < max_active[4] <= 4
+    assert elapsed[4] < elapsed[1]
+
+
+def test_colliding_plot_names(tmp_path, monkeypatch):
+    # plots of the same flight and layer only differing in elevation, and a duplicate entry
+    config = {
+        "automated_plotting_flights": [["flight", "01 Europe (cyl)", "1000,200", "example.ftml", "", ""]],
+        "automated_plotting_hsecs": [["http://localhost/wms", "layer1", "", elevation]
+                                     for elevation in ["300", "500", "500"]],
+    }
+    cpath = tmp_path / "mssautoplot.json"
+    cpath.write_text(json.dumps(config))
+    shutil.copy(os.path.join(os.path.dirname(__file__), "..", "data", "example.ftml"), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(_StandInWebMapService, "delay", 0)
+    with mock.patch("mslib.utils.mssautoplot.MSUIWebMapService", _StandInWebMapService):
+        result = CliRunner().invoke(main, ["--cpath", str(cpath), "--stime", "2019-09-01T00:00:00",
+                                           "--etime", "2019-09-01T06:00:00", "--intv", "6", "--animation", "gif"])
+    assert result.exit_code == 0, result.output
+
+    details = ["300", "500_1", "500_2"]
+    names = [f"flight_layer1_{detail}" for detail in details]
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [f"flight_layer1_{i}_{detail}.png" for detail in details for i in [1, 2]] +
+        [f"{name}.gif" for name in names] + ["example.ftml", "mssautoplot.json"])
+    for i in [1, 2]:
+        assert filecmp.cmp(f"flight_layer1_{i}_500_1.png", f"flight_layer1_{i}_500_2.png", shallow=False)
+        assert not filecmp.cmp(f"flight_layer1_{i}_300.png", f"flight_layer1_{i}_500_1.png", shallow=False)
+    for name in names:
+        with PIL.Image.open(f"{name}.gif") as image:
+            assert image.n_frames == 2
+
+
+def _run_time_series(tmp_path, monkeypatch, view, *args):
+    """
+    Runs mssautoplot for a time series of two layers at four times in tmp_path
+    """
+    layers = ["layer1", "layer2"]
+    config = {
+        "automated_plotting_flights": [["flight", "01 Europe (cyl)", "1000,200", "example.ftml", "", ""]],
+        "automated_plotting_hsecs": [["http://localhost/wms", layer, "", "300"] for layer in layers],
+        "automated_plotting_vsecs": [["http://localhost/wms", layer, "", ""] for layer in layers],
+    }
+    cpath = tmp_path / "mssautoplot.json"
+    cpath.write_text(json.dumps(config))
+    shutil.copy(os.path.join(os.path.dirname(__file__), "..", "data", "example.ftml"), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(_StandInWebMapService, "delay", 0)
+    with mock.patch("mslib.utils.mssautoplot.MSUIWebMapService", _StandInWebMapService):
+        result = CliRunner().invoke(main, ["--cpath", str(cpath), "--view", view, "--stime", "2019-09-01T00:00:00",
+                                           "--etime", "2019-09-01T18:00:00", "--intv", "6"] + list(args))
+    assert result.exit_code == 0, result.output
+    assert result.output.count("Plot downloaded!") == 8
+    return str(cpath), layers
+
+
+@pytest.mark.parametrize("view", ["top", "side"])
+def test_time_series_frames(tmp_path, monkeypatch, view):
+    cpath, layers = _run_time_series(tmp_path, monkeypatch, view, "--workers", "1")
+
+    # every frame drawn on its own, with all parts of the figure created anew
+    reference = tmp_path / "reference"
+    reference.mkdir()
+    shutil.copy(tmp_path / "example.ftml", reference)
+    monkeypatch.chdir(reference)
+    with mock.patch("mslib.utils.mssautoplot.MSUIWebMapService", _StandInWebMapService):
+        for layer in layers:
+            for i in range(1, 5):
+                plotting = (TopViewPlotting if view == "top" else SideViewPlotting)(cpath)
+                valid_time = datetime.datetime(2019, 9, 1) + datetime.timedelta(hours=6 * (i - 1))
+                plotting.draw("flight", "01 Europe (cyl)", "1000,200", "example.ftml", None, valid_time,
+                              "http://localhost/wms", layer, "", "300" if view == "top" else "", i)
+                frame = np.asarray(PIL.Image.open(tmp_path / f"flight_{layer}_{i}.png"))
+                assert (frame == np.asarray(PIL.Image.open(reference / f"flight_{layer}_{i}.png"))).all()
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_side_view_frames_of_several_flights(tmp_path, monkeypatch, workers):
+    config = {
+        "automated_plotting_flights": [["flight", "01 Europe (cyl)", "1000,200", "example.ftml", "", ""],
+                                       ["other", "01 Europe (cyl)", "1000,200", "other.ftml", "", ""]],
+        "automated_plotting_vsecs": [["http://localhost/wms", "layer1", "", ""]],
+    }
+    cpath = tmp_path / "mssautoplot.json"
+    cpath.write_text(json.dumps(config))
+    shutil.copy(os.path.join(os.path.dirname(__file__), "..", "data", "example.ftml"), tmp_path)
+    (tmp_path / "other.ftml").write_text(XML_CONTENT1)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(_StandInWebMapService, "delay", 0)
+    with mock.patch("mslib.utils.mssautoplot.MSUIWebMapService", _StandInWebMapService):
+        result = CliRunner().invoke(main, ["--cpath", str(cpath), "--view", "side", "--workers", str(workers),
+                                           "--stime", "2019-09-01T00:00:00", "--etime", "2019-09-01T12:00:00",
+                                           "--intv", "6"])
+        assert result.exit_code == 0, result.output
+        assert result.output.count("Plot downloaded!") == 6
+
+        # every frame drawn by a new plotting object configured with only the flight of the frame
+        reference = tmp_path / "reference"
+        reference.mkdir()
+        shutil.copy(tmp_path / "example.ftml", reference)
+        shutil.copy(tmp_path / "other.ftml", reference)
+        monkeypatch.chdir(reference)
+        for flight_config in config["automated_plotting_flights"]:
+            flight, filename = flight_config[0], flight_config[3]
+            reference_cpath = reference / f"{flight}.json"
+            reference_cpath.write_text(json.dumps(dict(config, automated_plotting_flights=[flight_config])))
+            for i in range(1, 4):
+                valid_time = datetime.datetime(2019, 9, 1) + datetime.timedelta(hours=6 * (i - 1))
+                SideViewPlotting(str(reference_cpath)).draw(
+                    flight, "01 Europe (cyl)", "1000,200", filename, None, valid_time,
+                    "http://localhost/wms", "layer1", "", "", i)
+                frame = np.asarray(PIL.Image.open(tmp_path / f"{flight}_layer1_{i}.png"))
+                assert (frame == np.asarray(PIL.Image.open(reference / f"{flight}_layer1_{i}.png"))).all()
+
+
+@pytest.mark.parametrize("animation, filename", [("gif", "flight_layer1.gif"), ("apng", "flight_layer1.apng")])
+def test_time_series_animation(tmp_path, monkeypatch, animation, filename):
+    _run_time_series(tmp_path, monkeypatch, "top", "--animation", animation)
+    with PIL.Image.open(tmp_path / filename) as image:
+        assert image.format == ("GIF" if animation == "gif" else "PNG")
+        assert image.n_frames == 4
+        assert image.size == PIL.Image.open(tmp_path / "flight_layer1_1.png").size
+    assert os.path.exists(tmp_path / filename.replace("layer1", "layer2"))
+
+
+def test_time_series_sprite_sheet(tmp_path, monkeypatch):
+    _run_time_series(tmp_path, monkeypatch, "side", "--animation", "sprite")
+    frames = [PIL.Image.open(tmp_path / f"flight_layer2_{i}.png").convert("RGB") for i in range(1, 5)]
+    sheet = PIL.Image.open(tmp_path / "flight_layer2_sprite.png")
+    assert sheet.size == (sum(frame.width for frame in frames), frames[0].height)
+    left = 0
+    for frame in frames:
+        assert (np.asarray(sheet.crop((left, 0, left + frame.width, frame.height))) == np.asarray(frame)).all()
+        left += frame.width
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+
+    tests._test_utils.test_ogcwms
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module provides pytest functions to test mslib.utils.ogcwms
+
+    This file is part of MSS.
+
+    :copyright: Copyright 2024 by the MSS team, see AUTHORS.
+    :license: APACHE-2.0, see LICENSE for details.
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+import concurrent.futures
+import urllib.parse
+
+import pytest
+import requests
+
+from mslib.utils import ogcwms
+from mslib.utils.config import config_loader
+from tests.utils import WMSStandIn
+
+N_REQUESTS = 20
+
+
+@pytest.fixture(autouse=True)
+def sessions():
+    ogcwms.close_sessions()
+    yield
+    ogcwms.close_sessions()
+
+
+def _getmap(url, index, **kwargs):
+    data = urllib.parse.urlencode({"service": "WMS", "request": "GetMap", "version": "1.3.0", "layers": "test",
+                                   "width": 10 + index, "height": 10})
+    return ogcwms.openURL(url, data, "Get", **kwargs).read()
+
+
+def test_get_session():
+    session = ogcwms.get_session("http://example.org/wms")
+    assert ogcwms.get_session("HTTP://EXAMPLE.ORG/other/wms?service=WMS") is session
+    assert ogcwms.get_session("https://example.org/wms") is not session
+    assert ogcwms.get_session("http://example.org/wms", ("user", "password")) is not session
+    adapter = session.get_adapter("http://example.org/wms")
+    assert adapter._pool_maxsize == config_loader(dataset="WMS_connection_pool_size")
+    assert adapter.max_retries.total == config_loader(dataset="WMS_request_retries")
+
+
+def test_getmap_reuses_connection():
+    with WMSStandIn() as server:
+        images = [_getmap(server.url, index) for index in range(N_REQUESTS)]
+        assert len(set(images)) == N_REQUESTS
+        assert len(server.requests) == N_REQUESTS
+        assert server.connections == 1
+        # other credentials use their own connections
+        _getmap(server.url, 0, username="user", password="password")
+        assert server.connections == 2
+
+
+def test_getmap_concurrent():
+    pool_size = config_loader(dataset="WMS_connection_pool_size")
+    with WMSStandIn(delay=0.05) as server:
+        with concurrent.futures.ThreadPoolExecutor(pool_size) as executor:
+            for _ in range(3):
+                images = list(executor.map(lambda index: _getmap(server.url, index), range(pool_size)))
+        assert len(set(images)) == pool_size
+        assert len(server.requests) == 3 * pool_size
+        # all threads share the connections of one pool
+        assert server.connections <= pool_size
+
+
+def test_getmap_retries():
+    with WMSStandIn(failures=config_loader(dataset="WMS_request_retries")) as server:
+        assert _getmap(server.url, 0).startswith(b"\x89PNG")
+        assert len(server.requests) == config_loader(dataset="WMS_request_retries") + 1
+    with WMSStandIn(failures=config_loader(dataset="WMS_request_retries") + 1) as server:
+        with pytest.raises(Exception, match="503"):
+            _getmap(server.url, 0)
+
+
+def test_getmap_read_timeout_not_retried():
+    with WMSStandIn(delay=0.5) as server:
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            _getmap(server.url, 0, timeout=0.1)
+        assert len(server.requests) == 1
@@ -25,13 +25,68 @@
     limitations under the License.
 """
 
+import logging
+import time
+
 import numpy as np
 import pytest
+from metpy.constants import Rd, g
 
 from mslib.utils.units import units
 from mslib.utils import thermolib
 
 
+def _reference_flightlevel2pressure(height):
+    """
+    The layer by layer implementation thermolib.flightlevel2pressure is checked against
+    """
+    p = np.full_like(height, np.nan) * units.Pa
+    for i, ((z0, t0, p0, gamma), (z1, _, _, _)) in enumerate(zip(thermolib._STANDARD_ATMOSPHERE[:-1],
+                                                                 thermolib._STANDARD_ATMOSPHERE[1:])):
+        indices = (height >= z0) & (height < z1)
+        if i == 0:
+            indices |= height < z0
+        if gamma != 0:
+            p[indices] = p0 * ((t0 - gamma * (height[indices] - z0)) / t0) ** (g / (gamma * Rd))
+        else:
+            p[indices] = p0 * np.exp(-g * (height[indices] - z0) / (Rd * t0))
+    return p
+
+
+def _reference_pressure2flightlevel(pressure):
+    """
+    The layer by layer implementation thermolib.pressure2flightlevel is checked against
+    """
+    z = np.full_like(pressure, np.nan) * units.hft
+    for i, ((z0, t0, p0, gamma), (_, _, p1, _)) in enumerate(zip(thermolib._STANDARD_ATMOSPHERE[:-1],
+                                                                 thermolib._STANDARD_ATMOSPHERE[1:])):
+        indices = (pressure > p1) & (pressure <= p0)
+        if i == 0:
+            indices |= (pressure >= p0)
+        if gamma != 0:
+            z[indices] = z0 + 1. / gamma * (t0 - t0 * np.exp(gamma * Rd / g * np.log(pressure[indices] / p0)))
+        else:
+            z[indices] = z0 - (Rd * t0) / g * np.log(pressure[indices] / p0)
+    return z
+
+
+def _reference_isa_temperature(height):
+    """
+    The layer by layer implementation thermolib.isa_temperature is checked against
+    """
+    for i, ((z0, t0, _, gamma), (z1, _, _, _)) in enumerate(zip(thermolib._STANDARD_ATMOSPHERE[:-1],
+                                                                thermolib._STANDARD_ATMOSPHERE[1:])):
+        if ((i == 0) and (height < z0)) or (z0 <= height < z1):
+            return (t0 - gamma * (height - z0)).to(units.K)
+
+
+def _timed(function, argument, number):
+    begin = time.time()
+    for _ in range(number):
+        function(argument)
+    return (time.time() - begin) / number
+
+
 def test_flightlevel2pressure2flightlevel():
     fs = (np.arange(1, 71000, 1000.) * units.m).to(units.hft)
     ps = thermolib.flightlevel2pressure(fs)
@@ -89,6 +144,53 @@ def test_isa_temperature():
     assert thermolib.isa_temperature(51000 * units.m).magnitude == pytest.approx(270.65)
 
 
+def test_standard_atmosphere_matches_reference():
+    layers = thermolib._STANDARD_ATMOSPHERE[:-1]
+    heights = np.concatenate([np.linspace(-2000, 70999, 10001), [z0.m_as(units.m) for z0, _, _, _ in layers]])
+    heights = heights * units.m
+    np.testing.assert_allclose(thermolib.flightlevel2pressure(heights).m_as(units.Pa),
+                               _reference_flightlevel2pressure(heights).m_as(units.Pa), rtol=1e-13)
+    np.testing.assert_allclose(thermolib.isa_temperature(heights).m_as(units.K),
+                               [_reference_isa_temperature(height).m_as(units.K) for height in heights],
+                               rtol=1e-13)
+    pressures = np.concatenate([np.geomspace(3.957, 120000, 10001), [p0.m_as(units.Pa) for _, _, p0, _ in layers]])
+    pressures = pressures * units.Pa
+    np.testing.assert_allclose(thermolib.pressure2flightlevel(pressures).m_as(units.hft),
+                               _reference_pressure2flightlevel(pressures).m_as(units.hft), rtol=1e-13, atol=1e-10)
+    # scalars stay scalars
+    assert np.ndim(thermolib.flightlevel2pressure(250 * units.hft).magnitude) == 0
+    assert thermolib.flightlevel2pressure(250 * units.hft).magnitude == pytest.approx(
+        _reference_flightlevel2pressure([250.] * units.hft)[0].m_as(units.Pa), rel=1e-13)
+    assert np.ndim(thermolib.pressure2flightlevel(30000 * units.Pa).magnitude) == 0
+    assert thermolib.pressure2flightlevel(30000 * units.Pa).magnitude == pytest.approx(
+        _reference_pressure2flightlevel([30000.] * units.Pa)[0].m_as(units.hft), rel=1e-13)
+    with pytest.raises(ValueError):
+        thermolib.flightlevel2pressure([100, np.nan] * units.hft)
+    with pytest.raises(ValueError):
+        thermolib.pressure2flightlevel([1000, 0] * units.Pa)
+    with pytest.raises(ValueError):
+        thermolib.isa_temperature([100, 800] * units.km)
+
+
+def test_standard_atmosphere_benchmark():
+    heights = np.linspace(-1000, 70000, 10 ** 6) * units.m
+    pressures = np.geomspace(4, 110000, 10 ** 6) * units.Pa
+    for function, reference, scalar, array in [
+            (thermolib.flightlevel2pressure, _reference_flightlevel2pressure, 250 * units.hft, heights),
+            (thermolib.pressure2flightlevel, _reference_pressure2flightlevel, 30000 * units.Pa, pressures)]:
+        scalar_time = _timed(function, scalar, 200)
+        reference_time = _timed(reference, [scalar.magnitude] * scalar.units, 200)
+        array_time = _timed(function, array, 3)
+        logging.info("%s: %.1fus per scalar (%.1fus before), %.3fs for %d values (%.3fs before)",
+                     function.__name__, scalar_time * 1e6, reference_time * 1e6,
+                     array_time, len(array), _timed(reference, array, 1))
+        assert scalar_time < reference_time
+    scalar_time = _timed(thermolib.isa_temperature, 250 * units.hft, 200)
+    logging.info("isa_temperature: %.1fus per scalar (%.1fus before), %.3fs for %d values",
+                 scalar_time * 1e6, _timed(_reference_isa_temperature, 250 * units.hft, 200) * 1e6,
+                 _timed(thermolib.isa_temperature, heights, 3), len(heights))
+
+
 class TestConverter:
     def test_convert_pressure_to_vertical_axis_measure(self):
         assert thermolib.convert_pressure_to_vertical_axis_measure('pressure', 10000) == 100
@@ -26,6 +26,10 @@
     limitations under the License.
 """
 
+import logging
+import time
+
+import numpy as np
 import pytest
 from mslib.utils.units import convert_to, units
 
@@ -90,3 +94,60 @@ def test_convert_to():
     assert convert_to(10, "ppt", "dimensionless", None) == pytest.approx(10e-12)
     assert convert_to(10, "ppm", "ppt", None) == pytest.approx(10e6)
     assert convert_to(10, "ppb", "ppm", None) == pytest.approx(10e-3)
+
+
+def _pint_convert(value, from_unit, to_unit):
+    """
+    convert_to done by pint for every value, as convert_to did before caching the conversions
+    """
+    quantity = units.Quantity(value, from_unit)
+    if quantity.dimensionality != units(to_unit).dimensionality:
+        quantity = quantity / units.Quantity(9.81, "m s^-2")
+    return quantity.to(to_unit).magnitude
+
+
+@pytest.mark.parametrize("from_unit, to_unit", [
+    ("Pa", "hPa"), ("K", "degC"), ("degC", "K"), ("degF", "degC"), ("m/s", "knots"), ("km", "hft"),
+    ("m^2s^-2", "m"), ("m**2 s**-2", "km"), ("ppm", "ppb"), ("decibel", "dimensionless")])
+def test_convert_to_equals_pint(from_unit, to_unit):
+    values = np.linspace(-100, 1e5, 101)
+    for _ in range(2):
+        np.testing.assert_allclose(convert_to(values, from_unit, to_unit),
+                                   _pint_convert(values, from_unit, to_unit), rtol=1e-13)
+        assert convert_to(values[10], from_unit, to_unit) == pytest.approx(
+            _pint_convert(values[10], from_unit, to_unit), rel=1e-13)
+    assert convert_to([1., 2.], from_unit, to_unit) == pytest.approx(_pint_convert([1., 2.], from_unit, to_unit))
+
+
+def test_convert_to_keeps_types_and_warnings(caplog):
+    assert convert_to(10, "Pa", "Pa") == 10
+    assert isinstance(convert_to(10, "Pa", "Pa"), int)
+    assert convert_to(np.arange(3), "degrees_north", "degrees").dtype == np.arange(3).dtype
+    assert convert_to(np.ones(3, dtype=np.float32), "Pa", "hPa").dtype == np.float32
+    for _ in range(2):
+        caplog.clear()
+        assert convert_to(1000, "whattheheck", "Pa", 999) == 999000
+        assert convert_to(1000, "Pa", "m**2s**-2", 999) == 999000
+        assert [record.getMessage() for record in caplog.records] == [
+            "Error in unit conversion (undefined) 'whattheheck'/'Pa'",
+            "Error in unit conversion (dimensionality) 'Pa'/'m**2s**-2'"]
+
+
+def test_convert_to_benchmark():
+    values = np.linspace(200, 300, 10 ** 6)
+    for from_unit, to_unit in [("Pa", "hPa"), ("K", "degC"), ("m^2s^-2", "m")]:
+        convert_to(values, from_unit, to_unit)
+        begin = time.time()
+        for _ in range(1000):
+            convert_to(250., from_unit, to_unit)
+        scalar = (time.time() - begin) / 1000
+        begin = time.time()
+        for _ in range(1000):
+            _pint_convert(250., from_unit, to_unit)
+        pint_scalar = (time.time() - begin) / 1000
+        begin = time.time()
+        convert_to(values, from_unit, to_unit)
+        array = time.time() - begin
+        logging.info("%s->%s: %.1fus per scalar (pint %.1fus), %.4fs for %d values",
+                     from_unit, to_unit, scalar * 1e6, pint_scalar * 1e6, array, len(values))
+        assert scalar < pint_scalar
@@ -25,10 +25,19 @@
     See the License for the specific language governing permissions and
     limitations under the License.
 """
+import io
+import itertools
 import requests
 import fs
-
-from urllib.parse import urljoin
+import numpy as np
+import select
+import socket
+import socketserver
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlsplit, parse_qs
+from PIL import Image
 from mslib.mscolab.server import register_user
 from flask import json
 from tests.constants import MSUI_CONFIG_PATH
@@ -216,6 +225,21 @@ def create_msui_settings_file(content):
         file_dir.writetext("msui_settings.json", content)
 
 
+def create_long_track(n_points=100000):
+    """
+    Returns the waypoints of a wavy track like a recorded aircraft trajectory, with every
+    hundredth waypoint named. The coordinates and flight levels have three decimals.
+    """
+    # not imported at module level, the tests of mscolab and mswms must not depend on msui
+    import mslib.msui.flighttrack as ft
+    t = np.linspace(0, 1, n_points)
+    lats = np.round(40 + 20 * t + 0.3 * np.sin(200 * t), 3)
+    lons = np.round(-30 + 50 * t + 0.3 * np.cos(150 * t), 3)
+    flightlevels = np.round(300 + 100 * np.sin(10 * t), 3)
+    locations = [f"P{i}" if i % 100 == 0 else "" for i in range(n_points)]
+    return ft.create_waypoints(lats.tolist(), lons.tolist(), flightlevels.tolist(), locations, [""] * n_points)
+
+
 def is_url_response_ok(url):
     try:
         response = requests.get(url)
@@ -236,3 +260,106 @@ class ExceptionMock:
 
     def raise_exc(self, *args, **kwargs):
         raise self.exc
+
+
+class RoundRobinProxy:
+    """
+    TCP proxy on localhost handing every new connection to the next of several backends
+
+    A stand-in for the load balancer in front of several MSColab worker processes,
+    connections[i] counts the connections forwarded to backends[i].
+    """
+    def __init__(self, backends):
+        self.backends = backends
+        self.connections = [0] * len(backends)
+        self._next_backend = itertools.cycle(range(len(backends)))
+        self._lock = threading.Lock()
+        proxy = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                with proxy._lock:
+                    index = next(proxy._next_backend)
+                    proxy.connections[index] += 1
+                with socket.create_connection(proxy.backends[index]) as backend:
+                    sockets = [self.request, backend]
+                    while True:
+                        readable, _, _ = select.select(sockets, [], [])
+                        for source in readable:
+                            data = source.recv(65536)
+                            if not data:
+                                return
+                            (backend if source is self.request else self.request).sendall(data)
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class WMSStandIn:
+    """
+    HTTP/1.1 server on localhost answering every GetMap request with a PNG image
+
+    A stand-in for a WMS server, connections counts the accepted TCP connections
+    and requests the requests, failures makes the first requests fail with 503.
+    delay holds every response back by that many seconds.
+    """
+    def __init__(self, failures=0, delay=0):
+        self.connections = 0
+        self.requests = []
+        self.failures = failures
+        self.delay = delay
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stand_in._lock:
+                    stand_in.connections += 1
+
+            def do_GET(self):
+                query = {key.lower(): value[0] for key, value in parse_qs(urlsplit(self.path).query).items()}
+                with stand_in._lock:
+                    stand_in.requests.append(query)
+                    failure = len(stand_in.requests) <= stand_in.failures
+                if stand_in.delay:
+                    threading.Event().wait(stand_in.delay)
+                if failure:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                image_io = io.BytesIO()
+                Image.new("RGBA", (int(query.get("width", 10)), int(query.get("height", 10))),
+                          (len(stand_in.requests) % 256, 0, 0, 255)).save(image_io, format="PNG")
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(image_io.getvalue())))
+                self.end_headers()
+                self.wfile.write(image_io.getvalue())
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/wms"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()